@@ -2,14 +2,15 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import LoanApplication, Investment, Profile
+from .models import LoanApplication, Investment, InvestmentSummary, Profile
 
 @admin.register(LoanApplication)
 class LoanApplicationAdmin(admin.ModelAdmin):
     list_display = ('loan_amount', 'income', 'expenses', 'emi',
                     'interest_rate', 'loan_term',
-                    'predicted_loan_approval', 'predicted_loan_term', 'created_at')
-    list_filter  = ('predicted_loan_approval',)
+                    'predicted_loan_approval', 'predicted_probability', 'predicted_loan_term', 'repay_fail',
+                    'created_at')
+    list_filter  = ('predicted_loan_approval', 'repay_fail')
     search_fields = ('loan_amount',)
 
 @admin.register(Investment)
@@ -18,6 +19,12 @@ class InvestmentAdmin(admin.ModelAdmin):
     list_filter  = ('investment_type',)
     search_fields = ('user__username',)
 
+@admin.register(InvestmentSummary)
+class InvestmentSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'count', 'total', 'last_investment_date', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('total', 'count', 'type_totals', 'last_investment_date', 'updated_at')
+
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'salary')
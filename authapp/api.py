@@ -0,0 +1,302 @@
+# authapp/api.py
+#
+# JSON prediction API for integrations (routed under /api/ in authapp/urls.py):
+#   POST /api/predict/        one JSON object -> one result (add ?explain=1 for feature attributions)
+#   POST /api/predict/batch/  JSON array or NDJSON body -> one result per row, in input order
+# Every request needs `Authorization: Bearer <LOAN_API_TOKEN>` or a logged-in session (which is
+# CSRF-checked like a form post); with LOAN_API_TOKEN unset only sessions get in.
+# Batches are limited to API_MAX_BODY_BYTES and API_MAX_BATCH_ROWS. Bodies are read from the
+# request stream rather than request.body, so DATA_UPLOAD_MAX_MEMORY_SIZE (meant for form posts)
+# does not apply. Rows are scored in chunks with the vectorized predict_loan_approval_batch.
+# An NDJSON body is never held whole: its lines are read as each chunk is scored, and the NDJSON
+# response is written chunk by chunk; a limit crossed mid-stream ends it with an error line.
+# A JSON array is read and parsed in the view first (413 beyond a limit); an
+# `Accept: application/x-ndjson` header or more than API_STREAM_THRESHOLD rows streams its results.
+# The a* views are the same endpoints for ASGI (settings.ASYNC_VIEWS): scoring runs in the
+# predictor's bounded executor, and a full executor answers 503 instead of queueing.
+
+import hmac
+import json
+import os
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from ml_models.executor import ExecutorBusy
+from ml_models.predictor import (
+    apredict_loan_approval,
+    predict_loan_approval,
+    predict_loan_approval_batch,
+    run_scoring,
+    validate_loan_input,
+)
+
+# Rows scored per vectorized call (and per streamed write)
+API_BATCH_CHUNK = int(os.environ.get('LOAN_API_BATCH_CHUNK', '500'))
+# JSON-array batches longer than this are answered as NDJSON
+API_STREAM_THRESHOLD = int(os.environ.get('LOAN_API_STREAM_THRESHOLD', '1000'))
+# Largest batch accepted: body size in bytes and number of rows
+API_MAX_BODY_BYTES = int(os.environ.get('LOAN_API_MAX_BODY_BYTES', str(16 * 1024 * 1024)))
+API_MAX_BATCH_ROWS = int(os.environ.get('LOAN_API_MAX_BATCH_ROWS', '20000'))
+# Token for `Authorization: Bearer <token>`; when empty only logged-in sessions are accepted
+API_TOKEN = os.environ.get('LOAN_API_TOKEN', '')
+
+NDJSON = 'application/x-ndjson'
+
+
+class BatchTooLarge(ValueError):
+    """A batch body or row count over API_MAX_BODY_BYTES / API_MAX_BATCH_ROWS (answered 413)."""
+
+
+def _denied(request):
+    """None when the request may use the API, otherwise the 401/403 response."""
+    authorization = request.headers.get('Authorization', '')
+    if authorization:
+        supplied = authorization.removeprefix('Bearer ').strip()
+        if API_TOKEN and hmac.compare_digest(supplied.encode(), API_TOKEN.encode()):
+            return None
+        return JsonResponse({'error': 'Missing or invalid API token'}, status=401)
+    if request.user.is_authenticated:
+        # The views are csrf_exempt for token clients; a browser session gets the usual check
+        if CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {}) is None:
+            return None
+        return JsonResponse({'error': 'CSRF verification failed'}, status=403)
+    return JsonResponse({'error': 'Missing or invalid API token'}, status=401)
+
+
+def _check_declared_length(request) -> None:
+    try:
+        declared = int(request.headers.get('Content-Length') or 0)
+    except ValueError:
+        declared = 0
+    if declared > API_MAX_BODY_BYTES:
+        raise BatchTooLarge(f"Request body over {API_MAX_BODY_BYTES} bytes")
+
+
+def _read_batch_body(request) -> bytes:
+    _check_declared_length(request)
+    body = request.read(API_MAX_BODY_BYTES + 1)
+    if len(body) > API_MAX_BODY_BYTES:
+        raise BatchTooLarge(f"Request body over {API_MAX_BODY_BYTES} bytes")
+    return body
+
+
+def _ndjson_rows(request):
+    """
+    Rows of an NDJSON body, read from the request stream one line at a time; a line that is not
+    JSON becomes a ValueError in its row's place. Raises BatchTooLarge once a limit is crossed.
+    """
+    read = rows = 0
+    while True:
+        line = request.readline(API_MAX_BODY_BYTES + 1 - read)
+        if not line:
+            return
+        read += len(line)
+        if read > API_MAX_BODY_BYTES:
+            raise BatchTooLarge(f"Request body over {API_MAX_BODY_BYTES} bytes")
+        line = line.strip()
+        if not line:
+            continue
+        rows += 1
+        if rows > API_MAX_BATCH_ROWS:
+            raise BatchTooLarge(f"At most {API_MAX_BATCH_ROWS} rows per request")
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def _score_chunk(start, rows):
+    """Results for one chunk: valid rows scored in one batch call, invalid ones reported per row."""
+    results = [None] * len(rows)
+    valid = []
+    for i, row in enumerate(rows):
+        try:
+            if isinstance(row, Exception):
+                raise row
+            if not isinstance(row, dict):
+                raise ValueError("Each row must be a JSON object")
+            validate_loan_input(row)
+            valid.append(i)
+        except ValueError as e:
+            results[i] = {'row': start + i, 'error': str(e)}
+    if valid:
+        try:
+            scored = predict_loan_approval_batch([rows[i] for i in valid])
+        except ValueError:
+            # A bad value (e.g. a non-numeric rate) fails the whole call; find it row by row
+            scored = []
+            for i in valid:
+                try:
+                    scored.append(predict_loan_approval(rows[i]))
+                except ValueError as e:
+                    scored.append({'error': str(e)})
+                except RuntimeError as e:
+                    scored.append({'error': f"Prediction failed: {str(e)}"})
+        except RuntimeError as e:
+            # The model could not score (not loaded, pool timeout, ...): every row of the chunk says so
+            scored = [{'error': f"Prediction failed: {str(e)}"} for _ in valid]
+        for i, result in zip(valid, scored):
+            results[i] = {'row': start + i, **result}
+    return results
+
+
+def _next_results(rows, start):
+    """
+    Read and score the next chunk of an iterator of rows; an empty list at the end. A limit
+    crossed while reading ends the batch: the rows read so far are scored, then an error line.
+    """
+    chunk = []
+    try:
+        chunk.extend(islice(rows, API_BATCH_CHUNK))
+    except BatchTooLarge as e:
+        # The row generator is finished after raising, so the next call returns []
+        return _score_chunk(start, chunk) + [{'row': start + len(chunk), 'error': str(e)}]
+    return _score_chunk(start, chunk) if chunk else []
+
+
+def _ndjson_lines(results):
+    return ''.join(json.dumps(r) + '\n' for r in results)
+
+
+def _stream_results(rows):
+    rows = iter(rows)
+    start = 0
+    while True:
+        results = _next_results(rows, start)
+        if not results:
+            return
+        yield _ndjson_lines(results)
+        start += len(results)
+
+
+async def _astream_results(rows):
+    rows = iter(rows)
+    start = 0
+    while True:
+        try:
+            results = await run_scoring(_next_results, rows, start)
+        except ExecutorBusy as e:
+            # Headers are already sent: the error becomes the last line
+            yield json.dumps({'row': start, 'error': str(e)}) + '\n'
+            return
+        if not results:
+            return
+        yield _ndjson_lines(results)
+        start += len(results)
+
+
+def _parse_batch(request):
+    """
+    ('stream', rows) or ('json', rows) for a batch request; raises ValueError for a bad body.
+    NDJSON rows are a generator over the request stream, read as the response is written.
+    """
+    if request.content_type == NDJSON:
+        _check_declared_length(request)
+        return 'stream', _ndjson_rows(request)
+    rows = json.loads(_read_batch_body(request))
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array (or an NDJSON body)")
+    stream = NDJSON in request.headers.get('Accept', '') or len(rows) > API_STREAM_THRESHOLD
+    kind = 'stream' if stream else 'json'
+    if len(rows) > API_MAX_BATCH_ROWS:
+        raise BatchTooLarge(f"At most {API_MAX_BATCH_ROWS} rows per request, got {len(rows)}")
+    return kind, rows
+
+
+def _parse_single(request):
+    input_data = json.loads(request.body)
+    if not isinstance(input_data, dict):
+        raise ValueError("Expected a JSON object")
+    return input_data
+
+
+# Single prediction: POST a JSON object of the form fields (term, int_rate, emp_length,
+# loan_amount, income, expenses, emi)
+@csrf_exempt
+@require_POST
+def predict_view(request):
+    denied = _denied(request)
+    if denied:
+        return denied
+    try:
+        result = predict_loan_approval(_parse_single(request), explain=request.GET.get('explain') == '1')
+    except ValueError as e:
+        return JsonResponse({'error': f"Invalid input: {str(e)}"}, status=400)
+    except RuntimeError as e:
+        return JsonResponse({'error': f"Prediction failed: {str(e)}"}, status=500)
+    return JsonResponse(result)
+
+
+# Batch prediction: POST a JSON array of objects, or NDJSON (one object per line)
+@csrf_exempt
+@require_POST
+def predict_batch_view(request):
+    denied = _denied(request)
+    if denied:
+        return denied
+    try:
+        kind, rows = _parse_batch(request)
+    except BatchTooLarge as e:
+        return JsonResponse({'error': str(e)}, status=413)
+    except ValueError as e:
+        return JsonResponse({'error': f"Invalid input: {str(e)}"}, status=400)
+    if kind == 'stream':
+        return StreamingHttpResponse(_stream_results(rows), content_type=NDJSON)
+
+    results = []
+    for start in range(0, len(rows), API_BATCH_CHUNK):
+        results.extend(_score_chunk(start, rows[start:start + API_BATCH_CHUNK]))
+    return JsonResponse({'results': results})
+
+
+def _busy(e):
+    return JsonResponse({'error': str(e)}, status=503, headers={'Retry-After': '1'})
+
+
+@csrf_exempt
+@require_POST
+async def apredict_view(request):
+    # Loading the session user touches the database, so the check runs in a thread
+    denied = await sync_to_async(_denied)(request)
+    if denied:
+        return denied
+    try:
+        result = await apredict_loan_approval(_parse_single(request), explain=request.GET.get('explain') == '1')
+    except ExecutorBusy as e:
+        return _busy(e)
+    except ValueError as e:
+        return JsonResponse({'error': f"Invalid input: {str(e)}"}, status=400)
+    except RuntimeError as e:
+        return JsonResponse({'error': f"Prediction failed: {str(e)}"}, status=500)
+    return JsonResponse(result)
+
+
+@csrf_exempt
+@require_POST
+async def apredict_batch_view(request):
+    denied = await sync_to_async(_denied)(request)
+    if denied:
+        return denied
+    try:
+        # Reading and parsing a JSON array is blocking work; keep it off the event loop
+        kind, rows = await sync_to_async(_parse_batch, thread_sensitive=False)(request)
+    except BatchTooLarge as e:
+        return JsonResponse({'error': str(e)}, status=413)
+    except ValueError as e:
+        return JsonResponse({'error': f"Invalid input: {str(e)}"}, status=400)
+    if kind == 'stream':
+        return StreamingHttpResponse(_astream_results(rows), content_type=NDJSON)
+
+    results = []
+    try:
+        for start in range(0, len(rows), API_BATCH_CHUNK):
+            results.extend(await run_scoring(_score_chunk, start, rows[start:start + API_BATCH_CHUNK]))
+    except ExecutorBusy as e:
+        return _busy(e)
+    return JsonResponse({'results': results})
+
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AuthappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authapp'
+
+    def ready(self):
+        # Registers the InvestmentSummary maintenance handlers
+        from authapp import signals  # noqa: F401
@@ -0,0 +1,139 @@
+# authapp/dashboard_cache.py
+#
+# Per-user cache for what the dashboard pages compute: the savings totals, the rendered
+# investment table, the chart series and the application summary on home. Every entry belongs
+# to one section of one user's data, and authapp.signals moves that section to a new version
+# when a row it is computed from is saved or deleted. Entries are stored together with the
+# version they were computed at, and the version is fetched in the same get_many(), so a
+# lookup is one cache round trip and an invalidation is one write however many entries
+# (e.g. series for different date ranges) the section holds.
+
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable
+
+from django.core.cache import caches
+
+KEY_PREFIX = 'dashboard'
+DASHBOARD_CACHE_ALIAS = os.environ.get('DASHBOARD_CACHE_ALIAS', 'default')
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '600'))
+
+# Section -> what it holds (the models each one depends on are listed in authapp.signals)
+SECTIONS = {
+    'savings': "salary, total invested, remaining and percentage",
+    'investments': "rendered investment table and chart series",
+    'applications': "loan application summary on home",
+}
+
+
+class DashboardCache:
+    """
+    get_or_set() per (user, section, name) on a Django cache, with per-section invalidation.
+
+    The version is read before the value is computed, so an invalidation that lands while a
+    page is being computed leaves that result under the old version, where nobody reads it.
+    Hit/miss/invalidation counters are per process.
+    """
+
+    def __init__(self, alias: str = 'default', timeout: int = 600):
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.stats = {section: {"hits": 0, "misses": 0, "invalidations": 0} for section in SECTIONS}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self) -> bool:
+        return self.timeout > 0
+
+    def _keys(self, user_id: int, section: str, name: str):
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown dashboard section {section!r}")
+        base = f"{KEY_PREFIX}:{user_id}:{section}"
+        return f"{base}:version", f"{base}:{name}"
+
+    def _lookup(self, found: Dict[str, Any], version_key: str, entry_key: str, section: str):
+        version, entry = found.get(version_key), found.get(entry_key)
+        hit = version is not None and entry is not None and entry[0] == version
+        with self._lock:
+            self.stats[section]["hits" if hit else "misses"] += 1
+        return hit, entry[1] if hit else None, version
+
+    @staticmethod
+    def _new_version() -> str:
+        # Random rather than a counter: a version key lost to culling must not come back as a
+        # value that old entries still carry
+        return uuid.uuid4().hex[:12]
+
+    def get_or_set(self, user_id: int, section: str, name: str, compute: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return compute()
+        version_key, entry_key = self._keys(user_id, section, name)
+        hit, value, version = self._lookup(self.cache.get_many([version_key, entry_key]), version_key, entry_key, section)
+        if hit:
+            return value
+        if version is None:
+            version = self._new_version()
+            if not self.cache.add(version_key, version, timeout=None):
+                version = self.cache.get(version_key)
+        value = compute()
+        self.cache.set(entry_key, (version, value), timeout=self.timeout)
+        return value
+
+    async def aget_or_set(self, user_id: int, section: str, name: str, compute: Callable[[], Any]) -> Any:
+        """get_or_set() for async views; `compute` is a coroutine function."""
+        if not self.enabled:
+            return await compute()
+        version_key, entry_key = self._keys(user_id, section, name)
+        hit, value, version = self._lookup(await self.cache.aget_many([version_key, entry_key]),
+                                           version_key, entry_key, section)
+        if hit:
+            return value
+        if version is None:
+            version = self._new_version()
+            if not await self.cache.aadd(version_key, version, timeout=None):
+                version = await self.cache.aget(version_key)
+        value = await compute()
+        await self.cache.aset(entry_key, (version, value), timeout=self.timeout)
+        return value
+
+    def invalidate(self, user_ids: Iterable[int], sections: Iterable[str]) -> None:
+        """Drop every entry of `sections` for `user_ids` (users that are None are skipped)."""
+        sections = list(sections)
+        versions = {
+            self._keys(user_id, section, '')[0]: self._new_version()
+            for user_id in set(user_ids) if user_id is not None
+            for section in sections
+        }
+        if not versions:
+            return
+        self.cache.set_many(versions, timeout=None)
+        with self._lock:
+            for section in sections:
+                self.stats[section]["invalidations"] += len(versions) // len(sections)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sections = {section: dict(counts) for section, counts in self.stats.items()}
+        for counts in sections.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_ratio"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        hits = sum(c["hits"] for c in sections.values())
+        misses = sum(c["misses"] for c in sections.values())
+        return {
+            "alias": self.alias,
+            "backend": type(self.cache).__name__,
+            "timeout": self.timeout,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "invalidations": sum(c["invalidations"] for c in sections.values()),
+            "sections": sections,
+        }
+
+
+dashboard_cache = DashboardCache(DASHBOARD_CACHE_ALIAS, DASHBOARD_CACHE_TIMEOUT)
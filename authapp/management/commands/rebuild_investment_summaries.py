@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from authapp.dashboard_cache import dashboard_cache
+from authapp.models import Investment, InvestmentSummary
+
+
+class Command(BaseCommand):
+    help = ("Recompute InvestmentSummary rows from Investment with database aggregation "
+            "(needed after bulk_create or queryset.update(), which skip the signal handlers)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=None,
+                            help="username to rebuild (repeatable; default: every user with investments or a summary)")
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user_ids = list(get_user_model().objects.filter(username__in=options['user']).values_list('id', flat=True))
+        else:
+            user_ids = set(Investment.objects.order_by().values_list('user_id', flat=True).distinct())
+            user_ids |= set(InvestmentSummary.objects.values_list('user_id', flat=True))
+        for user_id in sorted(user_ids):
+            InvestmentSummary.rebuild(user_id)
+        # The cached pages were built from the summaries just replaced
+        dashboard_cache.invalidate(user_ids, ['savings', 'investments'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt investment summaries for {len(user_ids)} users"))
@@ -0,0 +1,97 @@
+import os
+import pickle
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from authapp.models import LoanApplication
+from ml_models.incremental import STATE_FILE, application_features, grow_forest, read_state, write_state
+from ml_models.schema import FeatureSchema
+
+ML_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), 'ml_models')
+
+FIELDS = ['id', 'outcome_recorded_at', 'repay_fail', 'loan_amount', 'income', 'expenses', 'emi',
+          'interest_rate', 'loan_term', 'emp_length']
+
+
+class Command(BaseCommand):
+    help = "Add trees trained on LoanApplication rows labelled since the last run to the published loan model"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=os.path.join(ML_DIR, 'model.pkl'))
+        parser.add_argument('--trees', type=int, default=10, help="trees to add per run")
+        parser.add_argument('--max-trees', type=int, default=None,
+                            help="drop the oldest added trees beyond this many in total (default: keep all); "
+                                 "the trees of the full training run are always kept")
+        parser.add_argument('--min-rows', type=int, default=200,
+                            help="wait for at least this many new labelled rows")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help="fit and report, but do not publish")
+
+    def handle(self, *args, **options):
+        model_path = options['model']
+        state_path = os.path.join(os.path.dirname(model_path), STATE_FILE)
+        state = read_state(state_path)
+        started = time.perf_counter()
+
+        # Keyset pagination on (outcome_recorded_at, id): only rows labelled after the watermark
+        rows = LoanApplication.objects.filter(repay_fail__isnull=False, outcome_recorded_at__isnull=False)
+        watermark = state.get('watermark')
+        if watermark:
+            ts = parse_datetime(watermark['outcome_recorded_at'])
+            rows = rows.filter(Q(outcome_recorded_at__gt=ts) | Q(outcome_recorded_at=ts, id__gt=watermark['id']))
+        rows = rows.order_by('outcome_recorded_at', 'id').values(*FIELDS)
+
+        features, labels, last = [], [], None
+        for row in rows.iterator(chunk_size=options['chunk_size']):
+            features.append(application_features(row))
+            labels.append(int(row['repay_fail']))
+            last = row
+
+        if len(labels) < options['min_rows']:
+            self.stdout.write(f"{len(labels)} new labelled rows since the last run; waiting for {options['min_rows']}")
+            return
+
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        schema = FeatureSchema.from_pipeline(model)
+        X = schema.to_frame(*schema.fill(features))
+        try:
+            stats = grow_forest(model, X, np.asarray(labels), options['trees'], options['max_trees'] or None)
+        except ValueError as e:
+            raise CommandError(f"Incremental retrain skipped: {e}")
+
+        proba = model.predict_proba(X)[:, 1]
+        if not np.isfinite(proba).all():
+            raise CommandError("Retrained model produced invalid probabilities; not publishing")
+
+        version = state.get('version', 0) + 1
+        stats.update(version=version, seconds=round(time.perf_counter() - started, 3),
+                     watermark={'outcome_recorded_at': last['outcome_recorded_at'].isoformat(), 'id': last['id']})
+        if options['dry_run']:
+            self.stdout.write(f"Dry run, not published: {stats}")
+            return
+
+        # Same atomic publish as model.py; running servers pick it up through hot reload
+        tmp_path = model_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(model, f, protocol=4)
+        os.replace(tmp_path, model_path)
+
+        artifact_dir = os.path.join(os.path.dirname(model_path), 'model_artifact')
+        if os.path.isdir(artifact_dir):
+            from ml_models.artifact import convert_pickle
+            convert_pickle(model_path, artifact_dir)
+
+        state.update(version=version, watermark=stats['watermark'])
+        state.setdefault('history', []).append(
+            {k: stats[k] for k in ('version', 'rows', 'trees_added', 'trees_dropped', 'trees', 'fit_seconds')}
+        )
+        write_state(state_path, state)
+        self.stdout.write(self.style.SUCCESS(
+            f"Published model version {version}: {stats['rows']} new rows, {stats['trees']} trees "
+            f"({stats['trees_added']} added, {stats['trees_dropped']} dropped) in {stats['seconds']}s"
+        ))
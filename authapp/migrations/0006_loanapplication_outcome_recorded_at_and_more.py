@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0005_alter_investment_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanapplication',
+            name='outcome_recorded_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loanapplication',
+            name='repay_fail',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+    ]
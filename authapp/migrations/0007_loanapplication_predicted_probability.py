@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0006_loanapplication_outcome_recorded_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanapplication',
+            name='predicted_probability',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loanapplication',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loanapplication',
+            name='scored_model',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
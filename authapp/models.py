@@ -1,10 +1,15 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.db.models import Count, Max, Sum
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 User = get_user_model()
+
+# Investment amounts are stored to the paisa; aggregates (e.g. SQLite's SUM) can come back wider
+CENTS = Decimal('0.01')
 class LoanApplication(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,null = True, related_name='loan_applications')
     loan_amount = models.DecimalField(max_digits=12, decimal_places=2)
@@ -17,10 +22,23 @@ class LoanApplication(models.Model):
     predicted_loan_term = models.IntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     emp_length = models.CharField(max_length=20, null=True, blank=True)  # Add emp_length field if needed
+    # Observed outcome, entered once the loan has run its course; labelled rows feed incremental retraining
+    repay_fail = models.BooleanField(null=True, blank=True)
+    outcome_recorded_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Latest model score (probability of repay_fail), refreshed nightly by `manage.py rescore_applications`
+    predicted_probability = models.FloatField(null=True, blank=True)
+    scored_at = models.DateTimeField(null=True, blank=True)
+    scored_model = models.CharField(max_length=64, blank=True, default='')
 
     def __str__(self):
         return f"Loan of ₹{self.loan_amount} for {self.loan_term} months by {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        # Stamp when the outcome arrives; the retraining watermark follows this, not created_at
+        if self.repay_fail is not None and self.outcome_recorded_at is None:
+            self.outcome_recorded_at = timezone.now()
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Loan Application"
         verbose_name_plural = "Loan Applications"
@@ -50,6 +68,97 @@ class Investment(models.Model):
         verbose_name = "Investment"
         verbose_name_plural = "Investments"
         ordering = ['-investment_date']
+        # A user's history by date: the savings chart series and the summary's date lookups
+        indexes = [models.Index(fields=['user', 'investment_date'], name='investment_user_date_idx')]
+
+
+class InvestmentSummary(models.Model):
+    """
+    Per-user running totals of Investment, so pages read one row instead of the whole history.
+    Kept current by the Investment signal handlers in authapp/signals.py; rebuild() re-aggregates
+    in the database (also `manage.py rebuild_investment_summaries`, e.g. after a bulk import).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='investment_summary')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    count = models.PositiveIntegerField(default=0)
+    # investment_type -> {"total": "<decimal>", "count": n}; amounts as strings to stay exact
+    type_totals = models.JSONField(default=dict, blank=True)
+    last_investment_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.count} investments, ₹{self.total}"
+
+    @classmethod
+    def for_user(cls, user) -> 'InvestmentSummary':
+        summary = cls.objects.filter(user=user).first()
+        # Users whose history predates the summary table get theirs on first read
+        return summary if summary is not None else cls.rebuild(user.pk)
+
+    @classmethod
+    async def afor_user(cls, user) -> 'InvestmentSummary':
+        summary = await cls.objects.filter(user=user).afirst()
+        return summary if summary is not None else await sync_to_async(cls.rebuild)(user.pk)
+
+    @classmethod
+    def rebuild(cls, user_id) -> 'InvestmentSummary':
+        """Recompute a user's summary with one grouped aggregate query."""
+        # order_by() drops Investment's default ordering, which would otherwise join the GROUP BY
+        rows = list(Investment.objects.filter(user_id=user_id).order_by().values('investment_type')
+                    .annotate(total=Sum('amount'), count=Count('id'), last=Max('investment_date')))
+        for r in rows:
+            r['total'] = Decimal(str(r['total'])).quantize(CENTS)
+        type_totals = {r['investment_type']: {"total": str(r['total']), "count": r['count']} for r in rows}
+        last_dates = [r['last'] for r in rows]
+        summary, _ = cls.objects.update_or_create(user_id=user_id, defaults={
+            'total': sum((r['total'] for r in rows), Decimal('0')),
+            'count': sum(r['count'] for r in rows),
+            'type_totals': type_totals,
+            'last_investment_date': max(last_dates) if last_dates else None,
+        })
+        return summary
+
+    @classmethod
+    def record(cls, user_id, added=None, removed=None) -> None:
+        """
+        Apply one investment change: `added`/`removed` hold the investment_type, amount and
+        investment_date of the row as it is now / as it was. Without a summary there is nothing
+        to keep current, except on a user's first save, which builds it.
+        """
+        with transaction.atomic():
+            summary = cls.objects.select_for_update().filter(user_id=user_id).first()
+            if summary is None:
+                if added is not None:
+                    cls.rebuild(user_id)
+                return
+            # A latest date cannot be decremented: losing the row that held it means asking the database.
+            # Only that column, not a rebuild: a queryset delete removes all its rows before the first
+            # post_delete, so a rebuild there would count the later handlers' removals twice.
+            recheck_last = removed is not None and summary.last_investment_date is not None \
+                and removed['investment_date'] >= summary.last_investment_date
+
+            for row, sign in ((removed, -1), (added, 1)):
+                if row is None:
+                    continue
+                amount = Decimal(str(row['amount'])).quantize(CENTS) * sign
+                entry = summary.type_totals.get(row['investment_type'], {"total": "0", "count": 0})
+                entry = {"total": str(Decimal(entry['total']) + amount), "count": entry['count'] + sign}
+                if entry['count'] > 0:
+                    summary.type_totals[row['investment_type']] = entry
+                else:
+                    summary.type_totals.pop(row['investment_type'], None)
+                summary.total += amount
+                summary.count += sign
+                if sign > 0 and (summary.last_investment_date is None or row['investment_date'] > summary.last_investment_date):
+                    summary.last_investment_date = row['investment_date']
+            if recheck_last:
+                summary.last_investment_date = (Investment.objects.filter(user_id=user_id)
+                                                .aggregate(last=Max('investment_date'))['last'])
+            summary.save()
+
+    class Meta:
+        verbose_name = "Investment Summary"
+        verbose_name_plural = "Investment Summaries"
 
 
 class Profile(models.Model):
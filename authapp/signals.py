@@ -0,0 +1,76 @@
+# authapp/signals.py
+#
+# Keep InvestmentSummary in step with Investment. Signals rather than Investment.save()/delete()
+# overrides, so queryset and admin bulk deletes are covered too (bulk_create and
+# queryset.update() still bypass them: run `manage.py rebuild_investment_summaries` after those).
+# Also invalidates the cached dashboard sections (authapp.dashboard_cache) built from each model.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from authapp.dashboard_cache import dashboard_cache
+from authapp.models import Investment, InvestmentSummary, LoanApplication, Profile
+
+SUMMARY_FIELDS = ('user_id', 'investment_type', 'amount', 'investment_date')
+
+# Dashboard sections computed from each model's rows
+DASHBOARD_SECTIONS = {
+    Investment: ('savings', 'investments'),
+    Profile: ('savings',),
+    LoanApplication: ('applications',),
+}
+
+
+def _values(investment: Investment):
+    values = {f: getattr(investment, f) for f in SUMMARY_FIELDS}
+    # Fields may still hold what was assigned (e.g. a date string); use what the database stored
+    for field in ('amount', 'investment_date'):
+        values[field] = Investment._meta.get_field(field).to_python(values[field])
+    return values
+
+
+@receiver(pre_save, sender=Investment)
+def remember_previous_investment(sender, instance, **kwargs):
+    # The row as stored before this save, so an edit can be applied as remove + add
+    instance._summary_previous = (
+        Investment.objects.filter(pk=instance.pk).values(*SUMMARY_FIELDS).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Investment)
+def update_summary_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    current = _values(instance)
+    if previous is not None and previous['user_id'] != current['user_id']:
+        InvestmentSummary.record(previous['user_id'], removed=previous)
+        previous = None
+    InvestmentSummary.record(current['user_id'], added=current, removed=previous)
+
+
+@receiver(post_delete, sender=Investment)
+def update_summary_on_delete(sender, instance, **kwargs):
+    InvestmentSummary.record(instance.user_id, removed=_values(instance))
+
+
+def invalidate_dashboard(user_ids, sections):
+    # After commit: a page computed before then still sees the old rows and must not be the
+    # one cached under the new version
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: dashboard_cache.invalidate(user_ids, sections))
+
+
+@receiver(post_save, sender=Investment)
+@receiver(post_delete, sender=Investment)
+def invalidate_investment_dashboard(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    user_ids = {instance.user_id, previous['user_id'] if previous else None}
+    invalidate_dashboard(user_ids, DASHBOARD_SECTIONS[Investment])
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=LoanApplication)
+@receiver(post_delete, sender=LoanApplication)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard({instance.user_id}, DASHBOARD_SECTIONS[sender])
@@ -1,3 +1,569 @@
-from django.test import TestCase
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from authapp import api, views
+from authapp.dashboard_cache import DashboardCache
+from authapp.models import Investment, InvestmentSummary, LoanApplication, Profile
+from ml_models.executor import ExecutorBusy
+from ml_models.incremental import STATE_FILE, read_state
+
+# Each test gets its own in-memory cache instead of the shared file cache
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'authapp-tests'}}
+
+# Monthly figures, as entered on the home form
+LOW_RISK = dict(loan_amount=Decimal('5000'), income=Decimal('20000'), expenses=Decimal('1800'), emi=Decimal('200'),
+                interest_rate=Decimal('6'), loan_term=36, emp_length='10')
+HIGH_RISK = dict(loan_amount=Decimal('35000'), income=Decimal('1500'), expenses=Decimal('1800'), emi=Decimal('1200'),
+                 interest_rate=Decimal('24'), loan_term=60, emp_length='0')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RescoreApplicationsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('applicant', password='secret-pass-123')
+
+    def rescore(self, *args):
+        call_command('rescore_applications', '--mode', 'compiled', *args, stdout=StringIO())
+
+    def test_predicted_default_is_not_approved(self):
+        risky = LoanApplication.objects.create(user=self.user, **HIGH_RISK)
+        safe = LoanApplication.objects.create(user=self.user, **LOW_RISK)
+        self.rescore()
+        risky.refresh_from_db()
+        safe.refresh_from_db()
+        # predicted_probability is the probability of repay_fail
+        self.assertGreater(risky.predicted_probability, 0.5)
+        self.assertIs(risky.predicted_loan_approval, False)
+        self.assertLess(safe.predicted_probability, 0.5)
+        self.assertIs(safe.predicted_loan_approval, True)
+        self.assertTrue(risky.scored_model)
+
+    def test_dry_run_writes_nothing(self):
+        application = LoanApplication.objects.create(user=self.user, **HIGH_RISK)
+        self.rescore('--dry-run')
+        application.refresh_from_db()
+        self.assertIsNone(application.predicted_probability)
+        self.assertIsNone(application.predicted_loan_approval)
+
+
+class RetrainIncrementalTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('applicant', password='secret-pass-123')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.model_path = os.path.join(directory, 'model.pkl')
+        shutil.copy(os.path.join(settings.BASE_DIR, 'ml_models', 'model.pkl'), self.model_path)
+        self.state_path = os.path.join(directory, STATE_FILE)
+
+    def label(self, n, recorded_at):
+        for i in range(n):
+            LoanApplication.objects.create(user=self.user, **(HIGH_RISK if i % 2 else LOW_RISK),
+                                           repay_fail=bool(i % 2), outcome_recorded_at=recorded_at)
+
+    def retrain(self, *args):
+        out = StringIO()
+        call_command('retrain_incremental', '--model', self.model_path, '--min-rows', '4', '--trees', '3',
+                     *args, stdout=out)
+        return out.getvalue()
+
+    def trees(self):
+        with open(self.model_path, 'rb') as f:
+            return len(pickle.load(f).named_steps['classifier'].estimators_)
+
+    def test_each_run_takes_only_rows_labelled_after_the_watermark(self):
+        base = self.trees()
+        noon = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+        self.label(4, noon)
+        self.retrain()
+        last = LoanApplication.objects.order_by('id').last()
+        state = read_state(self.state_path)
+        self.assertEqual(state['watermark'], {'outcome_recorded_at': noon.isoformat(), 'id': last.id})
+        self.assertEqual((state['version'], state['history'][0]['rows'], self.trees()), (1, 4, base + 3))
+
+        self.assertIn('0 new labelled rows', self.retrain())
+        # Same timestamp as the watermark, later id: still new
+        self.label(4, noon)
+        self.retrain()
+        state = read_state(self.state_path)
+        self.assertEqual((state['version'], state['history'][1]['rows'], self.trees()), (2, 4, base + 6))
+
+    def test_window_keeps_the_trees_of_the_full_training_run(self):
+        base = self.trees()
+        for run in range(3):
+            self.label(4, datetime(2024, 5, 1 + run, tzinfo=timezone.utc))
+            self.retrain('--max-trees', '1')
+        self.assertEqual(self.trees(), base)
+        self.assertEqual([h['trees_dropped'] for h in read_state(self.state_path)['history']], [3, 3, 3])
+
+    def test_dry_run_publishes_nothing(self):
+        self.label(4, datetime(2024, 5, 1, tzinfo=timezone.utc))
+        base = self.trees()
+        self.assertIn('Dry run', self.retrain('--dry-run'))
+        self.assertEqual((self.trees(), read_state(self.state_path)['version']), (base, 0))
+
+
+def form_data(application):
+    return {k: str(v) for k, v in application.items()}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HomeViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('applicant', password='secret-pass-123')
+        self.client.force_login(self.user)
+
+    def test_shows_the_decision_and_what_drove_it(self):
+        response = self.client.post(reverse('authapp:home'), form_data(HIGH_RISK))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Likely Rejected')
+        self.assertContains(response, 'Probability of default')
+        factors = response.context['approval_factors']
+        self.assertTrue(factors)
+        self.assertContains(response, factors[0]['label'])
+
+        application = LoanApplication.objects.get(user=self.user)
+        self.assertIs(application.predicted_loan_approval, False)
+        self.assertEqual(application.predicted_probability, response.context['loan_approval']['probability'])
+
+    def test_summary_counts_the_new_application(self):
+        self.assertEqual(self.client.get(reverse('authapp:home')).context['applications']['count'], 0)
+        # The cached summary is invalidated once the application is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('authapp:home'), form_data(LOW_RISK))
+        summary = self.client.get(reverse('authapp:home')).context['applications']
+        self.assertEqual((summary['count'], summary['approved']), (1, 1))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncHomeViewTest(TestCase):
+    """home_async (settings.ASYNC_VIEWS), called directly since the URLconf picks one view."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('applicant', password='secret-pass-123')
+
+    def request(self, data=None):
+        factory = AsyncRequestFactory()
+        request = factory.post('/home/', data) if data is not None else factory.get('/home/')
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        request._messages = CookieStorage(request)
+        return request
+
+    async def test_scores_in_the_executor_like_the_sync_view(self):
+        with mock.patch('authapp.views.run_scoring', wraps=views.run_scoring) as run_scoring:
+            response = await views.home_async(self.request(form_data(HIGH_RISK)))
+        run_scoring.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Likely Rejected')
+        application = await LoanApplication.objects.aget(user=self.user)
+        self.assertIs(application.predicted_loan_approval, False)
+
+    async def test_full_executor_answers_503_and_saves_nothing(self):
+        request = self.request(form_data(LOW_RISK))
+        with mock.patch('authapp.views.run_scoring', side_effect=ExecutorBusy("Scoring queue is full")):
+            response = await views.home_async(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Please submit again', ' '.join(str(m) for m in get_messages(request)))
+        self.assertFalse(await LoanApplication.objects.filter(user=self.user).aexists())
+
+    async def test_get_shows_the_summary(self):
+        response = await views.home_async(self.request())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Likely Rejected')
+
+
+# What an integration sends: the form fields, monthly amounts
+API_ROW = {'term': 36, 'int_rate': 13.5, 'emp_length': 5, 'loan_amount': 15000, 'income': 5000,
+           'expenses': 1800, 'emi': 450}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PredictionApiTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('integration', password='secret-pass-123')
+
+    def post(self, path, body, client=None, content_type='application/json', **headers):
+        data = body if isinstance(body, str) else json.dumps(body)
+        return (client or self.client).post(reverse(path), data, content_type=content_type, headers=headers)
+
+    def test_closed_without_token_or_session(self):
+        self.assertEqual(self.post('authapp:api_predict', API_ROW).status_code, 401)
+        with mock.patch('authapp.api.API_TOKEN', ''):
+            # No token configured: no bearer value is accepted, not even an empty one
+            self.assertEqual(self.post('authapp:api_predict', API_ROW, authorization='Bearer ').status_code, 401)
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    def test_bearer_token(self):
+        self.assertEqual(self.post('authapp:api_predict', API_ROW, authorization='Bearer t0ken').status_code, 200)
+        self.assertEqual(self.post('authapp:api_predict', API_ROW, authorization='Bearer wrong').status_code, 401)
+
+    def test_session_needs_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        self.assertEqual(self.post('authapp:api_predict', API_ROW, client=client).status_code, 403)
+        client.get(reverse('authapp:home'))
+        token = client.cookies['csrftoken'].value
+        response = self.post('authapp:api_predict', API_ROW, client=client, x_csrftoken=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('approved', response.json())
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    def test_batch_reports_bad_rows_in_place(self):
+        response = self.post('authapp:api_predict_batch', [API_ROW, {'term': 36}, 'not an object', API_ROW],
+                             authorization='Bearer t0ken')
+        results = response.json()['results']
+        self.assertEqual([r['row'] for r in results], [0, 1, 2, 3])
+        self.assertEqual(['error' in r for r in results], [False, True, True, False])
+        self.assertEqual(results[0]['probability'], results[3]['probability'])
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    def test_scoring_failure_is_reported_per_row(self):
+        with mock.patch('authapp.api.predict_loan_approval_batch', side_effect=ExecutorBusy("Scoring queue is full")):
+            response = self.post('authapp:api_predict_batch', [API_ROW, {'term': 36}], authorization='Bearer t0ken')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertIn('Scoring queue is full', results[0]['error'])
+        self.assertIn('error', results[1])
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    def test_batch_limits(self):
+        with mock.patch('authapp.api.API_MAX_BATCH_ROWS', 2):
+            self.assertEqual(self.post('authapp:api_predict_batch', [API_ROW] * 3,
+                                       authorization='Bearer t0ken').status_code, 413)
+        with mock.patch('authapp.api.API_MAX_BODY_BYTES', 100):
+            self.assertEqual(self.post('authapp:api_predict_batch', [API_ROW] * 3,
+                                       authorization='Bearer t0ken').status_code, 413)
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_batch_body_is_not_held_to_the_form_upload_limit(self):
+        response = self.post('authapp:api_predict_batch', [API_ROW] * 50, authorization='Bearer t0ken')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 50)
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    def test_ndjson_in_and_out(self):
+        body = '\n'.join([json.dumps(API_ROW), '{broken', json.dumps(dict(API_ROW, int_rate=20.0))]) + '\n'
+        response = self.post('authapp:api_predict_batch', body, content_type='application/x-ndjson',
+                             authorization='Bearer t0ken')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([r['row'] for r in lines], [0, 1, 2])
+        self.assertIn('Invalid JSON', lines[1]['error'])
+        self.assertIn('probability', lines[2])
+
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    @mock.patch('authapp.api.API_BATCH_CHUNK', 1)
+    def test_ndjson_body_is_read_as_rows_are_scored(self):
+        body = ''.join(json.dumps(dict(API_ROW, int_rate=10.0 + i)) + '\n' for i in range(3))
+        request = RequestFactory().post('/api/predict/batch/', body, content_type='application/x-ndjson',
+                                        headers={'authorization': 'Bearer t0ken'})
+        request.user = AnonymousUser()
+        response = api.predict_batch_view(request)
+        # Nothing is read before the response is iterated, then one chunk (here one line) at a time
+        self.assertEqual(request._stream._pos, 0)
+        chunks = iter(response.streaming_content)
+        self.assertEqual(json.loads(next(chunks))['row'], 0)
+        self.assertEqual(request._stream._pos, len(body) // 3)
+        self.assertEqual([json.loads(line)['row'] for line in chunks], [1, 2])
+
+    @mock.patch('authapp.api.API_TOKEN', 't0ken')
+    def test_ndjson_limits(self):
+        body = ''.join(json.dumps(API_ROW) + '\n' for _ in range(3))
+        with mock.patch('authapp.api.API_MAX_BODY_BYTES', 100):
+            response = self.post('authapp:api_predict_batch', body, content_type='application/x-ndjson',
+                                 authorization='Bearer t0ken')
+            self.assertEqual(response.status_code, 413)
+        with mock.patch('authapp.api.API_MAX_BATCH_ROWS', 2):
+            response = self.post('authapp:api_predict_batch', body, content_type='application/x-ndjson',
+                                 authorization='Bearer t0ken')
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        # Only known once the third line is read: the rows before it are scored, then the stream ends
+        self.assertEqual([r['row'] for r in lines], [0, 1, 2])
+        self.assertIn('probability', lines[1])
+        self.assertIn('At most 2 rows', lines[2]['error'])
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('authapp.api.API_TOKEN', 't0ken')
+class AsyncPredictionApiTest(TestCase):
+    """The ASGI views (settings.ASYNC_VIEWS), called directly since the URLconf picks one set."""
+
+    def request(self, path, body, content_type='application/json'):
+        request = AsyncRequestFactory().post(path, body, content_type=content_type,
+                                             headers={'authorization': 'Bearer t0ken'})
+        request.user = AnonymousUser()
+        return request
+
+    async def test_batch_matches_the_sync_view(self):
+        body = json.dumps([API_ROW, {'term': 36}])
+        response = await api.apredict_batch_view(self.request('/api/predict/batch/', body))
+        results = json.loads(response.content)['results']
+        self.assertEqual(results[0], {'row': 0, **api.predict_loan_approval(API_ROW)})
+        self.assertIn('error', results[1])
+
+    async def test_full_executor_answers_503(self):
+        with mock.patch('authapp.api.apredict_loan_approval', side_effect=ExecutorBusy("Scoring queue is full")):
+            response = await api.apredict_view(self.request('/api/predict/', json.dumps(API_ROW)))
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+
+    async def test_ndjson_stream(self):
+        body = json.dumps(API_ROW) + '\n' + json.dumps(dict(API_ROW, int_rate=20.0)) + '\n'
+        response = await api.apredict_batch_view(self.request('/api/predict/batch/', body, 'application/x-ndjson'))
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)['row'] for line in lines], [0, 1])
+
+
+def summary_state(user):
+    summary = InvestmentSummary.objects.get(user=user)
+    types = {t: (Decimal(v['total']), v['count']) for t, v in summary.type_totals.items()}
+    return summary.total, summary.count, types, summary.last_investment_date
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class InvestmentSummaryTest(TestCase):
+    """The summary the signal handlers maintain must equal a rebuild from the Investment rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('saver', password='secret-pass-123')
+        self.other = User.objects.create_user('other', password='secret-pass-123')
+
+    def invest(self, kind, amount, day, user=None):
+        return Investment.objects.create(user=user or self.user, investment_type=kind, amount=Decimal(amount),
+                                         investment_date=date(2024, 1, day))
+
+    def assertMatchesRebuild(self, user=None):
+        user = user or self.user
+        maintained = summary_state(user)
+        InvestmentSummary.rebuild(user.pk)
+        self.assertEqual(maintained, summary_state(user))
+
+    def test_creates_edits_and_deletes(self):
+        sip = self.invest('SIP', '1000.50', 5)
+        gold = self.invest('Gold', '250.25', 20)
+        self.invest('SIP', '500', 10)
+        self.assertMatchesRebuild()
+        self.assertEqual(summary_state(self.user)[:2], (Decimal('1750.75'), 3))
+
+        # Edit: type, amount and date move together
+        sip.investment_type, sip.amount, sip.investment_date = 'Stocks', Decimal('99.99'), date(2024, 1, 25)
+        sip.save()
+        self.assertMatchesRebuild()
+        # Deleting the latest investment moves the last date back
+        sip.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(summary_state(self.user)[3], date(2024, 1, 20))
+
+        gold.user = self.other
+        gold.save()
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(self.other)
+
+    def test_queryset_delete(self):
+        for day in (1, 2, 3):
+            self.invest('Crypto', '10', day)
+        self.invest('Gold', '20', 4)
+        Investment.objects.filter(user=self.user, investment_type='Crypto').delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(summary_state(self.user), (Decimal('20.00'), 1, {'Gold': (Decimal('20.00'), 1)}, date(2024, 1, 4)))
+
+    def test_rebuild_command_after_bulk_create(self):
+        self.invest('SIP', '100', 1)
+        Investment.objects.bulk_create([Investment(user=self.user, investment_type='SIP', amount=Decimal('50'),
+                                                   investment_date=date(2024, 2, 1))])
+        self.assertEqual(summary_state(self.user)[1], 1)
+        call_command('rebuild_investment_summaries', stdout=StringIO())
+        self.assertEqual(summary_state(self.user)[:2], (Decimal('150.00'), 2))
+        self.assertEqual(summary_state(self.user)[3], date(2024, 2, 1))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DashboardCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.dashboard = DashboardCache('default', timeout=60)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_computed_once_until_its_section_is_invalidated(self):
+        self.assertEqual(self.dashboard.get_or_set(1, 'savings', 'totals', self.compute), 1)
+        self.assertEqual(self.dashboard.get_or_set(1, 'savings', 'totals', self.compute), 1)
+        self.dashboard.invalidate([2], ['savings'])
+        self.dashboard.invalidate([1], ['investments'])
+        self.assertEqual(self.dashboard.get_or_set(1, 'savings', 'totals', self.compute), 1)
+        self.dashboard.invalidate([1], ['savings'])
+        self.assertEqual(self.dashboard.get_or_set(1, 'savings', 'totals', self.compute), 2)
+        self.assertEqual(self.dashboard.get_stats()['sections']['savings']['hits'], 2)
+
+    def test_invalidation_during_compute_is_not_lost(self):
+        def compute_then_invalidate():
+            # Rows change (and commit) while the page is being computed from the old ones
+            self.dashboard.invalidate([1], ['savings'])
+            return 'stale'
+
+        self.assertEqual(self.dashboard.get_or_set(1, 'savings', 'totals', compute_then_invalidate), 'stale')
+        self.assertEqual(self.dashboard.get_or_set(1, 'savings', 'totals', lambda: 'fresh'), 'fresh')
+
+    def test_unknown_section(self):
+        with self.assertRaises(ValueError):
+            self.dashboard.get_or_set(1, 'nope', 'x', self.compute)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SavingsTrackerCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('saver', password='secret-pass-123')
+        Profile.objects.create(user=self.user, salary=Decimal('1000'))
+        self.client.force_login(self.user)
+
+    def page(self):
+        return self.client.get(reverse('authapp:savings_tracker')).context
+
+    def test_saved_investment_shows_once_committed(self):
+        self.assertEqual(self.page()['total_investment'], 0)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Investment.objects.create(user=self.user, investment_type='SIP', amount=Decimal('250'),
+                                      investment_date=date(2024, 3, 1))
+            # Not committed yet: the cached page still stands
+            self.assertEqual(self.page()['total_investment'], 0)
+        for callback in callbacks:
+            callback()
+        context = self.page()
+        self.assertEqual((context['total_investment'], context['percentage']), (Decimal('250.00'), 25.0))
+        self.assertIn('SIP', context['investment_rows'])
+
+    def test_salary_change_refreshes_the_totals(self):
+        self.assertEqual(self.page()['salary'], Decimal('1000'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Profile.objects.filter(user=self.user).update(salary=Decimal('2000'))
+            Profile.objects.get(user=self.user).save()
+        self.assertEqual(self.page()['salary'], Decimal('2000'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class InvestmentSeriesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('saver', password='secret-pass-123')
+        self.client.force_login(self.user)
+        # Either side of month, quarter and week boundaries, plus one before the charted range
+        for day, amount in [(date(2023, 12, 31), '1000'), (date(2024, 1, 31), '100'), (date(2024, 2, 1), '50'),
+                            (date(2024, 3, 31), '25'), (date(2024, 4, 1), '10')]:
+            self.invest(day, amount)
+        other = User.objects.create_user('other', password='secret-pass-123')
+        self.invest(date(2024, 2, 1), '999', other)
+
+    def invest(self, day, amount, user=None):
+        Investment.objects.create(user=user or self.user, investment_type='SIP', amount=Decimal(amount),
+                                  investment_date=day)
+
+    def series(self, **params):
+        response = self.client.get(reverse('authapp:investment_series'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def in_range(self, **params):
+        return self.series(start='2024-01-01', end='2024-04-30', **params)
+
+    def test_month_buckets_with_the_opening_total(self):
+        data = self.in_range(bucket='month')
+        self.assertEqual((data['opening_total'], data['has_earlier'], data['downsampled']), (1000.0, True, False))
+        self.assertEqual([(p['period'], p['amount'], p['cumulative']) for p in data['points']], [
+            ('2024-01-01', 100.0, 1100.0), ('2024-02-01', 50.0, 1150.0),
+            ('2024-03-01', 25.0, 1175.0), ('2024-04-01', 10.0, 1185.0)])
+
+    def test_quarter_and_week_boundaries(self):
+        quarters = self.in_range(bucket='quarter')['points']
+        self.assertEqual([(p['period'], p['amount'], p['count']) for p in quarters],
+                         [('2024-01-01', 175.0, 3), ('2024-04-01', 10.0, 1)])
+        # Wednesday 31 January and Thursday 1 February share the week starting Monday 29 January
+        weeks = self.in_range(bucket='week')['points']
+        self.assertEqual([(p['period'], p['amount']) for p in weeks],
+                         [('2024-01-29', 150.0), ('2024-03-25', 25.0), ('2024-04-01', 10.0)])
+
+    def test_auto_picks_the_finest_bucket_that_fits(self):
+        # 121 days: too many for 120 daily points
+        self.assertEqual(self.in_range()['bucket'], 'week')
+        self.assertEqual(self.in_range(max_points=121)['bucket'], 'day')
+        self.assertEqual(self.in_range(max_points=5)['bucket'], 'month')
+        self.assertEqual(self.in_range(max_points=1)['bucket'], 'year')
+
+    def test_fixed_bucket_over_max_points_is_downsampled(self):
+        data = self.in_range(bucket='day', max_points=2)
+        self.assertTrue(data['downsampled'])
+        self.assertEqual([(p['period'], p['amount'], p['count'], p['cumulative']) for p in data['points']],
+                         [('2024-01-31', 150.0, 2, 1150.0), ('2024-03-31', 35.0, 2, 1185.0)])
+
+    def test_default_range_is_all_of_the_users_investments(self):
+        data = self.series(bucket='year')
+        self.assertEqual((data['start'], data['end'], data['opening_total']), ('2023-12-31', '2024-04-01', 0.0))
+        self.assertEqual([p['amount'] for p in data['points']], [1000.0, 185.0])
+
+    def test_user_without_investments(self):
+        Investment.objects.filter(user=self.user).delete()
+        self.assertEqual(self.series()['points'], [])
+
+    def test_invalid_parameters(self):
+        for params in ({'bucket': 'hour'}, {'max_points': '0'}, {'max_points': '1001'}, {'max_points': 'many'},
+                       {'start': '2024-13-01'}, {'end': 'yesterday'}):
+            response = self.client.get(reverse('authapp:investment_series'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('Invalid parameter', response.json()['error'])
+
+    def test_new_investment_invalidates_the_cached_series(self):
+        self.assertEqual(len(self.in_range(bucket='month')['points']), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.invest(date(2024, 4, 20), '5')
+        points = self.in_range(bucket='month')['points']
+        self.assertEqual((points[-1]['amount'], points[-1]['cumulative']), (15.0, 1190.0))
+
+    async def test_async_view_matches_the_sync_view(self):
+        request = AsyncRequestFactory().get('/savings_tracker/series/',
+                                            {'start': '2024-01-01', 'end': '2024-04-30', 'bucket': 'week'})
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        response = await views.investment_series_async(request)
+        # Computed again by the sync view, not served from what the async one cached
+        await cache.aclear()
+        await self.async_client.aforce_login(self.user)
+        expected = await self.async_client.get(reverse('authapp:investment_series'),
+                                               {'start': '2024-01-01', 'end': '2024-04-30', 'bucket': 'week'})
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
@@ -1,12 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from authapp import views
+from authapp import api, views
 app_name = 'authapp'
 
+# Async variants of the pages that score or aggregate when served through bankrisk.asgi. Views
+# left sync (login, signup, the static pages) are cheap; Django runs them all on one thread per worker
+if settings.ASYNC_VIEWS:
+    home = views.home_async
+    savings_tracker, investment_series = views.savings_tracker_async, views.investment_series_async
+    api_predict, api_predict_batch = api.apredict_view, api.apredict_batch_view
+else:
+    home = views.home
+    savings_tracker, investment_series = views.savings_tracker, views.investment_series
+    api_predict, api_predict_batch = api.predict_view, api.predict_batch_view
+
 urlpatterns = [
     path('', views.login_view, name='login'),  # Default route to login page
-    path('home/', views.home, name='home'),  # Home page
+    path('home/', home, name='home'),  # Home page
     path('signup/', views.signup_view, name='signup'),
     path('loan-info/', views.loan_info, name='loan_info'),  # Loan info page
     path('emi_form/', views.emi_calculator, name='emi_form'),  # EMI form page
-    path('savings_tracker/', views.savings_tracker, name='savings_tracker'),  # Savings tracker
+    path('savings_tracker/', savings_tracker, name='savings_tracker'),  # Savings tracker
+    path('savings_tracker/series/', investment_series, name='investment_series'),  # Chart data (JSON)
+    path('ml/reload/', views.reload_model_view, name='reload_model'),  # Staff-only model hot reload
+    path('cache/stats/', views.cache_stats_view, name='cache_stats'),  # Staff-only cache hit ratios
+    path('api/predict/', api_predict, name='api_predict'),  # JSON prediction API
+    path('api/predict/batch/', api_predict_batch, name='api_predict_batch'),  # JSON array / NDJSON batches
 ]
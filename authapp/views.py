@@ -1,20 +1,51 @@
+import math
+from datetime import date
 from decimal import Decimal
+from typing import Any, Dict, List
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_GET, require_POST
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek, TruncYear
 from django.http import JsonResponse
-from authapp.models import LoanApplication, Profile, Investment
+from authapp.dashboard_cache import dashboard_cache
+from authapp.models import LoanApplication, Profile, Investment, InvestmentSummary
 from .forms import LoanApplicationForm, InvestmentForm
 from ml_models.predictor import (
     predict_from_input,
     predict_loan_approval,
     predict_loan_term,
-    predict_loan_eligibility
+    predict_loan_eligibility,
+    reload_model,
+    get_load_stats,
+    get_cache_stats,
+    run_scoring,
 )
+from ml_models.executor import ExecutorBusy
 import json
 
+# Model inputs that moved the default probability most, shown with the approval result on home
+APPROVAL_FACTORS_SHOWN = 5
+
+# Model columns filled from the home form, as the applicant knows them. Only these are shown:
+# the form never asks for the others, so the model sees imputed values for them
+FACTOR_LABELS = {
+    'term': 'Loan term',
+    'int_rate': 'Interest rate',
+    'emp_length': 'Employment length',
+    'loan_amnt': 'Loan amount',
+    'annual_inc': 'Income',
+    'expenses': 'Monthly expenses',
+    'installment': 'EMI',
+    'dti': 'Debt-to-income ratio',
+}
+
 # Login view
 def login_view(request):
     if request.method == 'POST':
@@ -49,9 +80,7 @@ def signup_view(request):
 # Home view with ML Predictions and Loan Form
 @login_required(login_url='login')
 def home(request):
-    loan_approval = None
-    loan_term = None
-    loan_eligibility = None
+    predictions = {}
 
     if request.method == 'POST':
         form = LoanApplicationForm(request.POST)
@@ -59,126 +88,407 @@ def home(request):
             try:
                 # Prepare instance without saving
                 instance = form.save(commit=False)
-
-                # Map form fields to expected model fields
-                input_data = {
-                    'term': int(form.cleaned_data['loan_term']),
-                    'int_rate': float(form.cleaned_data['interest_rate']),
-                    'emp_length': float(form.cleaned_data.get('emp_length', 0)),
-                    'loan_amount': float(form.cleaned_data.get('loan_amount', 0)),
-                    'income': float(form.cleaned_data.get('income', 0)),
-                    'expenses': float(form.cleaned_data.get('expenses', 0)),
-                    'emi': float(form.cleaned_data.get('emi', 0))
-                }
-
-                print("Input data prepared for prediction:", input_data)
-
-                # Ensure no negative values for important fields
-                if input_data['term'] <= 0:
-                    raise ValueError("Loan term must be positive")
-                if input_data['int_rate'] < 0:
-                    raise ValueError("Interest rate cannot be negative")
-                if input_data['loan_amount'] <= 0:
-                    raise ValueError("Loan amount must be positive")
-                if input_data['income'] <= 0:
-                    raise ValueError("Income must be positive")
-
-                # Run predictions with try/except for each to prevent cascading failures
-                try:
-                    loan_approval = predict_loan_approval(input_data)
-                except Exception as e:
-                    loan_approval = {"status": "Unknown", "error": str(e)}
-                    print(f"Approval prediction error: {str(e)}")
-                
-                try:
-                    loan_term = predict_loan_term(input_data)
-                except Exception as e:
-                    loan_term = {"loan_term": input_data['term'], "error": str(e)}
-                    print(f"Term prediction error: {str(e)}")
-                
-                try:
-                    loan_eligibility = predict_loan_eligibility(input_data)
-                except Exception as e:
-                    loan_eligibility = {"eligible": "Unknown", "error": str(e)}
-                    print(f"Eligibility prediction error: {str(e)}")
-
-                # Assign predictions to instance
-                instance.user = request.user
-                instance.predicted_loan_approval = bool(loan_approval.get('prediction', 0)) if isinstance(loan_approval, dict) else False
-                instance.predicted_loan_term = loan_term.get('loan_term', 12) if isinstance(loan_term, dict) else 12
-
-                # Save instance
+                predictions = _predict_application(_loan_input(form))
+                _record_predictions(instance, request.user, predictions)
                 instance.save()
 
                 messages.success(request, 'Application submitted successfully!')
-                
+
                 # No redirect to keep showing results
-                
-            except KeyError as e:
-                messages.error(request, f"Missing required field: {str(e)}")
-            except ValueError as e:
-                messages.error(request, f"Invalid input: {str(e)}")
+
             except Exception as e:
-                messages.error(request, f"Processing error: {str(e)}")
-                import traceback
-                print(traceback.format_exc())  # Detailed error in console
+                _application_error(request, e)
         else:
-            # Display specific form errors
-            for field, errors in form.errors.items():
-                for error in errors:
-                    messages.error(request, f"{field.capitalize()}: {error}")
+            _form_errors(request, form)
     else:
         form = LoanApplicationForm()
 
-    return render(request, 'authapp/home.html', {
-        'form': form,
+    # After the POST above: saving an application invalidates the cached summary
+    applications = dashboard_cache.get_or_set(
+        request.user.id, 'applications', 'summary',
+        lambda: LoanApplication.objects.filter(user=request.user).order_by().aggregate(**_application_summary()))
+    return _render_home(request, form, predictions, applications)
+
+
+# Same page for ASGI (settings.ASYNC_VIEWS): the predictions run in the bounded scoring executor,
+# so a slow prediction no longer holds the one thread Django runs every sync view on
+@login_required(login_url='login')
+async def home_async(request):
+    # Resolved here: the template's context processors read request.user synchronously
+    request.user = user = await request.auser()
+    predictions = {}
+    status = 200
+
+    if request.method == 'POST':
+        form = LoanApplicationForm(request.POST)
+        if form.is_valid():
+            try:
+                instance = form.save(commit=False)
+                predictions = await run_scoring(_predict_application, _loan_input(form))
+                _record_predictions(instance, user, predictions)
+                await instance.asave()
+                messages.success(request, 'Application submitted successfully!')
+            except ExecutorBusy:
+                # Nothing was scored or saved; the form is shown again with its values
+                messages.error(request, 'Too many applications are being scored right now. Please submit again in a moment.')
+                status = 503
+            except Exception as e:
+                _application_error(request, e)
+        else:
+            _form_errors(request, form)
+    else:
+        form = LoanApplicationForm()
+
+    async def applications():
+        return await LoanApplication.objects.filter(user=user).order_by().aaggregate(**_application_summary())
+
+    response = _render_home(request, form, predictions,
+                            await dashboard_cache.aget_or_set(user.id, 'applications', 'summary', applications))
+    response.status_code = status
+    return response
+
+
+def _loan_input(form) -> Dict[str, Any]:
+    """The model's input fields from a valid LoanApplicationForm; raises ValueError for unusable values."""
+    # Map form fields to expected model fields
+    input_data = {
+        'term': int(form.cleaned_data['loan_term']),
+        'int_rate': float(form.cleaned_data['interest_rate']),
+        'emp_length': float(form.cleaned_data.get('emp_length', 0)),
+        'loan_amount': float(form.cleaned_data.get('loan_amount', 0)),
+        'income': float(form.cleaned_data.get('income', 0)),
+        'expenses': float(form.cleaned_data.get('expenses', 0)),
+        'emi': float(form.cleaned_data.get('emi', 0))
+    }
+
+    print("Input data prepared for prediction:", input_data)
+
+    # Ensure no negative values for important fields
+    if input_data['term'] <= 0:
+        raise ValueError("Loan term must be positive")
+    if input_data['int_rate'] < 0:
+        raise ValueError("Interest rate cannot be negative")
+    if input_data['loan_amount'] <= 0:
+        raise ValueError("Loan amount must be positive")
+    if input_data['income'] <= 0:
+        raise ValueError("Income must be positive")
+    return input_data
+
+
+def _predict_application(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Approval, term and eligibility for one application; CPU-bound, so async views run it in the executor."""
+    # Run predictions with try/except for each to prevent cascading failures
+    approval_factors = []
+    try:
+        # With per-feature attributions, so underwriters can see what drove the decision
+        loan_approval = predict_loan_approval(input_data, explain=True)
+        approval_factors = _approval_factors(loan_approval)
+    except Exception as e:
+        loan_approval = {"status": "Unknown", "error": str(e)}
+        print(f"Approval prediction error: {str(e)}")
+
+    try:
+        loan_term = predict_loan_term(input_data)
+    except Exception as e:
+        loan_term = {"loan_term": input_data['term'], "error": str(e)}
+        print(f"Term prediction error: {str(e)}")
+
+    try:
+        loan_eligibility = predict_loan_eligibility(input_data)
+    except Exception as e:
+        loan_eligibility = {"eligible": "Unknown", "error": str(e)}
+        print(f"Eligibility prediction error: {str(e)}")
+
+    return {
         'loan_approval': loan_approval,
+        'approval_factors': approval_factors,
         'loan_term': loan_term,
-        'loan_eligibility': loan_eligibility
+        'loan_eligibility': loan_eligibility,
+    }
+
+
+def _record_predictions(instance, user, predictions: Dict[str, Any]) -> None:
+    """Assign predictions to the unsaved LoanApplication."""
+    loan_approval, loan_term = predictions['loan_approval'], predictions['loan_term']
+    instance.user = user
+    # Approved when no default is predicted; the probability stored is the probability of default
+    instance.predicted_loan_approval = loan_approval.get('approved') if isinstance(loan_approval, dict) else None
+    instance.predicted_probability = loan_approval.get('probability') if isinstance(loan_approval, dict) else None
+    instance.predicted_loan_term = loan_term.get('loan_term', 12) if isinstance(loan_term, dict) else 12
+
+
+def _application_error(request, e: Exception) -> None:
+    if isinstance(e, KeyError):
+        messages.error(request, f"Missing required field: {str(e)}")
+    elif isinstance(e, ValueError):
+        messages.error(request, f"Invalid input: {str(e)}")
+    else:
+        messages.error(request, f"Processing error: {str(e)}")
+        import traceback
+        print(traceback.format_exc())  # Detailed error in console
+
+
+def _form_errors(request, form) -> None:
+    # Display specific form errors
+    for field, errors in form.errors.items():
+        for error in errors:
+            messages.error(request, f"{field.capitalize()}: {error}")
+
+
+def _render_home(request, form, predictions: Dict[str, Any], applications: Dict[str, Any]):
+    return render(request, 'authapp/home.html', {
+        'form': form,
+        'loan_approval': predictions.get('loan_approval'),
+        'approval_factors': predictions.get('approval_factors', []),
+        'loan_term': predictions.get('loan_term'),
+        'loan_eligibility': predictions.get('loan_eligibility'),
+        'applications': applications,
     })
 
 
+def _approval_factors(loan_approval: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The largest contributions of the applicant's own inputs to the default probability, in percentage points."""
+    factors = [
+        {'label': FACTOR_LABELS[column], 'points': round(value * 100, 1), 'raises_risk': value > 0}
+        for column, value in loan_approval.get('contributions', {}).items() if column in FACTOR_LABELS
+    ]
+    return factors[:APPROVAL_FACTORS_SHOWN]
+
+
+def _application_summary() -> Dict[str, Any]:
+    """Aggregates over a user's past applications, shown on home."""
+    return {
+        'count': Count('id'),
+        'approved': Count('id', filter=Q(predicted_loan_approval=True)),
+        'average_probability': Avg('predicted_probability'),
+        'last_applied': Max('created_at'),
+    }
+
+
 # Savings Tracker view with chart
 @login_required(login_url='login')
 def savings_tracker(request):
-    profile, created = Profile.objects.get_or_create(
-        user=request.user,
-        defaults={'salary': Decimal('00.0')}
+    user = request.user
+    if request.method == 'POST':
+        form = InvestmentForm(request.POST)
+        if form.is_valid():
+            inv = form.save(commit=False)
+            inv.user = user
+            inv.save()
+            messages.success(request, 'Investment added!')
+            return redirect('authapp:savings_tracker')
+
+    # Totals come from the maintained summary row and the chart fetches investment_series;
+    # both they and the rendered table are cached until the user's investments or profile change
+    def totals():
+        profile, created = Profile.objects.get_or_create(user=user, defaults={'salary': Decimal('00.0')})
+        return _savings_totals(profile, InvestmentSummary.for_user(user))
+
+    def rows():
+        return render_to_string('authapp/investment_rows.html', {'investments': Investment.objects.filter(user=user)})
+
+    return _render_savings_tracker(
+        request,
+        dashboard_cache.get_or_set(user.id, 'savings', 'totals', totals),
+        dashboard_cache.get_or_set(user.id, 'investments', 'rows', rows),
     )
 
+
+# Same page for ASGI (settings.ASYNC_VIEWS), with the async ORM
+@login_required(login_url='login')
+async def savings_tracker_async(request):
+    # Resolved here: the template's context processors read request.user synchronously
+    request.user = user = await request.auser()
+
     if request.method == 'POST':
         form = InvestmentForm(request.POST)
         if form.is_valid():
             inv = form.save(commit=False)
-            inv.user = request.user
-            inv.save()
+            inv.user = user
+            await inv.asave()
             messages.success(request, 'Investment added!')
-            return redirect('savings_tracker')
+            return redirect('authapp:savings_tracker')
+
+    async def totals():
+        profile, created = await Profile.objects.aget_or_create(user=user, defaults={'salary': Decimal('00.0')})
+        return _savings_totals(profile, await InvestmentSummary.afor_user(user))
+
+    async def rows():
+        investments = [inv async for inv in Investment.objects.filter(user=user)]
+        return render_to_string('authapp/investment_rows.html', {'investments': investments})
+
+    return _render_savings_tracker(
+        request,
+        await dashboard_cache.aget_or_set(user.id, 'savings', 'totals', totals),
+        await dashboard_cache.aget_or_set(user.id, 'investments', 'rows', rows),
+    )
 
-    form = InvestmentForm()
-    investments = Investment.objects.filter(user=request.user)
 
-    total_investment = sum(inv.amount for inv in investments)
+def _savings_totals(profile, summary) -> Dict[str, Any]:
     salary = profile.salary or Decimal('0')
-    remaining = salary - total_investment
-    percentage = (total_investment / salary * 100) if salary else 0
+    percentage = (summary.total / salary * 100) if salary else 0
+    return {
+        'total_investment': summary.total,
+        'investment_count': summary.count,
+        'remaining': salary - summary.total,
+        'percentage': round(float(percentage), 2),
+        'salary': salary,
+    }
 
-    dates = [inv.investment_date.strftime("%Y-%m-%d") for inv in investments]
-    amounts = [float(inv.amount) for inv in investments]
 
-    if not investments.exists():
+def _render_savings_tracker(request, totals, investment_rows):
+    if not totals['investment_count']:
         messages.info(request, "No investments yet. Add one to see the chart.")
 
     return render(request, 'authapp/savings_tracker.html', {
-        'form': form,
-        'investments': investments,
-        'total_investment': total_investment,
-        'remaining': remaining,
-        'percentage': round(float(percentage), 2),
-        'salary': salary,
-        'dates': json.dumps(dates),
-        'amounts': json.dumps(amounts),
+        'form': InvestmentForm(),
+        'investment_rows': mark_safe(investment_rows),
+        **totals,
     })
+
+
+# Chart buckets, finest first; 'day' groups on the date itself
+SERIES_BUCKETS = {
+    'day': F('investment_date'),
+    'week': TruncWeek('investment_date'),
+    'month': TruncMonth('investment_date'),
+    'quarter': TruncQuarter('investment_date'),
+    'year': TruncYear('investment_date'),
+}
+SERIES_DEFAULT_POINTS = 120
+SERIES_MAX_POINTS = 1000
+EMPTY_SERIES = {'start': None, 'end': None, 'opening_total': 0.0, 'has_earlier': False, 'downsampled': False, 'points': []}
+
+
+def _bucket_count(bucket: str, start: date, end: date) -> int:
+    """Upper bound on the number of buckets between start and end."""
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    return {
+        'day': (end - start).days + 1,
+        'week': (end - start).days // 7 + 2,
+        'month': months,
+        'quarter': months // 3 + 2,
+        'year': end.year - start.year + 1,
+    }[bucket]
+
+
+def _series_params(request):
+    """(bucket, max_points, start, end) from the query string; raises ValueError."""
+    bucket = request.GET.get('bucket', 'auto')
+    if bucket != 'auto' and bucket not in SERIES_BUCKETS:
+        raise ValueError(f"bucket must be auto or one of {', '.join(SERIES_BUCKETS)}")
+    max_points = int(request.GET.get('max_points', SERIES_DEFAULT_POINTS))
+    if not 1 <= max_points <= SERIES_MAX_POINTS:
+        raise ValueError(f"max_points must be between 1 and {SERIES_MAX_POINTS}")
+    start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+    end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    return bucket, max_points, start, end
+
+
+def _series_bucket(bucket: str, max_points: int, start: date, end: date) -> str:
+    if bucket == 'auto':
+        # Finest bucket that fits in max_points; falls through to 'year'
+        bucket = next((b for b in SERIES_BUCKETS if _bucket_count(b, start, end) <= max_points), 'year')
+    return bucket
+
+
+def _series_queries(investments, bucket: str, start: date, end: date):
+    """The opening-total aggregate (as a queryset) and the bucketed rows of the range."""
+    # Everything before the range only contributes the starting point of the running total
+    opening = investments.filter(investment_date__lt=start)
+    rows = (investments.filter(investment_date__range=(start, end))
+            .annotate(period=SERIES_BUCKETS[bucket]).values('period')
+            .annotate(amount=Sum('amount'), count=Count('id')).order_by('period'))
+    return opening, rows
+
+
+def _series_payload(bucket, max_points, start, end, opening, rows) -> Dict[str, Any]:
+    cumulative = opening['total'] or Decimal('0')
+    points = []
+    for row in rows:
+        cumulative += row['amount']
+        points.append({'period': row['period'].isoformat(), 'amount': float(row['amount']),
+                       'count': row['count'], 'cumulative': float(cumulative)})
+
+    # Still too many (e.g. yearly buckets over a long range, or a fixed bucket): merge neighbours
+    downsampled = len(points) > max_points
+    if downsampled:
+        step = math.ceil(len(points) / max_points)
+        points = [
+            {'period': group[0]['period'], 'amount': round(sum(p['amount'] for p in group), 2),
+             'count': sum(p['count'] for p in group), 'cumulative': group[-1]['cumulative']}
+            for group in (points[i:i + step] for i in range(0, len(points), step))
+        ]
+
+    return {
+        'bucket': bucket,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'opening_total': float(opening['total'] or 0),
+        'has_earlier': bool(opening['count']),
+        'downsampled': downsampled,
+        'points': points,
+    }
+
+
+def _series_cache_name(bucket, max_points, start, end) -> str:
+    return f"series:{bucket}:{max_points}:{start}:{end}"
+
+
+# Investment series for the savings chart, aggregated in the database and cached per user
+# until their investments change:
+# GET ?bucket=auto|day|week|month|quarter|year&start=YYYY-MM-DD&end=YYYY-MM-DD&max_points=N
+@login_required(login_url='login')
+@require_GET
+def investment_series(request):
+    try:
+        bucket, max_points, start, end = _series_params(request)
+    except ValueError as e:
+        return JsonResponse({'error': f"Invalid parameter: {e}"}, status=400)
+
+    def series(start=start, end=end, bucket=bucket):
+        investments = Investment.objects.filter(user=request.user).order_by()
+        if start is None or end is None:
+            bounds = investments.aggregate(first=Min('investment_date'), last=Max('investment_date'))
+            start = start or bounds['first']
+            end = end or bounds['last']
+        if start is None or end is None or start > end:
+            return {'bucket': bucket, **EMPTY_SERIES}
+
+        bucket = _series_bucket(bucket, max_points, start, end)
+        opening, rows = _series_queries(investments, bucket, start, end)
+        opening = opening.aggregate(total=Sum('amount'), count=Count('id'))
+        return _series_payload(bucket, max_points, start, end, opening, list(rows))
+
+    name = _series_cache_name(bucket, max_points, start, end)
+    return JsonResponse(dashboard_cache.get_or_set(request.user.id, 'investments', name, series))
+
+
+@login_required(login_url='login')
+@require_GET
+async def investment_series_async(request):
+    try:
+        bucket, max_points, start, end = _series_params(request)
+    except ValueError as e:
+        return JsonResponse({'error': f"Invalid parameter: {e}"}, status=400)
+    user = await request.auser()
+
+    async def series(start=start, end=end, bucket=bucket):
+        investments = Investment.objects.filter(user=user).order_by()
+        if start is None or end is None:
+            bounds = await investments.aaggregate(first=Min('investment_date'), last=Max('investment_date'))
+            start = start or bounds['first']
+            end = end or bounds['last']
+        if start is None or end is None or start > end:
+            return {'bucket': bucket, **EMPTY_SERIES}
+
+        bucket = _series_bucket(bucket, max_points, start, end)
+        opening, rows = _series_queries(investments, bucket, start, end)
+        opening = await opening.aaggregate(total=Sum('amount'), count=Count('id'))
+        return _series_payload(bucket, max_points, start, end, opening, [row async for row in rows])
+
+    name = _series_cache_name(bucket, max_points, start, end)
+    return JsonResponse(await dashboard_cache.aget_or_set(user.id, 'investments', name, series))
     
 # Logout view
 def logout_view(request):
@@ -213,6 +523,26 @@ def predict_risk(request):
     return JsonResponse({'error': 'Only POST allowed'}, status=400)
 
 
+# Admin action: swap in a newly published model.pkl in the worker that serves this request
+# (other workers pick it up through the file watcher or the reload signal)
+@staff_member_required
+@require_POST
+def reload_model_view(request):
+    force = request.POST.get('force') == '1'
+    try:
+        reloaded = reload_model(force=force)
+    except Exception as e:
+        return JsonResponse({'error': f"Reload failed: {str(e)}"}, status=500)
+    return JsonResponse({'reloaded': reloaded, 'model': get_load_stats()})
+
+
+# Hit ratios and invalidation counts of this worker's caches
+@staff_member_required
+@require_GET
+def cache_stats_view(request):
+    return JsonResponse({'dashboard': dashboard_cache.get_stats(), 'predictions': get_cache_stats()})
+
+
 from django.contrib.auth.decorators import login_required
 
 @login_required(login_url='login')
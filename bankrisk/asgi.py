@@ -12,5 +12,14 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankrisk.settings')
+# Serve the async views (see ASYNC_VIEWS in settings) unless explicitly turned off
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
+
+# Load the loan model while the worker boots rather than on the first prediction request
+if os.environ.get('LOAN_MODEL_WARMUP', 'True') == 'True':
+    from ml_models.predictor import warmup, start_model_watcher
+    warmup()
+    # Pick up a newly published model.pkl without restarting (LOAN_MODEL_RELOAD_INTERVAL)
+    start_model_watcher()
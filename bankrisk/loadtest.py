@@ -0,0 +1,234 @@
+# bankrisk/loadtest.py
+#
+# Closed-loop HTTP load generator for comparing deployments of the same views, e.g. sync views
+# under WSGI against the async ones under ASGI (settings.ASYNC_VIEWS):
+#
+#     gunicorn bankrisk.wsgi:application --workers 1 --threads 8 --bind 127.0.0.1:8001
+#     uvicorn bankrisk.asgi:application --workers 1 --port 8002
+#     python -m bankrisk.loadtest --url http://127.0.0.1:8001 --login alice:secret --output wsgi.json
+#     python -m bankrisk.loadtest --url http://127.0.0.1:8002 --login alice:secret --output asgi.json
+#     python -m bankrisk.loadtest --compare wsgi.json asgi.json
+#
+# Each scenario keeps `--connections` keep-alive connections busy for `--duration` seconds while
+# `--slow-clients` more connections hold requests open by sending their body only after
+# `--slow-seconds` (clients on bad networks): the case where thread-per-request servers run
+# out of threads. Plain asyncio streams, so no HTTP client library is needed.
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+_rng = np.random.default_rng(0)
+
+SAMPLE_APPLICATION = {'term': 36, 'int_rate': 13.5, 'emp_length': 5, 'loan_amount': 15000,
+                      'income': 55000, 'expenses': 1800, 'emi': 450}
+
+
+def _application() -> Dict[str, Any]:
+    # A different rate per request, so the prediction cache does not answer everything
+    return dict(SAMPLE_APPLICATION, int_rate=round(float(_rng.uniform(5, 25)), 4))
+
+
+# name -> (method, path, function returning the JSON body or None, needs a logged-in session)
+SCENARIOS = {
+    'predict': ('POST', '/api/predict/', _application, False),
+    'batch': ('POST', '/api/predict/batch/', lambda: [_application() for _ in range(100)], False),
+    'series': ('GET', '/savings_tracker/series/?' + urlencode({'bucket': 'auto', 'max_points': 120}), None, True),
+    'tracker': ('GET', '/savings_tracker/', None, True),
+}
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host: str, port: int, cookies: Dict[str, str]):
+        self.host, self.port, self.cookies = host, port, cookies
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b'', content_type: str = 'application/json',
+                      extra: Optional[Dict[str, str]] = None, body_delay: float = 0.0) -> Tuple[int, Dict[str, str], bytes]:
+        await self._connect()
+        headers = {'Host': f'{self.host}:{self.port}', 'Content-Length': str(len(body)), **(extra or {})}
+        if body:
+            headers['Content-Type'] = content_type
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        head = f'{method} {path} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers.items()) + '\r\n'
+        try:
+            self.writer.write(head.encode())
+            if body_delay:
+                await self.writer.drain()
+                await asyncio.sleep(body_delay)
+            self.writer.write(body)
+            await self.writer.drain()
+            return await self._response()
+        except Exception:
+            self.close()
+            raise
+
+    async def _response(self) -> Tuple[int, Dict[str, str], bytes]:
+        status = int((await self.reader.readline()).split()[1])
+        headers: Dict[str, str] = {}
+        set_cookies: List[str] = []
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+            if name.strip().lower() == 'set-cookie':
+                set_cookies.append(value.strip())
+        for cookie in set_cookies:
+            name, _, value = cookie.split(';', 1)[0].partition('=')
+            self.cookies[name] = value
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+        if headers.get('connection', '').lower() == 'close' or 'content-length' not in headers \
+                and headers.get('transfer-encoding', '').lower() != 'chunked':
+            self.close()
+        return status, headers, body
+
+
+async def login(host: str, port: int, username: str, password: str) -> Dict[str, str]:
+    """Session cookies for `username`, through the login form (CSRF token included)."""
+    conn = Connection(host, port, {})
+    await conn.request('GET', '/')
+    form = urlencode({'username': username, 'password': password,
+                      'csrfmiddlewaretoken': conn.cookies.get('csrftoken', '')}).encode()
+    status, _, _ = await conn.request('POST', '/', form, 'application/x-www-form-urlencoded',
+                                      {'Referer': f'http://{host}:{port}/'})
+    conn.close()
+    if 'sessionid' not in conn.cookies:
+        raise RuntimeError(f"Login as {username!r} failed (HTTP {status})")
+    return conn.cookies
+
+
+async def _client(conn: Connection, scenario, deadline: float, latencies: List[float], errors: List[str],
+                  body_delay: float = 0.0) -> None:
+    method, path, payload, _ = scenario
+    while time.perf_counter() < deadline:
+        body = json.dumps(payload()).encode() if payload is not None else b''
+        started = time.perf_counter()
+        try:
+            status, _, _ = await conn.request(method, path, body, body_delay=body_delay)
+            if status >= 400:
+                errors.append(f'HTTP {status}')
+            else:
+                latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(type(e).__name__)
+            await asyncio.sleep(0.05)
+    conn.close()
+
+
+async def run_scenario(host: str, port: int, name: str, cookies: Dict[str, str], connections: int,
+                       duration: float, slow_clients: int, slow_seconds: float) -> Dict[str, Any]:
+    scenario = SCENARIOS[name]
+    latencies: List[float] = []
+    slow_latencies: List[float] = []
+    errors: List[str] = []
+    deadline = time.perf_counter() + duration
+    slow = [_client(Connection(host, port, dict(cookies)), scenario, deadline, slow_latencies, errors, slow_seconds)
+            for _ in range(slow_clients)]
+    fast = [_client(Connection(host, port, dict(cookies)), scenario, deadline, latencies, errors)
+            for _ in range(connections)]
+    started = time.perf_counter()
+    await asyncio.gather(*slow, *fast)
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        "latency_p95_ms": round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+        "latency_p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+        "slow_requests": len(slow_latencies),
+        "errors": len(errors),
+        "error_kinds": sorted(set(errors)),
+    }
+
+
+async def main_async(args) -> Dict[str, Any]:
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    cookies: Dict[str, str] = {}
+    if args.login:
+        username, _, password = args.login.partition(':')
+        cookies = await login(host, port, username, password)
+    report = {"url": args.url, "connections": args.connections, "duration": args.duration,
+              "slow_clients": args.slow_clients, "slow_seconds": args.slow_seconds, "scenarios": {}}
+    for name in args.scenario or list(SCENARIOS):
+        if SCENARIOS[name][3] and not cookies:
+            print(f"Skipping {name}: needs --login")
+            continue
+        result = await run_scenario(host, port, name, cookies, args.connections, args.duration,
+                                    args.slow_clients, args.slow_seconds)
+        report["scenarios"][name] = result
+        print(f"{name:<8} {result['requests_per_second']:>8} req/s  p50 {result['latency_p50_ms']} ms  "
+              f"p95 {result['latency_p95_ms']} ms  p99 {result['latency_p99_ms']} ms  "
+              f"slow {result['slow_requests']}  errors {result['errors']} {result['error_kinds']}")
+    return report
+
+
+def compare(paths: List[str]) -> None:
+    reports = [json.load(open(p, encoding='utf-8')) for p in paths]
+    print(f"{'scenario':<10}" + ''.join(f"{p:>28}" for p in paths))
+    for name in reports[0]["scenarios"]:
+        cells = []
+        for report in reports:
+            r = report["scenarios"].get(name)
+            cells.append(f"{r['requests_per_second']} req/s, p95 {r['latency_p95_ms']} ms" if r else '-')
+        print(f"{name:<10}" + ''.join(f"{c:>28}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction API and savings dashboard")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help="repeatable (default: all)")
+    parser.add_argument('--login', default=None, help="username:password for the dashboard scenarios")
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--slow-clients', type=int, default=0)
+    parser.add_argument('--slow-seconds', type=float, default=2.0)
+    parser.add_argument('--output', default=None, help="write the results to this JSON file")
+    parser.add_argument('--compare', nargs='+', default=None, help="print saved reports side by side")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,10 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "django-insecure-nwbnk-h0d9_a5(8v&8)x8
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get("DEBUG", "True") == "True"
 
+# Route home, the prediction API and the savings dashboard to their async views (async ORM, scoring in a
+# bounded executor). bankrisk/asgi.py turns this on; under WSGI the sync views stay cheaper.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False") == "True"
+
 # Allowed hosts (important for Render)
 # settings.py
 
@@ -87,6 +91,19 @@ DATABASES = {
     )
 }
 
+# Cache: dashboard pages (authapp.dashboard_cache) and, with LOAN_PREDICTION_CACHE_ALIAS=default,
+# prediction results shared between workers. File-based by default so all worker processes on
+# the instance share entries and see each other's invalidations (locmem would keep one copy per
+# worker that saves in another worker never clear); set CACHE_BACKEND/CACHE_LOCATION for Redis etc.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        'LOCATION': os.environ.get("CACHE_LOCATION", "/tmp/bankrisk-cache"),
+        'TIMEOUT': int(os.environ.get("CACHE_TIMEOUT", "600")),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))},
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankrisk.settings')
 
 application = get_wsgi_application()
+
+# Load the loan model while the worker boots rather than on the first prediction request.
+# Management commands never import this module, so they skip the load entirely.
+if os.environ.get('LOAN_MODEL_WARMUP', 'True') == 'True':
+    from ml_models.predictor import warmup, start_model_watcher
+    warmup()
+    # Pick up a newly published model.pkl without restarting (LOAN_MODEL_RELOAD_INTERVAL)
+    start_model_watcher()
@@ -0,0 +1,172 @@
+# ml_models/artifact.py
+#
+# Versioned on-disk format for the trained loan model: a directory holding manifest.json plus
+# one .npy file per CompiledPipeline array. Workers open the arrays with mmap_mode='r', so every
+# process on a host reads the same page-cache copy instead of unpickling its own.
+#
+# Each save writes a new version subdirectory and then repoints the CURRENT file at it with a
+# single rename, so a reader always finds a complete version. A directory with manifest.json
+# at its top (written before versions existed) is still read as a single version.
+#
+# Convert the pickle written by model.py / retrain-model.py with:
+#     python -m ml_models.artifact [--pickle ml_models/model.pkl] [--out ml_models/model_artifact]
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+from typing import Any, Dict, Optional
+from ml_models.compiled import CompiledPipeline
+
+ARTIFACT_FORMAT = 'loan-forest'
+# Version 2 allows narrower array dtypes and a quantized leaf_value (meta 'leaf_scale'), as
+# written by ml_models.compact; version 1 artifacts are read unchanged
+ARTIFACT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+MANIFEST_FILE = 'manifest.json'
+POINTER_FILE = 'CURRENT'
+# Superseded versions kept on disk, for readers that resolved one just before a publish
+KEEP_PREVIOUS = 2
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_artifact(artifact_dir: str) -> str:
+    """Directory of the live version: the one CURRENT names, or artifact_dir itself without CURRENT."""
+    try:
+        with open(os.path.join(artifact_dir, POINTER_FILE), encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return artifact_dir
+    return os.path.join(artifact_dir, version)
+
+
+def source_file(artifact_dir: str) -> str:
+    """File that changes when a new version is published (what ModelWatcher polls)."""
+    pointer = os.path.join(artifact_dir, POINTER_FILE)
+    return pointer if os.path.exists(pointer) else os.path.join(artifact_dir, MANIFEST_FILE)
+
+
+def _versions(artifact_dir: str):
+    return sorted(name for name in os.listdir(artifact_dir)
+                  if name.startswith('v') and os.path.isfile(os.path.join(artifact_dir, name, MANIFEST_FILE)))
+
+
+def save_artifact(compiled: CompiledPipeline, out_dir: str, source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write compiled arrays and manifest as a new version under out_dir, then switch CURRENT to it
+    with one atomic rename, so readers never see a missing or half-written artifact.
+    """
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = os.path.join(out_dir, version)
+    os.makedirs(version_dir)
+
+    arrays = {}
+    for name, arr in compiled.arrays.items():
+        arr = np.ascontiguousarray(arr)
+        np.save(os.path.join(version_dir, f"{name}.npy"), arr, allow_pickle=False)
+        arrays[name] = {"file": f"{name}.npy", "dtype": str(arr.dtype), "shape": list(arr.shape)}
+
+    source_sha256 = file_sha256(source) if source else None
+    fingerprint = source_sha256
+    if source_sha256 and 'compaction' in compiled.meta:
+        # Scores differ from the uncompacted model's, so cached predictions must not carry over
+        fingerprint = hashlib.sha256(
+            (source_sha256 + json.dumps(compiled.meta['compaction'], sort_keys=True)).encode('utf-8')
+        ).hexdigest()
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": ARTIFACT_VERSION,
+        "version": version,
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "source": os.path.basename(source) if source else None,
+        "source_sha256": source_sha256,
+        "fingerprint": fingerprint,
+        "arrays": arrays,
+        "meta": compiled.meta,
+    }
+    with open(os.path.join(version_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    pointer_tmp = os.path.join(out_dir, f"{POINTER_FILE}.tmp-{os.getpid()}")
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(out_dir, POINTER_FILE))
+
+    # Older versions, and the files of a single-version artifact this directory used to be, once
+    # a version newer than them has been superseded too
+    previous = [v for v in _versions(out_dir) if v != version]
+    for stale in previous[:-KEEP_PREVIOUS]:
+        shutil.rmtree(os.path.join(out_dir, stale), ignore_errors=True)
+    if previous and os.path.exists(os.path.join(out_dir, MANIFEST_FILE)):
+        for name in os.listdir(out_dir):
+            if name == MANIFEST_FILE or name.endswith('.npy'):
+                os.remove(os.path.join(out_dir, name))
+    return manifest
+
+
+def read_manifest(artifact_dir: str) -> Dict[str, Any]:
+    manifest_path = os.path.join(resolve_artifact(artifact_dir), MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise RuntimeError(f"Model artifact manifest not found at {manifest_path}")
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise RuntimeError(f"Unknown model artifact format: {manifest.get('format')!r}")
+    if manifest.get("format_version") not in READABLE_VERSIONS:
+        raise RuntimeError(
+            f"Model artifact version {manifest.get('format_version')} is not supported "
+            f"(readable: {list(READABLE_VERSIONS)}); re-run python -m ml_models.artifact"
+        )
+    return manifest
+
+
+def load_artifact(artifact_dir: str, mmap: bool = True) -> CompiledPipeline:
+    """Open an artifact directory; with mmap=True the arrays stay in the shared page cache."""
+    # Resolved once, so the manifest and the arrays come from the same version
+    artifact_dir = resolve_artifact(artifact_dir)
+    manifest = read_manifest(artifact_dir)
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        arr = np.load(os.path.join(artifact_dir, spec["file"]), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if list(arr.shape) != spec["shape"] or str(arr.dtype) != spec["dtype"]:
+            raise RuntimeError(f"Model artifact array {name!r} does not match its manifest entry")
+        # Plain ndarray view over the mapping: keeps the sharing, drops np.memmap's per-index overhead
+        arrays[name] = np.asarray(arr)
+    return CompiledPipeline(arrays, manifest["meta"])
+
+
+def convert_pickle(pickle_path: str, out_dir: str) -> Dict[str, Any]:
+    """Compile the pickled sklearn pipeline and write it out as an artifact directory."""
+    with open(pickle_path, 'rb') as f:
+        model = pickle.load(f)
+    compiled = CompiledPipeline.from_pipeline(model)
+    return save_artifact(compiled, out_dir, source=pickle_path)
+
+
+if __name__ == '__main__':
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Convert model.pkl into a memory-mappable model artifact.")
+    parser.add_argument('--pickle', default=os.path.join(here, 'model.pkl'))
+    parser.add_argument('--out', default=os.path.join(here, 'model_artifact'))
+    args = parser.parse_args()
+
+    manifest = convert_pickle(args.pickle, args.out)
+    version_dir = os.path.join(args.out, manifest["version"])
+    total = sum(os.path.getsize(os.path.join(version_dir, spec["file"])) for spec in manifest["arrays"].values())
+    print(f"Artifact written to {args.out} ({len(manifest['arrays'])} arrays, {total / 1024:.0f} KB)")
@@ -0,0 +1,236 @@
+# ml_models/benchmark.py
+#
+# Reproducible latency / throughput / memory benchmark for LoanPredictor.
+#
+#     python -m ml_models.benchmark --output bench_sklearn.json
+#     python -m ml_models.benchmark --mode compiled --output bench_compiled.json
+#     python -m ml_models.benchmark --model /path/to/other_model.pkl --output bench_other.json
+#     python -m ml_models.benchmark --compare bench_sklearn.json bench_compiled.json
+#
+# Inputs are synthetic: columns that loan_data.csv also has (purpose, interest rate, installment,
+# income, dti, revolving balance/utilisation, inquiries, delinquencies, public records) are
+# resampled from that file; every other model column is drawn from the fitted pipeline's own
+# training statistics (scaler mean/std for numbers, one-hot categories for strings).
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from ml_models.compiled import CompiledPipeline
+from ml_models.memory import current_rss_mb
+from ml_models.predictor import LoanPredictor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOAN_DATA_CSV = os.path.join(BASE_DIR, 'loan_data.csv')
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+# Metric name -> True when a larger value is better
+METRIC_DIRECTIONS = {
+    'latency_p50_ms': False,
+    'latency_p95_ms': False,
+    'latency_p99_ms': False,
+    'cold_load_seconds': False,
+    'cold_rss_mb': False,
+    'rows_per_sec': True,
+}
+
+# loan_data.csv column -> (model column, transform)
+CSV_COLUMNS = {
+    'purpose': ('purpose', lambda s: s),
+    'int.rate': ('int_rate', lambda s: s * 100),
+    'installment': ('installment', lambda s: s),
+    'log.annual.inc': ('annual_inc', np.exp),
+    'dti': ('dti', lambda s: s),
+    'revol.bal': ('revol_bal', lambda s: s),
+    'revol.util': ('revol_util', lambda s: s.map(lambda v: f"{v:.2f}%")),
+    'inq.last.6mths': ('inq_last_6mths', lambda s: s),
+    'delinq.2yrs': ('delinq_2yrs', lambda s: s),
+    'pub.rec': ('pub_rec', lambda s: s),
+}
+
+
+def _compiled_view(predictor: LoanPredictor) -> CompiledPipeline:
+    loaded = predictor._current()
+    return loaded.compiled if loaded.compiled is not None else CompiledPipeline.from_pipeline(loaded.model)
+
+
+def synthetic_inputs(predictor: LoanPredictor, n: int, seed: int = 42, csv_path: str = LOAN_DATA_CSV) -> pd.DataFrame:
+    """Build n realistic input rows (model columns plus the form fields predict_approval requires)."""
+    rng = np.random.default_rng(seed)
+    view = _compiled_view(predictor)
+    data: Dict[str, Any] = {}
+
+    for j, col in enumerate(view.num_columns):
+        values = rng.normal(view.num_mean[j], view.num_scale[j], n)
+        if col.endswith('_month'):
+            values = np.clip(np.round(values), 1, 12)
+        elif col.endswith('_year') or col in ('term', 'emp_length', 'delinq_2yrs', 'inq_last_6mths', 'pub_rec', 'open_acc', 'total_acc'):
+            values = np.round(np.maximum(values, 0))
+        else:
+            values = np.maximum(values, 0)
+        data[col] = values
+    for col, cats in zip(view.cat_columns, view.categories):
+        choices = [c for c in cats if c != 'missing']
+        data[col] = np.asarray(choices, dtype=object)[rng.integers(len(choices), size=n)]
+
+    if os.path.exists(csv_path):
+        csv = pd.read_csv(csv_path)
+        picks = rng.integers(len(csv), size=n)
+        for src, (dst, transform) in CSV_COLUMNS.items():
+            if src in csv.columns and dst in data:
+                data[dst] = transform(csv[src]).to_numpy()[picks]
+
+    df = pd.DataFrame(data)
+    df['term'] = np.where(df['term'] < 48, 36, 60)
+    df['loan_amount'] = df['loan_amnt']
+    df['income'] = df['annual_inc'] / 12
+    df['emi'] = df['installment']
+    df['expenses'] = df['income'] * rng.uniform(0.2, 0.6, n)
+    return df
+
+
+def measure_latency(predictor: LoanPredictor, rows: List[Dict[str, Any]], iterations: int, warmup: int = 10) -> Dict[str, float]:
+    for row in rows[:warmup]:
+        predictor.predict_approval(row)
+    timings = []
+    for i in range(iterations):
+        row = rows[i % len(rows)]
+        started = time.perf_counter()
+        predictor.predict_approval(row)
+        timings.append(time.perf_counter() - started)
+    ms = np.asarray(timings) * 1000
+    return {
+        'latency_p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'latency_p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'latency_p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'latency_mean_ms': round(float(ms.mean()), 4),
+        'iterations': iterations,
+    }
+
+
+def measure_throughput(predictor: LoanPredictor, df: pd.DataFrame, batch_sizes: List[int], min_seconds: float = 0.5) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for size in batch_sizes:
+        batch = df.iloc[:size]
+        predictor.predict_approval_batch(batch)
+        calls, started = 0, time.perf_counter()
+        while True:
+            predictor.predict_approval_batch(batch)
+            calls += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_seconds:
+                break
+        results[str(size)] = {
+            'rows_per_sec': round(calls * len(batch) / elapsed, 1),
+            'seconds_per_batch': round(elapsed / calls, 6),
+        }
+    return results
+
+
+def measure_cold_start(mode: str, model_path: Optional[str]) -> Dict[str, Any]:
+    """Import + load in a fresh interpreter, like a new worker; also reports that worker's RSS."""
+    script = (
+        "import json, time\n"
+        "t = time.perf_counter()\n"
+        "from ml_models.memory import current_rss_mb\n"
+        "from ml_models.predictor import LoanPredictor\n"
+        f"p = LoanPredictor(compiled={mode == 'compiled'}, model_path={model_path!r})\n"
+        "stats = p.warmup()\n"
+        "print(json.dumps({'cold_load_seconds': round(time.perf_counter() - t, 4),"
+        " 'model_load_seconds': stats['load_seconds'], 'cold_rss_mb': current_rss_mb()}))\n"
+    )
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=BASE_DIR,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(mode: str = 'sklearn', model_path: Optional[str] = None, iterations: int = 200,
+                  batch_sizes: Optional[List[int]] = None, seed: int = 42) -> Dict[str, Any]:
+    batch_sizes = batch_sizes or BATCH_SIZES
+    predictor = LoanPredictor(compiled=mode == 'compiled', model_path=model_path)
+    predictor.warmup()
+
+    df = synthetic_inputs(predictor, max(batch_sizes), seed=seed)
+    rows = df.iloc[:max(iterations, 1)].to_dict('records')
+
+    import sklearn
+    return {
+        'meta': {
+            'mode': mode,
+            'model': model_path or predictor.model_source_path(),
+            'fingerprint': predictor.model_fingerprint,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+        },
+        'latency': measure_latency(predictor, rows, iterations),
+        'throughput': measure_throughput(predictor, df, batch_sizes),
+        'cold_start': measure_cold_start(mode, model_path),
+        'rss_mb': current_rss_mb(),
+    }
+
+
+def _flatten(report: Dict[str, Any]) -> Dict[str, float]:
+    flat = {k: v for k, v in report['latency'].items() if k in METRIC_DIRECTIONS}
+    flat.update({k: v for k, v in report['cold_start'].items() if k in METRIC_DIRECTIONS and v is not None})
+    for size, values in report['throughput'].items():
+        flat[f'rows_per_sec@{size}'] = values['rows_per_sec']
+    return flat
+
+
+def compare_reports(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> Dict[str, Any]:
+    """Relative change per metric; anything worse than `threshold` (0.10 = 10%) is a regression."""
+    base_flat, new_flat = _flatten(base), _flatten(new)
+    changes, regressions = {}, []
+    for name in sorted(set(base_flat) & set(new_flat)):
+        old, cur = base_flat[name], new_flat[name]
+        if not old:
+            continue
+        change = (cur - old) / old
+        higher_is_better = METRIC_DIRECTIONS[name.split('@')[0]]
+        worse = -change if higher_is_better else change
+        changes[name] = {'base': old, 'new': cur, 'change_pct': round(change * 100, 2)}
+        if worse > threshold:
+            regressions.append(name)
+    return {'threshold_pct': threshold * 100, 'changes': changes, 'regressions': regressions}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark LoanPredictor latency, throughput and memory.")
+    parser.add_argument('--mode', choices=['sklearn', 'compiled'], default='sklearn')
+    parser.add_argument('--model', default=None, help="model .pkl or artifact directory (default: the served model)")
+    parser.add_argument('--iterations', type=int, default=200, help="single-row predictions for the latency percentiles")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write the JSON report here as well as to stdout")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="compare two saved reports instead of running")
+    parser.add_argument('--threshold', type=float, default=0.10, help="relative change flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        result = compare_reports(base, new, args.threshold)
+        print(json.dumps(result, indent=2))
+        sys.exit(1 if result['regressions'] else 0)
+
+    report = run_benchmark(args.mode, args.model, args.iterations, args.batch_sizes, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,126 @@
+# ml_models/cache.py
+
+import copy
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+KEY_PREFIX = 'loanpred'
+
+
+def canonicalize(input_data: Dict[str, Any]) -> Tuple:
+    """
+    Order-independent, type-normalized view of an input dict, so 36, 36.0, Decimal('36') and
+    numpy scalars all map to the same key. Missing values (None/NaN) collapse to None.
+    """
+    items = []
+    for name in sorted(input_data):
+        value = input_data[name]
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            value = None
+        elif isinstance(value, bool):
+            value = int(value)
+        elif isinstance(value, (int, float, Decimal)) or hasattr(value, 'dtype'):
+            try:
+                value = float(value)
+                value = None if math.isnan(value) else value
+            except (TypeError, ValueError):
+                value = str(value)
+        else:
+            value = str(value)
+        items.append((name, value))
+    return tuple(items)
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache for prediction results.
+
+    Keys combine the canonicalized input with the model fingerprint, so loading a different model
+    never serves stale results. When `shared_alias` names a Django cache, misses in the local LRU
+    fall through to it and results are written to both, letting all workers share entries.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, shared_alias: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias or None
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._shared = None
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def make_key(self, input_data: Dict[str, Any], model_fingerprint: str, variant: str = '', schema=None) -> str:
+        """
+        With the model's FeatureSchema the key is what the model would receive (aliases resolved,
+        "15000" and 15000 alike, unused fields ignored); without one (model only loaded in pool
+        workers) it falls back to canonicalize() of the raw fields.
+        """
+        # variant separates results of the same input that carry different fields (e.g. attributions)
+        canonical = schema.canonical(input_data) if schema is not None else canonicalize(input_data)
+        digest = hashlib.sha256(repr(canonical).encode('utf-8')).hexdigest()
+        return f"{KEY_PREFIX}:{model_fingerprint[:16]}:{variant + ':' if variant else ''}{digest}"
+
+    def _shared_cache(self):
+        if self.shared_alias and self._shared is None:
+            from django.core.cache import caches
+            self._shared = caches[self.shared_alias]
+        return self._shared
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    # Deep copies in and out: results hold nested dicts (attributions) callers may change
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self.stats["expirations"] += 1
+
+        shared = self._shared_cache()
+        if shared is not None:
+            value = shared.get(key)
+            if value is not None:
+                self._store_local(key, value)
+                with self._lock:
+                    self.stats["shared_hits"] += 1
+                return copy.deepcopy(value)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._store_local(key, value)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set(key, value, timeout=self.ttl)
+
+    def _store_local(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop local entries. Shared entries expire on their own or die with a model change."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["shared_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,317 @@
+# ml_models/compact.py
+#
+# Post-training compaction of the loan forest, published as a model artifact:
+#
+#     python -m ml_models.compact --data dataset/data4.csv [--max-auc-drop 0.002]
+#
+# The held-out split of the training data is cut in two. On the first half, trees whose scores
+# nearly duplicate a better tree's are dropped and the rest are added greedily, best ROC AUC
+# gain first, until the subset is as good as the full forest (within half the tolerance). The
+# kept trees are stored with float32 thresholds, uint16 leaf probabilities and only the
+# one-hot columns they still split on. The second half decides: if AUC there falls by more
+# than --max-auc-drop against the full forest, nothing is written.
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import numpy as np
+from typing import Dict, Any, List, Optional
+from scipy.stats import rankdata
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from ml_models.artifact import save_artifact
+from ml_models.compiled import CompiledPipeline
+from ml_models.dataset import load_features
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Leaf probabilities are stored as integers in [0, LEAF_LEVELS]
+LEAF_LEVELS = np.iinfo(np.uint16).max
+
+# Share of the AUC tolerance the tree selection may use; the rest is left for unseen rows
+SELECTION_MARGIN = 0.5
+
+# Trees whose held-out scores correlate this strongly with an already kept tree are dropped
+DUPLICATE_CORRELATION = 0.98
+
+
+def tree_scores(compiled: CompiledPipeline, X: np.ndarray) -> np.ndarray:
+    """Positive-class probability of every tree for encoded rows, shape (rows, trees)."""
+    scores = compiled.leaf_value[compiled.apply(X), -1].astype(np.float64)
+    return scores * compiled.leaf_scale if compiled.leaf_scale is not None else scores
+
+
+def _auc_columns(scores: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """ROC AUC of each column of scores (Mann-Whitney rank sum, ties averaged)."""
+    positive = y == 1
+    n_pos = positive.sum()
+    n_neg = len(y) - n_pos
+    ranks = rankdata(scores, axis=0)
+    return (ranks[positive].sum(axis=0) - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def drop_duplicates(scores: np.ndarray, order: List[int], max_corr: float = DUPLICATE_CORRELATION) -> List[int]:
+    """Walk trees best first and keep those not nearly identical to one already kept."""
+    std = scores.std(axis=0)
+    z = (scores - scores.mean(axis=0)) / np.where(std > 0, std, 1)
+    kept = []
+    for t in order:
+        if std[t] == 0:
+            # A constant tree cannot change any ranking
+            continue
+        if kept and (z[:, kept].T @ z[:, t]).max() / len(z) >= max_corr:
+            continue
+        kept.append(t)
+    return kept
+
+
+def select_trees(scores: np.ndarray, y: np.ndarray, candidates: List[int], target_auc: float,
+                 min_trees: int = 1, max_trees: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Greedy forward selection: repeatedly add the candidate that raises the subset's AUC most,
+    until target_auc is reached (with at least min_trees) or max_trees are chosen.
+    Returns the path, one {"tree", "auc"} entry per added tree.
+    """
+    remaining = list(candidates)
+    total = np.zeros(len(y))
+    path = []
+    while remaining and (max_trees is None or len(path) < max_trees):
+        # AUC only depends on the ranking, so the sum stands in for the mean
+        aucs = _auc_columns(total[:, None] + scores[:, remaining], y)
+        best = int(aucs.argmax())
+        tree = remaining.pop(best)
+        total += scores[:, tree]
+        path.append({"tree": tree, "auc": round(float(aucs[best]), 5)})
+        if len(path) >= min_trees and aucs[best] >= target_auc:
+            break
+    return path
+
+
+def _tree_ranges(compiled: CompiledPipeline):
+    ends = np.append(compiled.roots[1:], len(compiled.feature))
+    return list(zip(compiled.roots.tolist(), ends.tolist()))
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    # Rounded down, `x > t` gives the same answer for every float32 x as the float64 threshold
+    # did (no float32 lies between the two), so this step does not change a single split
+    low = values.astype(np.float32)
+    over = low.astype(np.float64) > values
+    low[over] = np.nextafter(low[over], np.float32(-np.inf))
+    return low
+
+
+def _quantize_leaves(values: np.ndarray) -> np.ndarray:
+    q = np.rint(values * LEAF_LEVELS)
+    # Each leaf's classes still add up to exactly LEAF_LEVELS, i.e. probability 1
+    q[:, -1] = LEAF_LEVELS - q[:, :-1].sum(axis=1)
+    return q.astype(np.uint16)
+
+
+def compact_forest(compiled: CompiledPipeline, trees: List[int], quantize: bool = True) -> CompiledPipeline:
+    """Copy of the compiled pipeline with only `trees`, narrow dtypes and unused one-hot columns removed."""
+    trees = sorted(trees)
+    ranges = _tree_ranges(compiled)
+    roots, features, thresholds, children, values = [], [], [], [], []
+    offset = 0
+    for t in trees:
+        start, end = ranges[t]
+        roots.append(offset)
+        features.append(compiled.feature[start:end])
+        thresholds.append(compiled.threshold[start:end])
+        # Child indices (leaves point at themselves) move with the tree's new position
+        children.append(compiled.children[2 * start:2 * end] - start + offset)
+        values.append(compiled.leaf_value[start:end])
+        offset += end - start
+
+    feature = np.concatenate(features)
+    threshold = np.concatenate(thresholds)
+    is_split = np.isfinite(threshold)
+
+    # Keep every numeric column (the schema still fills them) and only split-on category columns
+    n_num = len(compiled.num_columns)
+    used = set(np.unique(feature[is_split]).tolist())
+    keep = list(range(n_num))
+    categories = []
+    position = n_num
+    for cats in compiled.categories:
+        kept = [i for i in range(len(cats)) if position + i in used]
+        keep.extend(position + i for i in kept)
+        categories.append([cats[i] for i in kept])
+        position += len(cats)
+    new_index = np.zeros(compiled.n_features, dtype=np.int64)
+    new_index[keep] = np.arange(len(keep))
+
+    arrays = {name: compiled.arrays[name] for name in ('num_fill', 'num_mean', 'num_scale')}
+    arrays['roots'] = np.asarray(roots, dtype=np.int32)
+    arrays['feature'] = np.where(is_split, new_index[feature], 0).astype(np.int32)
+    arrays['children'] = np.concatenate(children).astype(np.int32)
+    leaf_value = np.concatenate(values)
+    if compiled.leaf_scale is not None:
+        leaf_value = leaf_value * compiled.leaf_scale
+    if quantize:
+        arrays['threshold'] = _float32_floor(threshold)
+        arrays['leaf_value'] = _quantize_leaves(leaf_value)
+    else:
+        arrays['threshold'] = threshold
+        arrays['leaf_value'] = leaf_value
+
+    meta = dict(compiled.meta)
+    meta.update({
+        'categories': categories,
+        'n_features': len(keep),
+        'max_depth': _max_depth(arrays['roots'], arrays['threshold'], arrays['children']),
+        'leaf_scale': 1.0 / LEAF_LEVELS if quantize else None,
+        'compaction': {
+            'source_trees': len(compiled.roots),
+            'kept_trees': [int(t) for t in trees],
+            'source_features': compiled.n_features,
+            'quantized': quantize,
+        },
+    })
+    return CompiledPipeline(arrays, meta)
+
+
+def _max_depth(roots: np.ndarray, threshold: np.ndarray, children: np.ndarray) -> int:
+    level, depth = roots.astype(np.int64), 0
+    while True:
+        inner = level[np.isfinite(threshold[level])]
+        if not len(inner):
+            return depth
+        level = np.concatenate([children[2 * inner], children[2 * inner + 1]]).astype(np.int64)
+        depth += 1
+
+
+def artifact_bytes(compiled: CompiledPipeline) -> int:
+    """Size on disk of the arrays save_artifact would write."""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        out_dir = os.path.join(tmp_dir, 'artifact')
+        manifest = save_artifact(compiled, out_dir)
+        version_dir = os.path.join(out_dir, manifest["version"])
+        return sum(os.path.getsize(os.path.join(version_dir, spec["file"])) for spec in manifest["arrays"].values())
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def measure(compiled: CompiledPipeline, df, y: np.ndarray, iterations: int = 200) -> Dict[str, Any]:
+    """Held-out ROC AUC/accuracy, single-row latency and batch throughput of the forest."""
+    X = compiled.encode_frame(df)
+    proba = compiled.predict_proba_encoded(X)
+    timings = []
+    for i in range(iterations):
+        row = X[i % len(X):i % len(X) + 1]
+        started = time.perf_counter()
+        compiled.predict_proba_encoded(row)
+        timings.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    compiled.predict_proba_encoded(X)
+    batch_seconds = time.perf_counter() - started
+    return {
+        "trees": len(compiled.roots),
+        "nodes": len(compiled.feature),
+        "encoded_features": compiled.n_features,
+        "artifact_kb": round(artifact_bytes(compiled) / 1024, 1),
+        "roc_auc": round(float(roc_auc_score(y, proba[:, -1])), 5),
+        "accuracy": round(float(accuracy_score(y, compiled.classes_[proba.argmax(axis=1)])), 5),
+        "latency_p50_ms": round(float(np.percentile(timings, 50)) * 1000, 4),
+        "rows_per_sec": round(len(X) / batch_seconds, 1),
+    }
+
+
+def compact(model_path: str, data_path: str, out_dir: Optional[str], max_auc_drop: float = 0.002,
+            min_trees: int = 10, max_trees: Optional[int] = None, seed: int = 42) -> Dict[str, Any]:
+    """
+    Compact model_path against the held-out rows of data_path and write the artifact to out_dir,
+    unless AUC on the evaluation half drops by more than max_auc_drop. Returns the report.
+    """
+    started = time.perf_counter()
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    original = CompiledPipeline.from_pipeline(model)
+
+    X, y, load_stats = load_features(data_path)
+    # Same split as model.py / train.py, so none of these rows were seen in training
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.3, random_state=seed, stratify=y)
+    X_sel, X_eval, y_sel, y_eval = train_test_split(X_test, np.asarray(y_test), test_size=0.5,
+                                                    random_state=seed, stratify=y_test)
+    original.check_against(model, X_eval.iloc[:200])
+
+    scores = tree_scores(original, original.encode_frame(X_sel))
+    full_auc = float(_auc_columns(scores.sum(axis=1, keepdims=True), y_sel)[0])
+    order = np.argsort(-_auc_columns(scores, y_sel)).tolist()
+    candidates = drop_duplicates(scores, order)
+    path = select_trees(scores, y_sel, candidates, full_auc - max_auc_drop * SELECTION_MARGIN,
+                        min(min_trees, len(candidates)), max_trees)
+    compacted = compact_forest(original, [step["tree"] for step in path])
+
+    before = measure(original, X_eval, y_eval)
+    after = measure(compacted, X_eval, y_eval)
+    auc_drop = round(before["roc_auc"] - after["roc_auc"], 5)
+    accepted = auc_drop <= max_auc_drop
+    report = {
+        "model": model_path,
+        "model_kb": round(os.path.getsize(model_path) / 1024, 1),
+        "data": data_path,
+        "selection_rows": len(y_sel),
+        "evaluation_rows": len(y_eval),
+        "max_auc_drop": max_auc_drop,
+        "selection": {
+            "full_auc": round(full_auc, 5),
+            "duplicates_dropped": len(original.roots) - len(candidates),
+            "path": path,
+        },
+        "original": before,
+        "compacted": after,
+        "change": {
+            "roc_auc": -auc_drop,
+            "accuracy": round(after["accuracy"] - before["accuracy"], 5),
+            "artifact_size": round(after["artifact_kb"] / before["artifact_kb"] - 1, 3),
+            "latency_p50": round(after["latency_p50_ms"] / before["latency_p50_ms"] - 1, 3),
+        },
+        "accepted": accepted,
+        "published": None,
+        "seconds": None,
+    }
+    if accepted and out_dir:
+        save_artifact(compacted, out_dir, source=model_path)
+        report["published"] = out_dir
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Shrink the trained forest and publish it as a model artifact.")
+    parser.add_argument('--model', default=os.path.join(HERE, 'model.pkl'))
+    parser.add_argument('--data', default=os.path.join('dataset', 'data4.csv'))
+    parser.add_argument('--out', default=os.path.join(HERE, 'model_artifact'))
+    parser.add_argument('--report', default=os.path.join(HERE, 'compact_report.json'))
+    parser.add_argument('--max-auc-drop', type=float, default=0.002,
+                        help="largest held-out ROC AUC loss accepted; beyond it nothing is published")
+    parser.add_argument('--min-trees', type=int, default=10)
+    parser.add_argument('--max-trees', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help="report only, never write the artifact")
+    args = parser.parse_args()
+
+    report = compact(args.model, args.data, None if args.dry_run else args.out, args.max_auc_drop,
+                     args.min_trees, args.max_trees, args.seed)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    before, after = report["original"], report["compacted"]
+    print(f"Trees {before['trees']} -> {after['trees']}, encoded features {before['encoded_features']} -> "
+          f"{after['encoded_features']}, artifact {before['artifact_kb']:.0f} KB -> {after['artifact_kb']:.0f} KB")
+    print(f"Latency p50 {before['latency_p50_ms']:.3f} ms -> {after['latency_p50_ms']:.3f} ms; "
+          f"ROC AUC {before['roc_auc']:.4f} -> {after['roc_auc']:.4f}; "
+          f"accuracy {before['accuracy']:.4f} -> {after['accuracy']:.4f}")
+    if not report["accepted"]:
+        print(f"Not published: ROC AUC dropped by {-report['change']['roc_auc']:.4f} "
+              f"(tolerance {args.max_auc_drop:.4f}). Report: {args.report}")
+        raise SystemExit(1)
+    print(f"Published to {report['published']}" if report["published"] else "Dry run: nothing written")
@@ -0,0 +1,276 @@
+# ml_models/compiled.py
+
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Callable, List, Optional, Sequence
+
+# Rows scored per traversal pass; keeps the dense feature block at a few MB
+CHUNK_ROWS = 128
+
+# Value the categorical imputer in model.py substitutes for missing entries; compiled models
+# record their pipeline's own fill values, this is only assumed for artifacts written before that
+CAT_MISSING = 'missing'
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class CompiledPipeline:
+    """
+    Flat NumPy version of the Pipeline(ColumnTransformer -> RandomForestClassifier) that model.py trains.
+
+    The imputer/scaler constants, one-hot category maps and every tree's nodes are exported into
+    plain arrays, so scoring skips sklearn's per-call validation and walks all trees at once.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.arrays = arrays
+        self.meta = meta
+
+        self.num_columns: List[str] = list(meta['num_columns'])
+        self.cat_columns: List[str] = list(meta['cat_columns'])
+        self.categories: List[List[Any]] = [list(c) for c in meta['categories']]
+        # What the fitted categorical imputer puts in place of a missing value, per column
+        self.cat_fill: List[Any] = list(meta.get('cat_fill') or [CAT_MISSING] * len(self.cat_columns))
+        self.classes_ = np.asarray(meta['classes'])
+        self.n_features = int(meta['n_features'])
+        self.max_depth = int(meta['max_depth'])
+        # Set when leaf_value holds integers (a compacted artifact): probability = value * leaf_scale
+        self.leaf_scale = meta.get('leaf_scale')
+
+        self.num_fill = arrays['num_fill']
+        self.num_mean = arrays['num_mean']
+        self.num_scale = arrays['num_scale']
+        self.roots = arrays['roots']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.leaf_value = arrays['leaf_value']
+
+        # Category value -> column in the encoded feature block
+        self._cat_lookup: List[Dict[Any, int]] = []
+        self._cat_offsets: List[int] = []
+        offset = len(self.num_columns)
+        for cats in self.categories:
+            self._cat_lookup.append({value: offset + i for i, value in enumerate(cats)})
+            self._cat_offsets.append(offset)
+            offset += len(cats)
+
+    @classmethod
+    def from_pipeline(cls, model) -> 'CompiledPipeline':
+        """Export a fitted model.py pipeline into flat arrays."""
+        try:
+            preprocessor = model.named_steps['preprocessor']
+            forest = model.named_steps['classifier']
+            num_pipe = preprocessor.named_transformers_['num']
+            cat_pipe = preprocessor.named_transformers_['cat']
+        except (AttributeError, KeyError) as e:
+            raise ValueError(f"Unsupported pipeline layout, cannot compile: {e}")
+
+        transformers = {name: cols for name, _, cols in preprocessor.transformers_ if name != 'remainder'}
+        num_columns = list(transformers['num'])
+        cat_columns = list(transformers['cat'])
+
+        imputer = num_pipe.named_steps['imputer']
+        scaler = num_pipe.named_steps['scaler']
+        n_num = len(num_columns)
+        num_mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_num)
+        num_scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_num)
+
+        cat_imputer = cat_pipe.named_steps.get('imputer')
+        if cat_imputer is None:
+            raise ValueError("Compiled mode needs an imputer in the categorical pipeline")
+        # Compared as strings, like every other categorical value
+        cat_fill = [str(v) for v in cat_imputer.statistics_]
+
+        onehot = cat_pipe.named_steps['onehot']
+        if onehot.drop is not None:
+            raise ValueError("Compiled mode does not support OneHotEncoder(drop=...)")
+        categories = [list(c) for c in onehot.categories_]
+        n_features = n_num + sum(len(c) for c in categories)
+        if n_features != forest.n_features_in_:
+            raise ValueError(f"Encoded width {n_features} does not match the forest ({forest.n_features_in_})")
+
+        # Concatenate every tree into one node table. Leaves loop back to themselves, so all
+        # rows can be walked for max_depth steps without checking which ones already finished.
+        roots, features, thresholds, children, values = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in forest.estimators_:
+            tree = est.tree_
+            n_nodes = tree.node_count
+            idx = np.arange(n_nodes) + offset
+            is_leaf = tree.children_left < 0
+
+            feat = np.where(is_leaf, 0, tree.feature)
+            thr = np.where(is_leaf, np.inf, tree.threshold)
+            left = np.where(is_leaf, idx, tree.children_left + offset)
+            right = np.where(is_leaf, idx, tree.children_right + offset)
+
+            value = tree.value[:, 0, :].astype(np.float64)
+            norm = value.sum(axis=1, keepdims=True)
+            norm[norm == 0] = 1.0
+
+            roots.append(offset)
+            features.append(feat)
+            thresholds.append(thr)
+            children.append(np.stack([left, right], axis=1))
+            values.append(value / norm)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        arrays = {
+            'num_fill': np.asarray(imputer.statistics_, dtype=np.float64),
+            'num_mean': np.asarray(num_mean, dtype=np.float64),
+            'num_scale': np.asarray(num_scale, dtype=np.float64),
+            'roots': np.asarray(roots, dtype=np.int64),
+            'feature': np.concatenate(features).astype(np.int64),
+            'threshold': np.concatenate(thresholds).astype(np.float64),
+            # Flattened as [left0, right0, left1, right1, ...] so child = children[2 * node + went_right]
+            'children': np.concatenate(children).astype(np.int64).ravel(),
+            'leaf_value': np.concatenate(values),
+        }
+        input_columns = getattr(model, 'feature_names_in_', None)
+        meta = {
+            'input_columns': list(input_columns) if input_columns is not None else num_columns + cat_columns,
+            'num_columns': num_columns,
+            'cat_columns': cat_columns,
+            'categories': categories,
+            'cat_fill': cat_fill,
+            'classes': forest.classes_.tolist(),
+            'n_features': n_features,
+            'max_depth': max_depth,
+        }
+        return cls(arrays, meta)
+
+    def _check_columns(self, available) -> None:
+        missing = [c for c in self.num_columns + self.cat_columns if c not in available]
+        if missing:
+            raise ValueError(f"columns are missing: {set(missing)}")
+
+    def encode_records(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Encode input dicts into the dense float32 matrix the forest was trained on."""
+        for record in records:
+            self._check_columns(record)
+        n = len(records)
+        num = np.array(
+            [[np.nan if _is_missing(r[c]) else r[c] for c in self.num_columns] for r in records],
+            dtype=np.float64,
+        ).reshape(n, len(self.num_columns))
+        X = self._encode_numeric(num)
+        for j, col in enumerate(self.cat_columns):
+            lookup = self._cat_lookup[j]
+            fill = self.cat_fill[j]
+            for i, r in enumerate(records):
+                value = r[col]
+                idx = lookup.get(fill if _is_missing(value) else str(value), -1)
+                if idx >= 0:
+                    X[i, idx] = 1.0
+        return X
+
+    def encode_arrays(self, num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+        """Encode the numeric/categorical buffers a FeatureSchema fills."""
+        X = self._encode_numeric(num)
+        for j in range(len(self.cat_columns)):
+            lookup, fill = self._cat_lookup[j], self.cat_fill[j]
+            for i, value in enumerate(cat[:, j]):
+                idx = lookup.get(fill if _is_missing(value) else str(value), -1)
+                if idx >= 0:
+                    X[i, idx] = 1.0
+        return X
+
+    def normalize_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        The frame as the serving path hands it to the pipeline (schema._to_category): categorical
+        None and NaN both become NaN, the only value the fitted SimpleImputer treats as missing
+        (given a raw None it would keep it as an unknown category), other values their string form.
+        """
+        self._check_columns(df.columns)
+        df = df.copy()
+        for col in self.cat_columns:
+            df[col] = [np.nan if _is_missing(v) else str(v) for v in df[col].astype(object)]
+        return df
+
+    def encode_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """Vectorized encode_records for a DataFrame (categorical values read as normalize_frame() does)."""
+        self._check_columns(df.columns)
+        X = self._encode_numeric(df[self.num_columns].to_numpy(dtype=np.float64))
+        rows = np.arange(len(df))
+        for j, col in enumerate(self.cat_columns):
+            values = df[col].astype(object)
+            values = values.where(values.notna(), self.cat_fill[j]).map(str)
+            codes = pd.Categorical(values, categories=self.categories[j]).codes.astype(np.int64)
+            hit = codes >= 0
+            X[rows[hit], codes[hit] + self._cat_offsets[j]] = 1.0
+        return X
+
+    def _encode_numeric(self, num: np.ndarray) -> np.ndarray:
+        num = np.where(np.isnan(num), self.num_fill, num)
+        X = np.zeros((num.shape[0], self.n_features), dtype=np.float32)
+        # Scale in float64 and cast afterwards, like the sklearn pipeline does
+        X[:, :num.shape[1]] = (num - self.num_mean) / self.num_scale
+        return X
+
+    def _walk(self, block: np.ndarray, on_step: Optional[Callable[[np.ndarray, np.ndarray], None]] = None) -> np.ndarray:
+        """Leaf reached in every tree for each row; on_step(parent, child) sees every step of the paths."""
+        n = block.shape[0]
+        flat = np.ascontiguousarray(block).ravel()
+        row_offset = (np.arange(n) * self.n_features)[:, None]
+        node = np.repeat(self.roots[None, :], n, axis=0)
+        for _ in range(self.max_depth):
+            x = flat[row_offset + self.feature[node]]
+            went_right = x > self.threshold[node]
+            child = self.children[2 * node + went_right]
+            if on_step is not None:
+                on_step(node, child)
+            node = child
+        return node
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node reached in every tree, shape (rows, trees), like sklearn's forest.apply()."""
+        out = np.empty((X.shape[0], len(self.roots)), dtype=np.int64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            out[start:start + CHUNK_ROWS] = self._walk(X[start:start + CHUNK_ROWS])
+        return out
+
+    def encode_numeric_columns(self, X: np.ndarray, num: np.ndarray, columns: Sequence[int]) -> None:
+        """Re-encode only the given numeric columns (indices into num_columns) of X from raw values, in place."""
+        for j in columns:
+            values = np.where(np.isnan(num[:, j]), self.num_fill[j], num[:, j])
+            X[:, j] = (values - self.num_mean[j]) / self.num_scale[j]
+
+    def predict_proba_encoded(self, X: np.ndarray) -> np.ndarray:
+        """Average the leaf class probabilities of every tree for already-encoded rows."""
+        out = np.empty((X.shape[0], self.leaf_value.shape[1]))
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            node = self._walk(X[start:start + CHUNK_ROWS])
+            out[start:start + node.shape[0]] = self.leaf_value[node].mean(axis=1)
+        if self.leaf_scale is not None:
+            out *= self.leaf_scale
+        return out
+
+    def predict_proba_records(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        return self.predict_proba_encoded(self.encode_records(records))
+
+    def predict_proba_arrays(self, num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+        return self.predict_proba_encoded(self.encode_arrays(num, cat))
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        return self.predict_proba_encoded(self.encode_frame(df))
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        return self.classes_[self.predict_proba(df).argmax(axis=1)]
+
+    def max_abs_error(self, model, df: pd.DataFrame) -> float:
+        """Largest probability difference against the sklearn pipeline on the given rows."""
+        df = self.normalize_frame(df)
+        return float(np.abs(self.predict_proba(df) - model.predict_proba(df)).max())
+
+    def check_against(self, model, df: pd.DataFrame, atol: float = 1e-9) -> float:
+        """Raise RuntimeError if the compiled scores drift from sklearn by more than atol."""
+        error = self.max_abs_error(model, df)
+        if error > atol:
+            raise RuntimeError(f"Compiled model differs from sklearn by {error:.3g} (tolerance {atol:.3g})")
+        return error
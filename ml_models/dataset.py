@@ -0,0 +1,212 @@
+# ml_models/dataset.py
+#
+# Streaming loader for the loan history (data4.csv) used by model.py and retrain-model.py.
+# The CSV is read in chunks with explicit dtypes; each chunk is cleaned and feature-engineered
+# on its own and kept in compact form (float32 numbers, category strings), so the full
+# object-dtype frame the scripts used to build never exists.
+
+import glob
+import hashlib
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+from ml_models.memory import peak_rss_mb
+from ml_models.profiling import profiled, stage
+
+# Rows parsed per chunk
+CHUNK_ROWS = 50_000
+
+# Cleaned features are cached here, keyed by the CSV's hash and this module's code; set
+# LOAN_FEATURE_CACHE_DIR to '' to always rebuild
+FEATURE_CACHE_DIR = os.environ.get(
+    'LOAN_FEATURE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feature_cache')
+)
+
+TARGET = 'repay_fail'
+
+# Identifiers and columns not known at application time; never parsed at all
+DROP_COLUMNS = {'Unnamed: 0', 'id', 'member_id', 'next_pymnt_d'}
+
+# Low-cardinality strings stored as categories (codes + one copy of each label)
+CATEGORY_COLUMNS = [
+    'grade', 'sub_grade', 'purpose', 'addr_state', 'home_ownership', 'verification_status',
+    'loan_status', 'zip_code', 'earliest_cr_line', 'revol_util',
+]
+
+# Strings that are parsed into numbers/dates; read as categories so each distinct value is parsed once
+PARSED_COLUMNS = ['term', 'emp_length', 'int_rate', 'issue_d', 'last_pymnt_d', 'last_credit_pull_d']
+
+NUMERIC_COLUMNS = [
+    'loan_amnt', 'funded_amnt', 'funded_amnt_inv', 'installment', 'annual_inc', 'dti', 'delinq_2yrs',
+    'inq_last_6mths', 'mths_since_last_delinq', 'open_acc', 'pub_rec', 'revol_bal', 'total_acc',
+    'total_pymnt', 'total_pymnt_inv', 'total_rec_prncp', 'total_rec_int', 'last_pymnt_amnt', TARGET,
+]
+
+DTYPES = {
+    **{c: 'category' for c in CATEGORY_COLUMNS + PARSED_COLUMNS},
+    **{c: 'float32' for c in NUMERIC_COLUMNS},
+}
+
+
+def _map_categories(col: pd.Series, parse) -> pd.Series:
+    """Apply `parse` to each distinct label of a categorical column instead of to every row."""
+    parsed = parse(pd.Series(col.cat.categories, dtype=object))
+    # One extra NaN/NaT slot at the end, which the missing-value code -1 picks up
+    lookup = parsed.reindex(range(len(parsed) + 1)).to_numpy()
+    return pd.Series(lookup[col.cat.codes.to_numpy()], index=col.index)
+
+
+def _first_number(labels: pd.Series) -> pd.Series:
+    return labels.str.extract(r'(\d+)', expand=False).astype('float32')
+
+
+def clean_chunk(df: pd.DataFrame, today: pd.Timestamp, drop_unlabelled: bool = True) -> Tuple[pd.DataFrame, bool]:
+    """
+    Cleaning and feature engineering for one chunk, same steps as the original training script.
+    Returns the chunk and whether int_rate was written as a percentage string. Rows without a
+    target are dropped unless drop_unlabelled is False (scoring a portfolio, say).
+    """
+    if 'term' in df.columns:
+        df['term'] = _map_categories(df['term'], _first_number)
+    if 'emp_length' in df.columns:
+        df['emp_length'] = _map_categories(df['emp_length'], _first_number).fillna(10)
+
+    percent = False
+    if 'int_rate' in df.columns:
+        labels = pd.Series(df['int_rate'].cat.categories).astype(str)
+        percent = bool(labels.str.contains('%', regex=False).any())
+        df['int_rate'] = _map_categories(df['int_rate'], lambda s: s.astype(str).str.replace('%', '').astype('float32'))
+
+    with stage('dates'):
+        for col in ['last_pymnt_d', 'last_credit_pull_d']:
+            if col in df.columns:
+                df[col] = _map_categories(df[col], lambda s: pd.to_datetime(s, format='%b-%y', errors='coerce'))
+                df[f'{col}_year'] = df[col].dt.year.astype('float32')
+                df[f'{col}_month'] = df[col].dt.month.astype('float32')
+
+    if all(col in df.columns for col in ['total_pymnt', 'funded_amnt']):
+        df['payment_ratio'] = (df['total_pymnt'] / df['funded_amnt']).replace([np.inf, -np.inf], np.nan)
+
+    with stage('dates'):
+        if 'issue_d' in df.columns:
+            df['issue_d'] = _map_categories(df['issue_d'], lambda s: pd.to_datetime(s, format='%b-%y', errors='coerce'))
+            df['loan_age'] = (today - df['issue_d']).dt.days.astype('float32')
+
+    # Columns outside the known lists: shrink whatever pandas inferred
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype('category')
+        elif df[col].dtype.kind in 'if' and df[col].dtype != np.float32 and col != TARGET:
+            df[col] = df[col].astype('float32')
+    if not drop_unlabelled or TARGET not in df.columns:
+        return df, percent
+    return df.dropna(subset=[TARGET]), percent
+
+
+def _concat(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    # Chunks carry different category sets, and pd.concat falls back to object for those
+    # columns; give every chunk the union first so the result stays categorical
+    dtypes = {
+        col: pd.CategoricalDtype(pd.api.types.union_categoricals([c[col] for c in chunks], ignore_order=True).categories)
+        for col in chunks[0].columns if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)
+    }
+    for i in range(len(chunks)):
+        chunks[i] = chunks[i].astype(dtypes)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def load_training_data(path: str, chunksize: int = CHUNK_ROWS, encoding: str = 'latin1') -> Tuple[pd.DataFrame, pd.Series, Dict[str, Any]]:
+    """
+    Stream data4.csv into the cleaned feature frame X and target y.
+    Also returns load stats: rows, chunks, seconds, frame size and the process's peak RSS.
+    """
+    started = time.perf_counter()
+    today = pd.Timestamp('today')
+    chunks, percent, rows_read = [], False, 0
+    with pd.read_csv(path, encoding=encoding, chunksize=chunksize, dtype=DTYPES,
+                     usecols=lambda c: c not in DROP_COLUMNS) as reader:
+        for raw in profiled(reader, 'parse_csv'):
+            rows_read += len(raw)
+            with stage('clean'):
+                chunk, chunk_percent = clean_chunk(raw, today)
+            percent = percent or chunk_percent
+            chunks.append(chunk)
+    if not chunks:
+        raise ValueError(f"No rows in {path}")
+
+    with stage('concat'):
+        df = _concat(chunks)
+    del chunks
+    # Fractions (0.1356) become percentages; decided on the whole column, not per chunk
+    if 'int_rate' in df.columns and not percent and df['int_rate'].max() < 1:
+        df['int_rate'] = df['int_rate'] * 100
+
+    y = df.pop(TARGET).astype('int8')
+    stats = {
+        "rows_read": rows_read,
+        "rows": len(df),
+        "chunks": (rows_read + chunksize - 1) // chunksize,
+        "seconds": round(time.perf_counter() - started, 2),
+        "frame_mb": round(float(df.memory_usage(deep=True).sum()) / (1024 * 1024), 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return df, y, stats
+
+
+def feature_cache_key(path: str) -> str:
+    """Changes whenever the CSV, the cleaning code in this file or the pandas version changes."""
+    from ml_models.artifact import file_sha256
+    digest = hashlib.sha256()
+    for part in (file_sha256(path), file_sha256(os.path.abspath(__file__)), pd.__version__):
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _refresh_loan_age(X: pd.DataFrame) -> None:
+    # loan_age counts days up to today, so a cached value is stale the next day
+    if 'issue_d' in X.columns and 'loan_age' in X.columns:
+        X['loan_age'] = (pd.Timestamp('today') - X['issue_d']).dt.days.astype('float32')
+
+
+def load_features(path: str, cache_dir: Optional[str] = None, refresh: bool = False) -> Tuple[pd.DataFrame, pd.Series, Dict[str, Any]]:
+    """
+    load_training_data() behind an on-disk cache of the cleaned frame and target.
+    A hit skips parsing and cleaning entirely; stats['cache'] says which happened.
+    """
+    cache_dir = FEATURE_CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir:
+        X, y, stats = load_training_data(path)
+        return X, y, dict(stats, cache='off')
+
+    started = time.perf_counter()
+    key = feature_cache_key(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{name}-{key[:16]}.pkl")
+
+    if not refresh and os.path.exists(cache_path):
+        try:
+            with stage('cache_read'), open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            print(f"Ignoring unreadable feature cache {cache_path}: {e}")
+        else:
+            X, y = cached['X'], cached['y']
+            _refresh_loan_age(X)
+            stats = dict(cached['stats'], cache='hit', cache_path=cache_path,
+                         seconds=round(time.perf_counter() - started, 2), peak_rss_mb=peak_rss_mb())
+            return X, y, stats
+
+    X, y, stats = load_training_data(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    with stage('cache_write'), open(tmp_path, 'wb') as f:
+        pickle.dump({'X': X, 'y': y, 'stats': stats}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    # Entries for older versions of the same CSV are never read again
+    for old in glob.glob(os.path.join(cache_dir, f"{name}-*.pkl")):
+        if old != cache_path:
+            os.remove(old)
+    return X, y, dict(stats, cache='miss', cache_path=cache_path)
@@ -0,0 +1,158 @@
+# ml_models/dispatcher.py
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# Sentinel that tells the worker thread to exit
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ('input_data', 'future', 'enqueued_at')
+
+    def __init__(self, input_data: Dict[str, Any]):
+        self.input_data = input_data
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatchDispatcher:
+    """
+    Coalesces single-row prediction requests from many threads into batches.
+
+    Callers block on (or await) their own future while one worker thread collects requests
+    for up to `max_wait` seconds after the oldest one arrived, or until `max_batch_size` are
+    waiting, then scores them with a single `predict_batch` call. If the batch call fails,
+    each request is retried alone with `predict_one` so one bad row only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        predict_one: Callable[[Dict[str, Any]], Dict[str, Any]],
+        max_batch_size: int = 32,
+        max_wait: float = 0.002,
+    ):
+        self.predict_batch = predict_batch
+        self.predict_one = predict_one
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._recent_delays = deque(maxlen=1000)
+        self.stats = {"requests": 0, "batches": 0, "fallbacks": 0, "max_batch": 0, "total_delay": 0.0}
+
+    def _ensure_worker(self) -> None:
+        # Started on first use and restarted after a fork: threads do not survive into
+        # gunicorn/multiprocessing children, and a parent's queue must not be shared.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='loan-microbatch', daemon=True)
+            self._thread.start()
+
+    def submit(self, input_data: Dict[str, Any]) -> Future:
+        """Queue one row; the returned future resolves to its prediction dict."""
+        self._ensure_worker()
+        request = _Request(input_data)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, input_data: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocking interface: queue one row and wait for its result."""
+        return self.submit(input_data).result(timeout=timeout)
+
+    async def predict_async(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """asyncio interface: await the row's result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(input_data))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish queued requests and stop the worker thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = first.enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # Requests that piled up while the previous batch ran are taken without waiting
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[_Request]) -> None:
+        live = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        started = time.monotonic()
+        delays = [started - r.enqueued_at for r in live]
+        fallback = False
+        try:
+            results = self.predict_batch([r.input_data for r in live])
+            for request, result in zip(live, results):
+                request.future.set_result(result)
+        except Exception:
+            fallback = True
+            for request in live:
+                try:
+                    request.future.set_result(self.predict_one(request.input_data))
+                except Exception as e:
+                    request.future.set_exception(e)
+
+        with self._stats_lock:
+            self.stats["requests"] += len(live)
+            self.stats["batches"] += 1
+            self.stats["fallbacks"] += int(fallback)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(live))
+            self.stats["total_delay"] += sum(delays)
+            self._recent_delays.extend(delays)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch size and queue delay metrics (delays in milliseconds)."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            recent = sorted(self._recent_delays)
+        requests = stats.pop("requests")
+        total_delay = stats.pop("total_delay")
+        stats.update({
+            "requests": requests,
+            "queued": self._queue.qsize(),
+            "avg_batch": round(requests / stats["batches"], 2) if stats["batches"] else 0.0,
+            "avg_queue_delay_ms": round(total_delay / requests * 1000, 3) if requests else 0.0,
+            "p95_queue_delay_ms": round(recent[int(0.95 * (len(recent) - 1))] * 1000, 3) if recent else 0.0,
+            "max_queue_delay_ms": round(recent[-1] * 1000, 3) if recent else 0.0,
+        })
+        return stats
@@ -0,0 +1,65 @@
+# ml_models/executor.py
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised instead of queueing when every scoring thread and waiting slot is taken."""
+
+
+class BoundedExecutor:
+    """
+    Runs CPU-bound scoring for async views off the event loop, in at most `max_workers` threads.
+
+    At most `max_pending` further calls may wait for a thread; past that run() raises
+    ExecutorBusy at once, so an overloaded worker sheds load instead of growing a queue that
+    clients have long given up on. A slot is only freed when its call actually finishes, even
+    if the awaiting request was cancelled (client disconnect) in the meantime.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "rejected": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive a fork (gunicorn/uvicorn --workers): build the pool per process
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='loan-scoring')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _done(self, _future) -> None:
+        self._slots.release()
+        with self._lock:
+            self.stats["in_flight"] -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise ExecutorBusy(f"Scoring queue is full ({self.max_workers} running, {self.max_pending} waiting)")
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except RuntimeError:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, workers=self.max_workers, max_pending=self.max_pending)
@@ -0,0 +1,78 @@
+# ml_models/explain.py
+#
+# Per-prediction feature attributions for the random forest (Saabas' method). Every node of
+# every tree already holds the class mix of the training rows that reached it, i.e. the
+# expected prediction there; walking a row down a tree, each split moves that expectation by
+# value[child] - value[parent], and the move is credited to the split's input column. The
+# tree's bias (root value) plus the credits add up exactly to the tree's prediction, so the
+# forest average does too. The node tables are prepared once when the model loads; a request
+# then costs one more walk of the same depth as the prediction itself.
+
+import numpy as np
+from typing import Dict, Any, List
+
+from ml_models.compiled import CHUNK_ROWS, CompiledPipeline
+
+
+class TreeExplainer:
+    """
+    Attributions of the positive-class probability (the `probability` predict_approval returns)
+    to the model's input columns. One-hot columns are credited back to their categorical column.
+    """
+
+    def __init__(self, compiled: CompiledPipeline, positive_class: int = 1):
+        self.compiled = compiled
+        self.columns: List[str] = compiled.num_columns + compiled.cat_columns
+        k = int(np.flatnonzero(compiled.classes_ == positive_class)[0])
+
+        # Expected positive-class probability at every node, internal ones included
+        self.node_value = np.asarray(compiled.leaf_value[:, k], dtype=np.float64)
+        if compiled.leaf_scale is not None:
+            self.node_value = self.node_value * compiled.leaf_scale
+
+        # Input column of each node's split (leaves never move the value, so theirs is unused)
+        column_of_feature = np.empty(compiled.n_features, dtype=np.int64)
+        n_num = len(compiled.num_columns)
+        column_of_feature[:n_num] = np.arange(n_num)
+        offset = n_num
+        for j, cats in enumerate(compiled.categories):
+            column_of_feature[offset:offset + len(cats)] = n_num + j
+            offset += len(cats)
+        self.node_column = column_of_feature[compiled.feature]
+
+        self.n_trees = len(compiled.roots)
+        self.base_value = float(self.node_value[compiled.roots].mean())
+
+    def contributions_encoded(self, X: np.ndarray) -> np.ndarray:
+        """Per-column contributions, shape (rows, columns); base_value + row sum = predicted probability."""
+        n_columns = len(self.columns)
+        out = np.zeros((X.shape[0], n_columns))
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            block = X[start:start + CHUNK_ROWS]
+            n = block.shape[0]
+            cell = (np.arange(n) * n_columns)[:, None]
+            totals = np.zeros(n * n_columns)
+
+            def credit(parent: np.ndarray, child: np.ndarray) -> None:
+                # Zero for rows already at a leaf, which loops back to itself
+                gain = self.node_value[child] - self.node_value[parent]
+                totals[:] += np.bincount((cell + self.node_column[parent]).ravel(), weights=gain.ravel(),
+                                         minlength=n * n_columns)
+
+            self.compiled._walk(block, credit)
+            out[start:start + n] = totals.reshape(n, n_columns) / self.n_trees
+        return out
+
+    def contributions_arrays(self, num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+        return self.contributions_encoded(self.compiled.encode_arrays(num, cat))
+
+    def explain(self, contributions: np.ndarray, digits: int = 4) -> Dict[str, Any]:
+        """One row's contributions as a dict, largest effect first, columns that did not move it left out."""
+        order = np.argsort(-np.abs(contributions), kind='stable')
+        return {
+            "base_value": round(self.base_value, digits),
+            "contributions": {
+                self.columns[j]: round(float(contributions[j]), digits)
+                for j in order if round(float(contributions[j]), digits) != 0
+            },
+        }
@@ -0,0 +1,89 @@
+# ml_models/incremental.py
+#
+# Warm-start retraining: new trees are fitted on newly labelled rows only and appended to the
+# published forest, so the cost of a retrain follows the amount of new data rather than the
+# whole history. The fitted preprocessor is reused as-is (its medians, scaling and one-hot
+# categories stay those of the full training run). The trees of the full training run are never
+# dropped: new rows only carry the web form's fields, so trees fitted on them alone see every other
+# column imputed. Driven by `manage.py retrain_incremental`.
+
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+
+# Watermark and version history of incremental retrains, kept next to the model
+STATE_FILE = 'retrain_state.json'
+
+
+def read_state(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"version": 0, "watermark": None, "history": []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_state(path: str, state: Dict[str, Any]) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _years(value) -> float:
+    # emp_length is free text on LoanApplication: '5', '5.0', '10+ years'
+    match = re.search(r'\d+(\.\d+)?', str(value)) if value not in (None, '') else None
+    return float(match.group()) if match else np.nan
+
+
+def application_features(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Model input for one LoanApplication .values() row (same names as the web form's input_data)."""
+    return {
+        'term': float(row['loan_term']),
+        'int_rate': float(row['interest_rate']),
+        'emp_length': _years(row['emp_length']),
+        'loan_amount': float(row['loan_amount']),
+        'income': float(row['income']),
+        'expenses': float(row['expenses']),
+        'emi': float(row['emi']),
+    }
+
+
+def grow_forest(model, X: pd.DataFrame, y: np.ndarray, n_trees: int = 10,
+                max_trees: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fit `n_trees` new trees on (X, y) and add them to the pipeline's forest in place.
+    With `max_trees`, the oldest added trees are dropped beyond that size (a sliding window); the
+    trees the forest had before its first incremental run (kept as `base_trees_`) always stay.
+    """
+    forest = model.named_steps['classifier']
+    classes = np.unique(y)
+    if not np.array_equal(classes, forest.classes_):
+        raise ValueError(f"New rows must contain every class {forest.classes_.tolist()}, got {classes.tolist()}")
+
+    started = time.perf_counter()
+    X_enc = model.named_steps['preprocessor'].transform(X)
+    before = len(forest.estimators_)
+    # Stored on the forest, so a full retrain (a new pickle) starts a new base
+    base = getattr(forest, 'base_trees_', before)
+    forest.base_trees_ = base
+    forest.set_params(warm_start=True, n_estimators=before + n_trees)
+    forest.fit(X_enc, y)
+    forest.set_params(warm_start=False)
+
+    dropped = 0
+    if max_trees and len(forest.estimators_) > max(max_trees, base):
+        dropped = len(forest.estimators_) - max(max_trees, base)
+        forest.estimators_ = forest.estimators_[:base] + forest.estimators_[base + dropped:]
+        forest.set_params(n_estimators=len(forest.estimators_))
+    return {
+        "rows": int(len(y)),
+        "trees_added": n_trees,
+        "trees_dropped": dropped,
+        "trees": len(forest.estimators_),
+        "base_trees": base,
+        "fit_seconds": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,26 @@
+# ml_models/memory.py
+#
+# Resident memory of the current process, for the serving, training and profiling code alike.
+# Standard library only, so importing it never pulls in the ML stack.
+
+import os
+from typing import Optional
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB, or None where /proc is not available (e.g. Windows)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of this process's resident memory in MB (None where `resource` is missing)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,166 @@
+# ml_models/pool.py
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+
+# What to do when the pool cannot answer in time: score in the calling thread, or fail the request
+FALLBACK_POLICIES = ('inline', 'error')
+
+# Predictor owned by each worker process, created once by _init_worker
+_worker_predictor = None
+
+
+def _init_worker(compiled: Optional[bool]) -> None:
+    global _worker_predictor
+    from ml_models.predictor import LoanPredictor
+    _worker_predictor = LoanPredictor(compiled=compiled)
+    _worker_predictor.warmup()
+
+
+def _worker_predict(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    return _worker_predictor._predict_one(input_data)
+
+
+def _worker_explain(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    return _worker_predictor._predict_one(input_data, explain=True)
+
+
+def _worker_predict_batch(args) -> List[Dict[str, Any]]:
+    batch, columns = args
+    return _worker_predictor._score_batch(batch, columns)
+
+
+class ProcessPoolBackend:
+    """
+    Runs CPU-bound scoring in a pool of worker processes so request threads only wait on a future.
+
+    Each worker loads the model once in its initializer. Calls that exceed `timeout` seconds, hit a
+    crashed pool, or find the pool shut down under them (after one retry) follow the `fallback` policy: 'inline' scores in the calling thread,
+    'error' raises RuntimeError. Errors raised by the prediction itself are passed through.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: float = 5.0,
+        fallback: str = 'inline',
+        compiled: Optional[bool] = None,
+        start_method: str = 'spawn',
+    ):
+        if fallback not in FALLBACK_POLICIES:
+            raise ValueError(f"Unknown fallback policy {fallback!r}; expected one of {FALLBACK_POLICIES}")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.fallback = fallback
+        self.compiled = compiled
+        # 'spawn' by default: forking a multi-threaded Django worker can deadlock the child
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "timeouts": 0, "crashes": 0, "closed": 0, "fallbacks": 0}
+        atexit.register(self.shutdown)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.compiled,),
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    def restart(self) -> None:
+        """
+        Bring up a fresh set of workers (which load the model from disk) and switch to them once
+        they are warm. The old workers finish the calls already queued on them, then exit.
+        """
+        executor = self._new_executor()
+        list(executor.map(_noop, range(self.max_workers or os.cpu_count() or 1)))
+        with self._lock:
+            old, self._executor = self._executor, executor
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def start(self) -> None:
+        """Spin up every worker and load the model in each, ahead of the first request."""
+        executor = self._get_executor()
+        list(executor.map(_noop, range(self.max_workers or os.cpu_count() or 1)))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def predict_approval(self, input_data: Dict[str, Any], inline: Callable) -> Dict[str, Any]:
+        return self._call(_worker_predict, input_data, inline)
+
+    def explain_approval(self, input_data: Dict[str, Any], inline: Callable) -> Dict[str, Any]:
+        return self._call(_worker_explain, input_data, inline)
+
+    def predict_batch(self, batch: Any, columns: Optional[List[str]], inline: Callable) -> List[Dict[str, Any]]:
+        # Rows are validated and vectorized in the worker, which holds the model's feature schema
+        return self._call(_worker_predict_batch, (batch, columns), lambda args: inline(*args))
+
+    def _submit(self, fn: Callable, payload: Any):
+        """Submit to the current executor, or return None if no executor will take the call."""
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return executor.submit(fn, payload)
+            except BrokenProcessPool:
+                raise
+            except RuntimeError:
+                # restart() or shutdown() closed this executor after we took it; try its replacement once
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+        return None
+
+    def _call(self, fn: Callable, payload: Any, inline: Callable):
+        with self._lock:
+            self.stats["calls"] += 1
+        future = None
+        try:
+            future = self._submit(fn, payload)
+            if future is not None:
+                return future.result(timeout=self.timeout)
+            reason, counter = "pool was shut down", "closed"
+        except FuturesTimeout:
+            future.cancel()
+            reason, counter = f"timed out after {self.timeout}s", "timeouts"
+        except CancelledError:
+            # shutdown() in another thread dropped the call before a worker picked it up
+            reason, counter = "pool was shut down", "closed"
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault); the next call builds a fresh pool
+            self.shutdown()
+            reason, counter = "pool crashed", "crashes"
+
+        with self._lock:
+            self.stats[counter] += 1
+            if self.fallback == 'inline':
+                self.stats["fallbacks"] += 1
+        if self.fallback == 'inline':
+            print(f"Prediction worker {reason}; scoring inline")
+            return inline(payload)
+        raise RuntimeError(f"Prediction worker {reason}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, workers=self.max_workers, timeout=self.timeout, fallback=self.fallback)
+
+
+def _noop(_):
+    return None
@@ -0,0 +1,58 @@
+# ml_models/portfolio.py
+#
+# Portfolio-level aggregates over scored loans, accumulated chunk by chunk so a pass over
+# millions of applications keeps only one small running total per group in memory.
+
+import numpy as np
+from typing import Dict, Any, Sequence
+
+
+class ExpectedLossAggregator:
+    """
+    Running exposure and expected loss (PD x loan amount) per group, e.g. by term and by month.
+
+    add() takes one chunk of loans as arrays; summary() returns, per grouping and group key,
+    the loan count, exposure, expected loss, mean PD and expected loss as a share of exposure.
+    """
+
+    def __init__(self, groupings: Sequence[str]):
+        self.groupings = list(groupings)
+        self._totals: Dict[str, Dict[Any, np.ndarray]] = {g: {} for g in self.groupings}
+        # count, exposure, expected loss, sum of PD
+        self._overall = np.zeros(4)
+
+    def add(self, pd_values: np.ndarray, amounts: np.ndarray, **keys: np.ndarray) -> None:
+        pd_values = np.asarray(pd_values, dtype=np.float64)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        loss = pd_values * amounts
+        self._overall += (len(pd_values), amounts.sum(), loss.sum(), pd_values.sum())
+        for grouping in self.groupings:
+            labels, index = np.unique(np.asarray(keys[grouping]), return_inverse=True)
+            counts = np.bincount(index, minlength=len(labels))
+            exposure = np.bincount(index, weights=amounts, minlength=len(labels))
+            expected = np.bincount(index, weights=loss, minlength=len(labels))
+            pd_sum = np.bincount(index, weights=pd_values, minlength=len(labels))
+            totals = self._totals[grouping]
+            for i, label in enumerate(labels.tolist()):
+                row = totals.setdefault(label, np.zeros(4))
+                row += (counts[i], exposure[i], expected[i], pd_sum[i])
+
+    @staticmethod
+    def _row(totals: np.ndarray) -> Dict[str, Any]:
+        count, exposure, expected, pd_sum = totals.tolist()
+        return {
+            "loans": int(count),
+            "exposure": round(exposure, 2),
+            "expected_loss": round(expected, 2),
+            "mean_pd": round(pd_sum / count, 4) if count else None,
+            "loss_rate": round(expected / exposure, 4) if exposure else None,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "overall": self._row(self._overall),
+            **{
+                f"by_{grouping}": {str(k): self._row(v) for k, v in sorted(self._totals[grouping].items())}
+                for grouping in self.groupings
+            },
+        }
@@ -2,23 +2,275 @@
 
 import pickle
 import os
-import pandas as pd
-from typing import Dict, Any
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, NamedTuple, Optional, Sequence, Union
+from ml_models.cache import PredictionCache
+from ml_models.dispatcher import MicroBatchDispatcher
+from ml_models.executor import BoundedExecutor
+from ml_models.memory import current_rss_mb
+from ml_models.pool import ProcessPoolBackend
+from ml_models.reload import ModelWatcher, install_reload_signal
+
+# NumPy, pandas and the modules built on them are imported where a model is loaded or scored,
+# so importing this module (every Django view module does) stays cheap for manage.py commands
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from ml_models.compiled import CompiledPipeline
+    from ml_models.explain import TreeExplainer
+    from ml_models.schema import FeatureSchema
 
 # Constants
 MODEL_FILE = 'model.pkl'
+MODEL_ARTIFACT_DIR = 'model_artifact'
+
+# 'pickle' unpickles MODEL_FILE per process, 'artifact' memory-maps MODEL_ARTIFACT_DIR
+# (build it with `python -m ml_models.artifact`) so all workers share one copy
+MODEL_FORMAT = os.environ.get('LOAN_MODEL_FORMAT', 'pickle')
+
+# Result cache for the shared predictor: entries, seconds to live, and an optional Django cache
+# alias (e.g. 'default') to share results between workers. Size 0 turns the cache off.
+PREDICTION_CACHE_SIZE = int(os.environ.get('LOAN_PREDICTION_CACHE_SIZE', '1024'))
+PREDICTION_CACHE_TTL = float(os.environ.get('LOAN_PREDICTION_CACHE_TTL', '300'))
+PREDICTION_CACHE_ALIAS = os.environ.get('LOAN_PREDICTION_CACHE_ALIAS', '')
+
+# Micro-batching of concurrent single-row requests: largest batch and how long the oldest
+# request may wait for company. A max size of 0 or 1 scores every request inline.
+MICROBATCH_MAX_SIZE = int(os.environ.get('LOAN_MICROBATCH_MAX_SIZE', '0'))
+MICROBATCH_WAIT_MS = float(os.environ.get('LOAN_MICROBATCH_WAIT_MS', '2'))
+
+# 'inline' scores in the request thread, 'pool' in worker processes that each load the model once.
+# Pool calls slower than the timeout (seconds) either fall back to inline scoring or fail ('error').
+INFERENCE_BACKEND = os.environ.get('LOAN_INFERENCE_BACKEND', 'inline')
+POOL_WORKERS = int(os.environ.get('LOAN_POOL_WORKERS', '2'))
+POOL_TIMEOUT = float(os.environ.get('LOAN_POOL_TIMEOUT', '5'))
+POOL_FALLBACK = os.environ.get('LOAN_POOL_FALLBACK', 'inline')
+
+# Hot reload: seconds between checks of the model file (0 = off) and the signal that forces a check
+MODEL_RELOAD_INTERVAL = float(os.environ.get('LOAN_MODEL_RELOAD_INTERVAL', '0'))
+MODEL_RELOAD_SIGNAL = os.environ.get('LOAN_MODEL_RELOAD_SIGNAL', 'SIGUSR2')
+
+# Async views (ASGI) score in this many threads, with at most this many more calls waiting;
+# beyond that they are refused (ExecutorBusy) rather than queued
+ASYNC_SCORING_THREADS = int(os.environ.get('LOAN_ASYNC_SCORING_THREADS', '2'))
+ASYNC_MAX_PENDING = int(os.environ.get('LOAN_ASYNC_MAX_PENDING', '64'))
+
+# 'sklearn' runs the pickled Pipeline as-is, 'compiled' scores with the flat-array CompiledPipeline
+INFERENCE_MODE = os.environ.get('LOAN_INFERENCE_MODE', 'sklearn')
+
+# Prepare the per-node tables for feature attributions (predict_approval(..., explain=True)) when the
+# model loads; in sklearn mode this also keeps a flat-array copy of the forest
+ATTRIBUTIONS = os.environ.get('LOAN_ATTRIBUTIONS', '1') == '1'
 
 # Required features from user input - these should match what your form collects
 REQUIRED_FEATURES = ['term', 'int_rate', 'emp_length', 'loan_amount', 'income', 'expenses', 'emi']
 
+# The model's positive class is repay_fail: "prediction" 1 and "probability" describe a default,
+# and an application is approved when the predicted class is not this one
+DEFAULT_CLASS = 1
+
+# Part of every cache key; bump when the result dicts change so shared caches never serve the old ones
+RESULT_FORMAT = 'v2'
+
+# Anything accepted by the batch API: list of input dicts, DataFrame or 2-D array
+BatchInput = Union[Sequence[Dict[str, Any]], 'pd.DataFrame', 'np.ndarray']
+
+class LoadedModel(NamedTuple):
+    """One loaded model version. Never mutated, so replacing the reference to it is an atomic swap."""
+    model: Any
+    compiled: Optional['CompiledPipeline']
+    schema: 'FeatureSchema'
+    fingerprint: str
+    stats: Dict[str, Any]
+    explainer: Optional['TreeExplainer'] = None
+
+
 class LoanPredictor:
-    """Loan prediction service: loads the ML model once and exposes prediction methods."""
-    def __init__(self):
-        self.model = self._load_model()
-        
+    """
+    Loan prediction service: loads the ML model once and exposes prediction methods.
+    The model is unpickled on first use (or by warmup()), not when the object is created,
+    so importing this module stays cheap for manage.py commands that never predict.
+    """
+    def __init__(self, compiled: Optional[bool] = None, cache: Optional[PredictionCache] = None,
+                 model_path: Optional[str] = None):
+        # model_path overrides MODEL_FILE / MODEL_ARTIFACT_DIR: a .pkl file or an artifact directory
+        self.model_path = model_path
+        if compiled is None:
+            compiled = INFERENCE_MODE == 'compiled'
+        self.use_compiled = compiled
+        self.cache = cache
+        self.dispatcher: Optional[MicroBatchDispatcher] = None
+        self.pool: Optional[ProcessPoolBackend] = None
+        self._loaded: Optional[LoadedModel] = None
+        # Fingerprint of the file on disk when the model itself is not loaded here (pool backend)
+        self._file_fingerprint: Optional[str] = None
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def _current(self) -> LoadedModel:
+        """The live model version; callers keep this reference for a whole request."""
+        loaded = self._loaded
+        if loaded is None:
+            self._ensure_loaded()
+            loaded = self._loaded
+        return loaded
+
+    @property
+    def model(self):
+        return self._current().model
+
+    @property
+    def compiled(self) -> Optional['CompiledPipeline']:
+        """Flat-array copy of the pipeline (skips sklearn's per-call validation), or None in sklearn mode."""
+        return self._current().compiled
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded is not None
+
+    @property
+    def load_stats(self) -> Dict[str, Any]:
+        return self._loaded.stats if self._loaded is not None else {}
+
+    @property
+    def model_fingerprint(self) -> str:
+        if self._loaded is not None:
+            return self._loaded.fingerprint
+        if self._file_fingerprint is None:
+            # Hash the file only: with the pool backend the model itself never loads here
+            self._file_fingerprint = self._model_fingerprint()
+        return self._file_fingerprint
+
+    def _ensure_loaded(self):
+        """Load the model exactly once, even when several request threads hit it at the same time."""
+        with self._load_lock:
+            if self._loaded is None:
+                self._loaded = self._load_version()
+
+    def _load_version(self) -> LoadedModel:
+        """Load, compile and time a model version from disk without publishing it."""
+        from ml_models.compiled import CompiledPipeline
+        from ml_models.explain import TreeExplainer
+        from ml_models.schema import FeatureSchema
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        fingerprint = self._model_fingerprint()
+        model = self._load_model()
+        if isinstance(model, CompiledPipeline):
+            compiled = model
+            schema = FeatureSchema.from_compiled(model, REQUIRED_FEATURES)
+        else:
+            compiled = CompiledPipeline.from_pipeline(model) if self.use_compiled else None
+            schema = FeatureSchema.from_pipeline(model, REQUIRED_FEATURES)
+        explainer = None
+        if ATTRIBUTIONS:
+            try:
+                explainer = TreeExplainer(compiled or CompiledPipeline.from_pipeline(model))
+            except ValueError as e:
+                print(f"Feature attributions unavailable for this model: {e}")
+        seconds = time.perf_counter() - started
+        rss_after = current_rss_mb()
+
+        # RSS growth includes the sklearn modules pulled in by unpickling
+        memory = round(rss_after - rss_before, 2) if rss_before is not None and rss_after is not None else None
+        stats = {
+            "load_seconds": round(seconds, 4),
+            "memory_mb": memory,
+            "compiled": compiled is not None,
+            "attributions": explainer is not None,
+            "fingerprint": fingerprint,
+        }
+        print(f"Loan model loaded in {seconds:.3f}s (memory: {memory} MB)")
+        return LoadedModel(model, compiled, schema, fingerprint, stats, explainer)
+
+    def _sanity_check(self, loaded: LoadedModel) -> None:
+        """Score one all-missing row (every value imputed) and make sure the output is a distribution."""
+        import numpy as np
+        probs = np.asarray(self._predict_proba(loaded, *loaded.schema.fill([{}])))
+        if probs.shape != (1, len(loaded.model.classes_)) or not np.isfinite(probs).all() \
+                or abs(probs.sum() - 1.0) > 1e-6:
+            raise RuntimeError(f"Sanity prediction failed for model {loaded.fingerprint[:12]}: {probs}")
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the model currently on disk in the calling thread, check it, then swap it in.
+        Requests already running keep the version they started with; nothing waits on the load.
+        Returns False when the file on disk is the version already being served.
+        """
+        with self._reload_lock:
+            fingerprint = self._model_fingerprint()
+            if not force and fingerprint == self.model_fingerprint:
+                return False
+
+            if self.pool is not None:
+                # Workers load from disk in their initializer; restart them behind the old pool
+                self.pool.restart()
+                self._file_fingerprint = fingerprint
+            if self._loaded is not None or self.pool is None:
+                new = self._load_version()
+                self._sanity_check(new)
+                self._loaded = new
+            if self.cache is not None:
+                # Old entries can no longer match (the key holds the fingerprint); free the memory
+                self.cache.clear()
+            print(f"Loan model reloaded: now serving {fingerprint[:12]}")
+            return True
+
+    def _model_location(self):
+        """('artifact' | 'pickle', path) of the model this predictor serves."""
+        if self.model_path is not None:
+            return ('artifact' if os.path.isdir(self.model_path) else 'pickle'), self.model_path
+        here = os.path.dirname(__file__)
+        if MODEL_FORMAT == 'artifact':
+            return 'artifact', os.path.join(here, MODEL_ARTIFACT_DIR)
+        return 'pickle', os.path.join(here, MODEL_FILE)
+
+    def model_source_path(self) -> str:
+        """File whose change means a new model was published."""
+        kind, path = self._model_location()
+        if kind == 'artifact':
+            from ml_models.artifact import source_file
+            return source_file(path)
+        return path
+
+    def enable_microbatching(self, max_batch_size: int = 32, max_wait: float = 0.002) -> MicroBatchDispatcher:
+        """Route predict_approval cache misses through a MicroBatchDispatcher."""
+        self.dispatcher = MicroBatchDispatcher(
+            lambda rows: self.predict_approval_batch(rows),
+            self._predict_one,
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+        )
+        return self.dispatcher
+
+    def enable_process_pool(self, max_workers: int = 2, timeout: float = 5.0, fallback: str = 'inline') -> ProcessPoolBackend:
+        """Score in a ProcessPoolBackend instead of the calling thread."""
+        self.pool = ProcessPoolBackend(max_workers, timeout, fallback, compiled=self.use_compiled)
+        return self.pool
+
+    def warmup(self) -> Dict[str, Any]:
+        """Load the model now instead of on the first prediction; returns the load stats."""
+        self._sanity_check(self._current())
+        return self.load_stats
+
+    def _model_fingerprint(self) -> str:
+        """Hash identifying the trained model, whichever format it is served from."""
+        from ml_models.artifact import file_sha256, read_manifest
+        kind, path = self._model_location()
+        if kind == 'artifact':
+            manifest = read_manifest(path)
+            return manifest.get("fingerprint") or manifest.get("source_sha256") or file_sha256(self.model_source_path())
+        return file_sha256(path)
+
     def _load_model(self):
         """Load the serialized ML model or raise an error if missing/corrupt."""
-        model_path = os.path.join(os.path.dirname(__file__), MODEL_FILE)
+        kind, model_path = self._model_location()
+        if kind == 'artifact':
+            # Compiled arrays only: scoring always goes through CompiledPipeline in this mode
+            from ml_models.artifact import load_artifact
+            return load_artifact(model_path, mmap=True)
+
         if not os.path.exists(model_path):
             raise RuntimeError(f"Model file not found at {model_path}")
         with open(model_path, 'rb') as f:
@@ -26,42 +278,130 @@ class LoanPredictor:
         return model
         
     def _validate_input(self, input_data: Dict[str, Any]):
-        """Ensure all required features are present."""
+        """Reject unknown fields and missing required ones before anything is scored."""
+        # With the pool backend the model (and its schema) only lives in the workers
+        loaded = self._loaded if self.pool is not None else self._current()
+        if loaded is not None:
+            loaded.schema.validate(input_data)
+            return
         missing = [f for f in REQUIRED_FEATURES if f not in input_data]
         if missing:
             raise ValueError(f"Missing features: {missing}")
-            
-    def _preprocess_input(self, input_data: Dict[str, Any]) -> pd.DataFrame:
-        """Convert input dictionary to DataFrame with expected columns."""
-        # Convert to DataFrame with only the required columns
-        df = pd.DataFrame([input_data])
-        
-        # Calculate additional features if needed
-        # For example, if your model needs DTI (Debt-to-Income ratio) but it's not in the input
-        if 'dti' not in df.columns and 'income' in df.columns and 'emi' in df.columns:
-            df['dti'] = (df['emi'] / df['income']) * 100
-            
-        return df
 
-    def predict_approval(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Predict loan approval (0 or 1) and its probability."""
-        self._validate_input(input_data)
-        df = self._preprocess_input(input_data)
-        
-        try:
-            pred = self.model.predict(df)[0]
-            prob = self.model.predict_proba(df)[0][1]
-            return {
+    def _vectorize_batch(self, schema: 'FeatureSchema', batch: BatchInput, columns: Optional[List[str]] = None):
+        """Turn a list of dicts, DataFrame or 2-D array into validated numeric/categorical buffers."""
+        import numpy as np
+        import pandas as pd
+        if isinstance(batch, pd.DataFrame):
+            return schema.fill_frame(batch)
+        if isinstance(batch, np.ndarray):
+            if batch.ndim != 2:
+                raise ValueError(f"Expected a 2-D array, got {batch.ndim} dimension(s)")
+            columns = list(columns or REQUIRED_FEATURES)
+            if batch.shape[1] != len(columns):
+                raise ValueError(f"Expected {len(columns)} columns {columns}, got {batch.shape[1]}")
+            return schema.fill_frame(pd.DataFrame(batch, columns=columns))
+        rows = list(batch)
+        schema.validate_batch(rows)
+        return schema.fill(rows)
+
+    def _predict_proba(self, loaded: LoadedModel, num: 'np.ndarray', cat: 'np.ndarray') -> 'np.ndarray':
+        if loaded.compiled is not None:
+            return loaded.compiled.predict_proba_arrays(num, cat)
+        return loaded.model.predict_proba(loaded.schema.to_frame(num, cat))
+
+    def _format_results(self, probs: 'np.ndarray', classes: 'np.ndarray') -> List[Dict[str, Any]]:
+        """Build the same result dicts as predict_approval from class probabilities."""
+        preds = classes[probs.argmax(axis=1)]
+        return [
+            {
                 "prediction": int(pred),
                 "probability": round(float(prob), 4),
-                "status": "approved" if pred == 1 else "rejected"
+                "approved": bool(pred != DEFAULT_CLASS),
+                "status": "rejected" if pred == DEFAULT_CLASS else "approved"
             }
+            for pred, prob in zip(preds, probs[:, 1])
+        ]
+
+    def predict_approval(self, input_data: Dict[str, Any], explain: bool = False) -> Dict[str, Any]:
+        """
+        Predict whether the loan would default: "prediction" is the class (1 = repay_fail),
+        "probability" the probability of default, "approved"/"status" the decision that follows
+        (approved when no default is predicted). With explain=True the result also has
+        "base_value" and "contributions": how much each input column moved the probability away
+        from the model's average, largest first; base_value plus the contributions is the probability.
+        """
+        self._validate_input(input_data)
+
+        cache_key = None
+        if self.cache is not None:
+            # With the pool backend the schema is only known once a local fallback has loaded the model
+            loaded = self._loaded if self.pool is not None else self._current()
+            cache_key = self.cache.make_key(input_data, self.model_fingerprint,
+                                            RESULT_FORMAT + ('-explain' if explain else ''),
+                                            loaded.schema if loaded is not None else None)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if explain:
+            # Not micro-batched: attributions are asked for one application at a time
+            if self.pool is not None:
+                result = self.pool.explain_approval(input_data, lambda row: self._predict_one(row, explain=True))
+            else:
+                result = self._predict_one(input_data, explain=True)
+        elif self.dispatcher is not None:
+            result = self.dispatcher.predict(input_data)
+        elif self.pool is not None:
+            result = self.pool.predict_approval(input_data, self._predict_one)
+        else:
+            result = self._predict_one(input_data)
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
+
+    def _predict_one(self, input_data: Dict[str, Any], explain: bool = False) -> Dict[str, Any]:
+        loaded = self._current()
+        loaded.schema.validate(input_data)
+        if explain and loaded.explainer is None:
+            raise RuntimeError("Feature attributions are not available (LOAN_ATTRIBUTIONS=0 or unsupported model)")
+        num, cat = loaded.schema.fill([input_data])
+        try:
+            probs = self._predict_proba(loaded, num, cat)
+            result = self._format_results(probs, loaded.model.classes_)[0]
+            if explain:
+                result.update(loaded.explainer.explain(loaded.explainer.contributions_arrays(num, cat)[0]))
+            return result
         except Exception as e:
             import traceback
             print(f"Prediction error: {str(e)}")
             print(traceback.format_exc())
             raise RuntimeError(f"Failed to make prediction: {str(e)}")
 
+    def predict_approval_batch(self, batch: BatchInput, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Predict loan approval for many applicants with a single predict_proba call.
+        `columns` names the columns of an ndarray input (defaults to REQUIRED_FEATURES).
+        Returns one result dict per row, in input order.
+        """
+        if len(batch) == 0:
+            return []
+        if self.pool is not None:
+            return self.pool.predict_batch(batch, columns, self._score_batch)
+        return self._score_batch(batch, columns)
+
+    def _score_batch(self, batch: BatchInput, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        loaded = self._current()
+        num, cat = self._vectorize_batch(loaded.schema, batch, columns)
+        try:
+            probs = self._predict_proba(loaded, num, cat)
+            return self._format_results(probs, loaded.model.classes_)
+        except Exception as e:
+            import traceback
+            print(f"Batch prediction error: {str(e)}")
+            print(traceback.format_exc())
+            raise RuntimeError(f"Failed to make batch prediction: {str(e)}")
+
     def predict_term(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Return the loan term from input.
@@ -98,15 +438,93 @@ class LoanPredictor:
             "message": message
         }
 
-# Single shared predictor instance
-_predictor = LoanPredictor()
+# Single shared predictor instance (the model itself loads lazily)
+_predictor = LoanPredictor(
+    cache=PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_ALIAS)
+    if PREDICTION_CACHE_SIZE > 0 else None
+)
+if INFERENCE_BACKEND == 'pool':
+    _predictor.enable_process_pool(POOL_WORKERS, POOL_TIMEOUT, POOL_FALLBACK)
+if MICROBATCH_MAX_SIZE > 1:
+    _predictor.enable_microbatching(MICROBATCH_MAX_SIZE, MICROBATCH_WAIT_MS / 1000)
+
+_async_executor: Optional[BoundedExecutor] = None
+_async_executor_lock = threading.Lock()
+
+def _get_async_executor() -> BoundedExecutor:
+    """The executor async views score in, created on the first async prediction."""
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = BoundedExecutor(ASYNC_SCORING_THREADS, ASYNC_MAX_PENDING)
+        return _async_executor
+
+def warmup() -> Dict[str, Any]:
+    """Load the shared model ahead of the first request, e.g. while a worker boots."""
+    if _predictor.pool is not None:
+        # Models live in the pool workers; the local copy is only loaded if a fallback needs it
+        _predictor.pool.start()
+        return {"backend": "pool", **_predictor.pool.get_stats()}
+    return _predictor.warmup()
+
+def reload_model(force: bool = False) -> bool:
+    """Swap in the model currently on disk; False if it is the version already live."""
+    return _predictor.reload(force=force)
+
+_watcher: Optional[ModelWatcher] = None
+
+def start_model_watcher(interval: Optional[float] = None) -> Optional[ModelWatcher]:
+    """Start hot reload for this process: file watcher (if an interval is set) and reload signal."""
+    global _watcher
+    interval = MODEL_RELOAD_INTERVAL if interval is None else interval
+    if interval > 0 and _watcher is None:
+        _watcher = ModelWatcher(_predictor, interval).start()
+    install_reload_signal(_predictor, MODEL_RELOAD_SIGNAL)
+    return _watcher
+
+def get_load_stats() -> Dict[str, Any]:
+    """Load time and memory of the shared model; empty until it has been loaded."""
+    return dict(_predictor.load_stats)
+
+def get_dispatcher_stats() -> Dict[str, Any]:
+    """Batch size and queue delay metrics of the shared predictor's micro-batcher."""
+    return _predictor.dispatcher.get_stats() if _predictor.dispatcher is not None else {}
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Call/timeout/fallback counters of the process-pool backend, if it is enabled."""
+    return _predictor.pool.get_stats() if _predictor.pool is not None else {}
+
+def get_async_executor_stats() -> Dict[str, Any]:
+    """Call/rejection counters of the executor that async views score in."""
+    return _async_executor.get_stats() if _async_executor is not None else {}
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters of the shared predictor's result cache."""
+    return _predictor.cache.get_stats() if _predictor.cache is not None else {}
+
+def validate_loan_input(input_data: Dict[str, Any]) -> None:
+    """Raise ValueError for unknown or missing fields, without scoring anything."""
+    _predictor._validate_input(input_data)
 
 def predict_from_input(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """Alias to the primary approval-prediction method."""
     return _predictor.predict_approval(input_data)
 
-def predict_loan_approval(input_data: Dict[str, Any]) -> Dict[str, Any]:
-    return _predictor.predict_approval(input_data)
+def predict_loan_approval(input_data: Dict[str, Any], explain: bool = False) -> Dict[str, Any]:
+    return _predictor.predict_approval(input_data, explain=explain)
+
+def predict_loan_approval_batch(batch: BatchInput, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    return _predictor.predict_approval_batch(batch, columns)
+
+async def run_scoring(fn, *args, **kwargs):
+    """Await fn(*args, **kwargs) from an async view, run in the bounded scoring executor."""
+    return await _get_async_executor().run(fn, *args, **kwargs)
+
+async def apredict_loan_approval(input_data: Dict[str, Any], explain: bool = False) -> Dict[str, Any]:
+    return await _get_async_executor().run(_predictor.predict_approval, input_data, explain=explain)
+
+async def apredict_loan_approval_batch(batch: BatchInput, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    return await _get_async_executor().run(_predictor.predict_approval_batch, batch, columns)
 
 def predict_loan_term(input_data: Dict[str, Any]) -> Dict[str, Any]:
     return _predictor.predict_term(input_data)
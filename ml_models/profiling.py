@@ -0,0 +1,237 @@
+# ml_models/profiling.py
+#
+# Stage-level profiling for the training scripts. Set LOAN_PROFILE_DIR and run model.py,
+# retrain-model.py or train.py as usual; each run then writes <dir>/<script>-<timestamp>.json
+# with wall time, CPU time and resident memory per stage, plus a .folded file of the same
+# stages for flamegraph.pl / speedscope. LOAN_PROFILE_CPROFILE=1 adds a cProfile dump (.prof,
+# for snakeviz, flameprof or pstats).
+#
+# Stages nest: `with stage('load'):` inside `with stage('data'):` is reported as 'data/load',
+# and re-entering a stage (once per CSV chunk, say) adds to the same entry. fit_profiled(model)
+# fits a Pipeline one step at a time, each step a stage named after it; nested pipelines are
+# split the same way, other estimators (a ColumnTransformer and its transformers) are one stage.
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from ml_models.memory import current_rss_mb, peak_rss_mb
+
+# Directory for per-run reports; empty turns profiling off
+PROFILE_DIR = os.environ.get('LOAN_PROFILE_DIR', '')
+PROFILE_CPROFILE = os.environ.get('LOAN_PROFILE_CPROFILE', '0') == '1'
+
+# Seconds between resident memory samples taken while a stage runs
+SAMPLE_INTERVAL = float(os.environ.get('LOAN_PROFILE_SAMPLE_INTERVAL', '0.01'))
+
+# The profiler of the running script, used by stage(); None means profiling is off
+_active: Optional['StageProfiler'] = None
+
+
+class _Open:
+    """A stage that has been entered and not yet left."""
+    __slots__ = ('record', 'wall', 'cpu')
+
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+
+class StageProfiler:
+    """Collects per-stage timings and memory for one run; see the module comment."""
+
+    def __init__(self, run: str, out_dir: Optional[str] = None, cprofile: bool = False,
+                 sample_interval: float = SAMPLE_INTERVAL):
+        self.run = run
+        self.out_dir = out_dir
+        self.cprofile = cprofile
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[_Open] = []
+        self._thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_at: Optional[str] = None
+        self._wall = self._cpu = 0.0
+
+    @classmethod
+    def from_env(cls, run: str) -> Optional['StageProfiler']:
+        """A profiler configured by LOAN_PROFILE_*, or None when LOAN_PROFILE_DIR is not set."""
+        if not PROFILE_DIR:
+            return None
+        return cls(run, PROFILE_DIR, PROFILE_CPROFILE)
+
+    def start(self) -> 'StageProfiler':
+        global _active
+        _active = self
+        self._thread = threading.get_ident()
+        self._started_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name='stage-profiler', daemon=True)
+        self._sampler.start()
+        if self.cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def stop(self) -> None:
+        global _active
+        if self._profile is not None:
+            self._profile.disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._wall = time.perf_counter() - self._wall
+        self._cpu = time.process_time() - self._cpu
+        if _active is self:
+            _active = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self._note_rss(current_rss_mb())
+
+    def _note_rss(self, rss: Optional[float]) -> None:
+        if rss is None:
+            return
+        for frame in list(self._stack):
+            record = frame.record
+            if record['rss_peak_mb'] is None or rss > record['rss_peak_mb']:
+                record['rss_peak_mb'] = rss
+
+    @contextmanager
+    def stage(self, name: str):
+        if threading.get_ident() != self._thread:
+            # Worker threads (a forest's joblib threads, say) are counted in their caller's stage
+            yield
+            return
+        path = '/'.join([f.record['path'] for f in self._stack[-1:]] + [name])
+        record = self.stages.get(path)
+        rss = current_rss_mb()
+        if record is None:
+            record = self.stages[path] = {
+                'path': path, 'depth': len(self._stack), 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                'rss_start_mb': rss, 'rss_peak_mb': rss, 'rss_end_mb': None,
+            }
+        frame = _Open(record)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            record['calls'] += 1
+            record['wall_s'] += time.perf_counter() - frame.wall
+            record['cpu_s'] += time.process_time() - frame.cpu
+            record['rss_end_mb'] = current_rss_mb()
+            self._note_rss(record['rss_end_mb'])
+            if record['rss_end_mb'] is not None and (record['rss_peak_mb'] or 0) < record['rss_end_mb']:
+                record['rss_peak_mb'] = record['rss_end_mb']
+
+    def report(self) -> Dict[str, Any]:
+        stages = []
+        for record in self.stages.values():
+            children = [r for r in self.stages.values()
+                        if r['depth'] == record['depth'] + 1 and r['path'].startswith(record['path'] + '/')]
+            stages.append({
+                **record,
+                'wall_s': round(record['wall_s'], 4),
+                'cpu_s': round(record['cpu_s'], 4),
+                'self_wall_s': round(record['wall_s'] - sum(c['wall_s'] for c in children), 4),
+                'rss_start_mb': _round(record['rss_start_mb']),
+                'rss_peak_mb': _round(record['rss_peak_mb']),
+                'rss_end_mb': _round(record['rss_end_mb']),
+                'rss_growth_mb': _round(record['rss_peak_mb'] - record['rss_start_mb'])
+                if record['rss_peak_mb'] is not None and record['rss_start_mb'] is not None else None,
+            })
+        return {
+            'run': self.run,
+            'started_at': self._started_at,
+            'argv': sys.argv,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sample_interval_s': self.sample_interval,
+            'total': {'wall_s': round(self._wall, 4), 'cpu_s': round(self._cpu, 4), 'peak_rss_mb': _round(peak_rss_mb())},
+            'stages': stages,
+        }
+
+    def folded(self) -> List[str]:
+        """Stages in collapsed-stack form ('a;b;c <microseconds>'), self time only, as flamegraph.pl reads it."""
+        report = self.report()
+        return [f"{s['path'].replace('/', ';')} {int(max(s['self_wall_s'], 0) * 1e6)}" for s in report['stages']]
+
+    def write(self) -> Dict[str, str]:
+        """Write the report (and the folded stacks / cProfile dump) to out_dir; returns the paths."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.run}-{time.strftime('%Y%m%d-%H%M%S')}")
+        paths = {'report': base + '.json', 'folded': base + '.folded'}
+        if self._profile is not None:
+            paths['cprofile'] = base + '.prof'
+            self._profile.dump_stats(paths['cprofile'])
+        report = dict(self.report(), files=paths)
+        with open(paths['report'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        with open(paths['folded'], 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.folded()) + '\n')
+        return paths
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(float(value), 1) if value is not None else None
+
+
+def stage(name: str):
+    """Context manager timing a stage of the running profiler; does nothing when profiling is off."""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def profiled(iterable: Iterable, name: str) -> Iterator:
+    """Yield from iterable, counting the time spent producing each item (a CSV chunk, say) as stage `name`."""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _fit(estimator, X, y, transform: bool):
+    steps = getattr(estimator, 'steps', None)
+    if _active is None or not steps or getattr(estimator, 'memory', None) is not None:
+        # A caching Pipeline fits clones of its steps, so it is fitted (and timed) as a whole
+        if not transform:
+            return estimator.fit(X, y)
+        return estimator.fit_transform(X, y) if hasattr(estimator, 'fit_transform') else estimator.fit(X, y).transform(X)
+    # What Pipeline.fit does without caching: each step fitted in place on the previous one's output
+    for i, (name, step) in enumerate(steps):
+        if step is None or step == 'passthrough':
+            continue
+        with _active.stage(name):
+            if i == len(steps) - 1 and not transform:
+                step.fit(X, y)
+            else:
+                X = _fit(step, X, y, True)
+    return estimator if not transform else X
+
+
+def fit_profiled(estimator, X, y=None, name: Optional[str] = None):
+    """estimator.fit(X, y), with each Pipeline step a stage under `name` while profiling is on."""
+    with stage(name or type(estimator).__name__):
+        _fit(estimator, X, y, False)
+    return estimator
+
+
+def fit_transform_profiled(estimator, X, y=None, name: Optional[str] = None):
+    """estimator.fit_transform(X, y), profiled like fit_profiled()."""
+    with stage(name or type(estimator).__name__):
+        return _fit(estimator, X, y, True)
@@ -0,0 +1,80 @@
+# ml_models/reload.py
+#
+# Triggers for LoanPredictor.reload(): a polling watcher on the published model file and an
+# optional POSIX signal. Both do the load in a background thread, so requests keep being served
+# by the old model until the new one has passed its sanity check and been swapped in.
+
+import os
+import signal
+import threading
+from typing import Optional, Tuple
+
+
+class ModelWatcher:
+    """Polls the model file's (mtime, size) every `interval` seconds and reloads when it changes."""
+
+    def __init__(self, predictor, interval: float = 10.0):
+        self.predictor = predictor
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_seen = self._signature()
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.predictor.model_source_path())
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def start(self) -> 'ModelWatcher':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='loan-model-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check; returns True if a new model went live."""
+        signature = self._signature()
+        if signature is None or signature == self._last_seen:
+            return False
+        try:
+            # reload() compares content hashes, so a touched-but-identical file is a no-op
+            reloaded = self.predictor.reload()
+        except Exception as e:
+            # Keep serving the old model; try again when the file changes next
+            print(f"Model reload failed, still serving the previous model: {e}")
+            reloaded = False
+        self._last_seen = signature
+        return reloaded
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+def install_reload_signal(predictor, signame: str = 'SIGUSR2') -> bool:
+    """
+    Reload the model in a background thread when the process receives `signame`.
+    Returns False where that is not possible (Windows, or not called from the main thread).
+    """
+    signum = getattr(signal, signame, None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def _handler(_signum, _frame):
+        threading.Thread(target=_reload_quietly, args=(predictor,), name='loan-model-reload', daemon=True).start()
+
+    signal.signal(signum, _handler)
+    return True
+
+
+def _reload_quietly(predictor) -> None:
+    try:
+        predictor.reload()
+    except Exception as e:
+        print(f"Model reload failed, still serving the previous model: {e}")
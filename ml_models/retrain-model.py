@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
+import sys
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
@@ -10,58 +11,35 @@ from sklearn.impute import SimpleImputer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, roc_auc_score
 
-# Load data
-try:
-    df = pd.read_csv('data4.csv', encoding='latin1')
-except FileNotFoundError:
-    print("Error: 'data4.csv' not found in D:\\Python projects\\RiskAnalysis")
-    exit(1)
+# Runnable both as `python ml_models/retrain-model.py` and from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ml_models.dataset import load_features
+from ml_models.memory import peak_rss_mb
+from ml_models.profiling import StageProfiler, fit_profiled, stage
 
-# Data Cleaning
-df = df.drop(['Unnamed: 0', 'id', 'member_id', 'next_pymnt_d'], axis=1, errors='ignore')
-df['term'] = df['term'].str.extract('(\d+)').astype(float)
-df['emp_length'] = df['emp_length'].str.extract('(\d+)').astype(float)
-df['emp_length'] = df['emp_length'].fillna(10)
+# Per-stage wall/CPU time and memory, written as a JSON report when LOAN_PROFILE_DIR is set
+profiler = StageProfiler.from_env('retrain-model')
+if profiler:
+    profiler.start()
 
-if df['int_rate'].dtype == 'object':
-    df['int_rate'] = df['int_rate'].str.replace('%', '').astype(float)
-else:
-    if df['int_rate'].max() < 1:
-        df['int_rate'] = df['int_rate'] * 100
-
-date_cols = ['last_pymnt_d', 'last_credit_pull_d']
-for col in date_cols:
-    if col in df.columns:
-        try:
-            df[col] = pd.to_datetime(df[col], format='%b-%y', errors='coerce')
-            df[f'{col}_year'] = df[col].dt.year
-            df[f'{col}_month'] = df[col].dt.month
-        except:
-            df = df.drop(col, axis=1)
-
-df = df.dropna(subset=['repay_fail'])
-
-# Feature Engineering
-if all(col in df.columns for col in ['total_pymnt', 'funded_amnt']):
-    df['payment_ratio'] = df['total_pymnt'] / df['funded_amnt']
-    df['payment_ratio'] = df['payment_ratio'].replace([np.inf, -np.inf], np.nan)
-
-if 'issue_d' in df.columns:
+# Load, clean and feature-engineer the data chunk by chunk, or reuse the cached result (see dataset.py)
+with stage('load'):
     try:
-        df['issue_d'] = pd.to_datetime(df['issue_d'], format='%b-%y')
-        df['loan_age'] = (pd.to_datetime('today') - df['issue_d']).dt.days
-    except:
-        pass
+        X, y, load_stats = load_features('data4.csv')
+    except FileNotFoundError:
+        print("Error: 'data4.csv' not found in D:\\Python projects\\RiskAnalysis")
+        exit(1)
+print(f"Loaded {load_stats['rows']} rows in {load_stats['seconds']}s (feature cache: {load_stats['cache']}) "
+      f"(frame: {load_stats['frame_mb']} MB, peak memory: {load_stats['peak_rss_mb']} MB)")
 
 # Model Preparation
-X = df.drop('repay_fail', axis=1)
-y = df['repay_fail']
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.3, random_state=42, stratify=y
-)
+with stage('split'):
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.3, random_state=42, stratify=y
+    )
 
-numeric_features = X.select_dtypes(include=['float64', 'int64']).columns.tolist()
-categorical_features = X.select_dtypes(include=['object']).columns.tolist()
+numeric_features = X.select_dtypes(include='number').columns.tolist()
+categorical_features = X.select_dtypes(include=['object', 'category']).columns.tolist()
 
 numeric_transformer = Pipeline(steps=[
     ('imputer', SimpleImputer(strategy='median')),
@@ -90,11 +68,14 @@ model = Pipeline(steps=[
     ))
 ])
 
-model.fit(X_train, y_train)
+# Each pipeline step (preprocessor, classifier) is its own stage under 'fit'
+with stage('fit'):
+    fit_profiled(model, X_train, y_train, 'pipeline')
 
 # Evaluation
-y_pred = model.predict(X_test)
-y_proba = model.predict_proba(X_test)[:, 1]
+with stage('evaluate'):
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1]
 print("Confusion Matrix:")
 print(confusion_matrix(y_test, y_pred))
 print("\nClassification Report:")
@@ -104,6 +85,14 @@ print("ROC AUC:", roc_auc_score(y_test, y_proba))
 
 # Save model
 model_path = os.path.join(os.path.dirname(__file__), 'model.pkl')
-with open(model_path, 'wb') as f:
+# Write next to the target and rename, so running servers never load a half-written file
+tmp_path = model_path + '.tmp'
+with stage('save'), open(tmp_path, 'wb') as f:
     pickle.dump(model, f, protocol=4)
-print(f"\nModel saved successfully at: {model_path}")
\ No newline at end of file
+os.replace(tmp_path, model_path)
+print(f"\nModel saved successfully at: {model_path}")
+print(f"Peak memory: {peak_rss_mb()} MB")
+
+if profiler:
+    profiler.stop()
+    print(f"Profile written to {profiler.write()['report']}")
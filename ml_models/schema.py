@@ -0,0 +1,252 @@
+# ml_models/schema.py
+
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+# Form field -> model column it feeds. Either name is accepted; the model column wins if both are sent.
+FIELD_ALIASES = {
+    'loan_amount': 'loan_amnt',
+    'emi': 'installment',
+}
+
+MONTHS_PER_YEAR = 12
+
+# Model column -> (source fields, formula), filled in when the caller does not send the column.
+# Sources are model columns or form fields; entries are derived in this order, so one can feed the next.
+DERIVED_FEATURES = {
+    # The form asks for monthly income; the model was trained on annual income
+    'annual_inc': (('income',), lambda income: income * MONTHS_PER_YEAR),
+    # Monthly debt payment over monthly income, in percent
+    'dti': (('installment', 'annual_inc'), lambda emi, annual_income: emi / (annual_income / MONTHS_PER_YEAR) * 100),
+}
+
+# Form field -> the model column derived from it alone (a required 'income' is met by 'annual_inc')
+DERIVED_FROM_FIELD = {sources[0]: column for column, (sources, _) in DERIVED_FEATURES.items() if len(sources) == 1}
+
+
+def _to_float(name: str, value) -> float:
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Feature {name!r} must be numeric, got {value!r}")
+
+
+def _to_category(value):
+    # NaN (not None) is what the fitted SimpleImputer recognises as missing in object columns
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return math.nan
+    return str(value)
+
+
+class FeatureSchema:
+    """
+    Input contract of the fitted pipeline: which columns it reads, in what order and with what
+    dtype, which names are accepted for them, and what fills a column the caller left out
+    (NaN, which the pipeline's own imputers replace, or a derived value).
+
+    fill() writes input dicts straight into preallocated numeric (float64) and categorical
+    (object) buffers, so no per-request DataFrame has to be built or have its dtypes inferred.
+    """
+
+    def __init__(self, num_columns: Sequence[str], cat_columns: Sequence[str],
+                 input_columns: Optional[Sequence[str]] = None, required: Sequence[str] = ()):
+        self.num_columns: List[str] = list(num_columns)
+        self.cat_columns: List[str] = list(cat_columns)
+        # Every column the pipeline was fitted on, including ones its ColumnTransformer drops
+        self.input_columns: List[str] = list(input_columns or self.num_columns + self.cat_columns)
+        self.required: List[str] = list(required)
+
+        reverse = {column: field for field, column in FIELD_ALIASES.items()}
+        # Names a model column can be read from, in order of preference
+        self._sources: Dict[str, Tuple[str, ...]] = {
+            c: (c, reverse[c]) if c in reverse else (c,) for c in self.num_columns + self.cat_columns
+        }
+        self._num_index = {c: j for j, c in enumerate(self.num_columns)}
+        self._cat_index = {c: j for j, c in enumerate(self.cat_columns)}
+        self._plan = [
+            (c, self._sources[c], self._num_index[c] if c in self._num_index else self._cat_index[c], c in self._num_index)
+            for c in self._sources
+        ]
+        # Derived columns (in DERIVED_FEATURES order) and the form fields they read that are not model columns
+        self._derived = [c for c in DERIVED_FEATURES if self._can_derive(c)]
+        self._raw_sources = list(dict.fromkeys(
+            s for c in self._derived for s in DERIVED_FEATURES[c][0] if s not in self._num_index
+        ))
+        self.accepted = set(self.input_columns) | set(FIELD_ALIASES) | set(DERIVED_FROM_FIELD) | set(self.required)
+
+    @classmethod
+    def from_pipeline(cls, model, required: Sequence[str] = ()) -> 'FeatureSchema':
+        """Read the columns off a fitted Pipeline(ColumnTransformer -> classifier)."""
+        try:
+            preprocessor = model.named_steps['preprocessor']
+        except (AttributeError, KeyError) as e:
+            raise ValueError(f"Unsupported pipeline layout, cannot build feature schema: {e}")
+        transformers = {name: list(cols) for name, _, cols in preprocessor.transformers_ if name != 'remainder'}
+        input_columns = getattr(model, 'feature_names_in_', None)
+        return cls(transformers.get('num', []), transformers.get('cat', []),
+                   list(input_columns) if input_columns is not None else None, required)
+
+    @classmethod
+    def from_compiled(cls, compiled, required: Sequence[str] = ()) -> 'FeatureSchema':
+        return cls(compiled.num_columns, compiled.cat_columns, compiled.meta.get('input_columns'), required)
+
+    def _has(self, record, field: str) -> bool:
+        return field in record or FIELD_ALIASES.get(field) in record or DERIVED_FROM_FIELD.get(field) in record
+
+    def errors(self, fields) -> List[str]:
+        """Problems with a record's (or frame's) field names; empty when it is acceptable."""
+        problems = []
+        unknown = [f for f in fields if f not in self.accepted]
+        if unknown:
+            problems.append(f"Unknown features: {unknown}")
+        missing = [f for f in self.required if not self._has(fields, f)]
+        if missing:
+            problems.append(f"Missing features: {missing}")
+        return problems
+
+    def validate(self, record: Dict[str, Any]) -> None:
+        problems = self.errors(record)
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    def validate_batch(self, records: Sequence[Dict[str, Any]]) -> None:
+        bad_rows = {}
+        for i, record in enumerate(records):
+            problems = self.errors(record)
+            if problems:
+                bad_rows[i] = "; ".join(problems)
+        if bad_rows:
+            raise ValueError(f"Invalid features by row: {bad_rows}")
+
+    def _buffers(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        num = np.full((n, len(self.num_columns)), np.nan, dtype=np.float64)
+        cat = np.full((n, len(self.cat_columns)), np.nan, dtype=object)
+        return num, cat
+
+    def fill(self, records: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Numeric and categorical buffers for already-validated input dicts."""
+        num, cat = self._buffers(len(records))
+        if len(records) == 1:
+            self._fill_row(records[0], num[0], cat[0])
+            return num, cat
+        supplied = {}
+        for column, sources in self._sources.items():
+            keys = [next((s for s in sources if s in r), None) for r in records]
+            if column in DERIVED_FEATURES:
+                supplied[column] = np.array([k is not None for k in keys], dtype=bool)
+            if column in self._num_index:
+                num[:, self._num_index[column]] = [
+                    math.nan if k is None else _to_float(k, r[k]) for k, r in zip(keys, records)
+                ]
+            else:
+                cat[:, self._cat_index[column]] = [
+                    math.nan if k is None else _to_category(r[k]) for k, r in zip(keys, records)
+                ]
+        raw = {f: np.array([_to_float(f, r.get(f)) for r in records], dtype=np.float64) for f in self._raw_sources}
+        self._derive(num, supplied, raw)
+        return num, cat
+
+    def _fill_row(self, record: Dict[str, Any], num_row: np.ndarray, cat_row: np.ndarray) -> None:
+        # Single-request path: plain Python values, copied into the row buffers in one go each
+        num_values = [math.nan] * len(self.num_columns)
+        cat_values = [math.nan] * len(self.cat_columns)
+        absent = []
+        for column, sources, j, numeric in self._plan:
+            for key in sources:
+                if key in record:
+                    if numeric:
+                        num_values[j] = _to_float(key, record[key])
+                    else:
+                        cat_values[j] = _to_category(record[key])
+                    break
+            else:
+                absent.append(column)
+        for column in self._derived:
+            if column in absent:
+                sources, formula = DERIVED_FEATURES[column]
+                args = [num_values[self._num_index[s]] if s in self._num_index else _to_float(s, record.get(s))
+                        for s in sources]
+                try:
+                    value = formula(*args)
+                except ZeroDivisionError:
+                    value = math.nan
+                num_values[self._num_index[column]] = value if math.isfinite(value) else math.nan
+        num_row[:] = num_values
+        cat_row[:] = cat_values
+
+    def canonical(self, record: Dict[str, Any]) -> Tuple:
+        """
+        What the model receives from a validated record, as a hashable tuple (e.g. a cache key):
+        the filled numeric and categorical values, with aliases resolved, derived columns computed
+        and missing values as None. Fields the model does not read are left out.
+        """
+        num, cat = self._buffers(1)
+        self._fill_row(record, num[0], cat[0])
+        values = list(num[0].tolist()) + list(cat[0])
+        return tuple(None if isinstance(v, float) and math.isnan(v) else v for v in values)
+
+    def _can_derive(self, column: str) -> bool:
+        # Sources this model reads must be numeric; any other source is a form field read as a number
+        return column in self._num_index and not any(s in self._cat_index for s in DERIVED_FEATURES[column][0])
+
+    def fill_frame(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Column-at-a-time fill() for a DataFrame; raises ValueError for unknown/missing columns."""
+        problems = self.errors(list(df.columns))
+        if problems:
+            raise ValueError("; ".join(problems))
+        num, cat = self._buffers(len(df))
+        supplied = {}
+        for column, sources in self._sources.items():
+            key = next((s for s in sources if s in df.columns), None)
+            if column in DERIVED_FEATURES:
+                supplied[column] = np.full(len(df), key is not None)
+            if key is None:
+                continue
+            if column in self._num_index:
+                try:
+                    values = pd.to_numeric(df[key]).to_numpy(dtype=np.float64)
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Feature {key!r} must be numeric: {e}")
+                num[:, self._num_index[column]] = values
+            else:
+                values = df[key].astype(object)
+                cat[:, self._cat_index[column]] = np.where(values.isna(), np.nan, values.astype(str))
+        raw = {}
+        for field in self._raw_sources:
+            try:
+                raw[field] = (pd.to_numeric(df[field]).to_numpy(dtype=np.float64) if field in df.columns
+                              else np.full(len(df), np.nan))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Feature {field!r} must be numeric: {e}")
+        self._derive(num, supplied, raw)
+        return num, cat
+
+    def _derive(self, num: np.ndarray, supplied: Dict[str, np.ndarray], raw: Dict[str, np.ndarray]) -> None:
+        """Fill derived columns the caller did not send; `raw` holds the form fields they read."""
+        for column in self._derived:
+            sources, formula = DERIVED_FEATURES[column]
+            todo = ~supplied.get(column, np.zeros(num.shape[0], dtype=bool))
+            if not todo.any():
+                continue
+            args = [num[todo, self._num_index[s]] if s in self._num_index else raw[s][todo] for s in sources]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = formula(*args)
+            # Zero income and the like: leave it to the imputer rather than feed inf to the model
+            num[todo, self._num_index[column]] = np.where(np.isfinite(values), values, np.nan)
+
+    def to_frame(self, num: np.ndarray, cat: np.ndarray) -> pd.DataFrame:
+        """The buffers as the DataFrame the sklearn pipeline expects (all fitted columns, in order)."""
+        n = num.shape[0]
+        data = {}
+        for column in self.input_columns:
+            if column in self._num_index:
+                data[column] = num[:, self._num_index[column]]
+            elif column in self._cat_index:
+                data[column] = cat[:, self._cat_index[column]]
+            else:
+                data[column] = np.full(n, np.nan)
+        return pd.DataFrame(data, columns=self.input_columns)
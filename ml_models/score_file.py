@@ -0,0 +1,231 @@
+# ml_models/score_file.py
+#
+# Offline scoring of a whole portfolio file (data4.csv layout) with the model the web app serves:
+#
+#     python -m ml_models.score_file portfolio.csv scores.csv [--workers 4] [--chunk-rows 50000]
+#
+# The main process parses the CSV chunk by chunk; worker processes, each holding the model
+# loaded once, clean and score the chunks. Results are appended to the output in input order
+# as soon as each chunk is done, and a checkpoint next to the output records how far the
+# output is complete. Re-running the same command after a crash continues from there.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
+
+from ml_models.dataset import CHUNK_ROWS, DROP_COLUMNS, DTYPES, clean_chunk
+from ml_models.predictor import DEFAULT_CLASS, LoanPredictor
+from ml_models.schema import FeatureSchema
+
+# Input column copied to the output so scores can be joined back (when present)
+ID_COLUMN = 'id'
+
+OUTPUT_COLUMNS = ['row', ID_COLUMN, 'probability', 'prediction', 'status']
+
+# Chunks handed to the pool ahead of the one being written, per worker
+CHUNKS_AHEAD = 2
+
+# Scorer owned by each worker process (or by the main process with --workers 0)
+_scorer = None
+
+
+class ChunkScorer:
+    """Cleans raw data4.csv chunks and scores them with one loaded model."""
+
+    def __init__(self, compiled: Optional[bool], model_path: Optional[str]):
+        self.predictor = LoanPredictor(compiled=compiled, model_path=model_path)
+        self.predictor.warmup()
+        loaded = self.predictor._current()
+        self.fingerprint = loaded.fingerprint
+        # Portfolio rows carry model columns, not the web form's fields, so nothing is "required"
+        self.schema = FeatureSchema(loaded.schema.num_columns, loaded.schema.cat_columns, loaded.schema.input_columns)
+
+    def score(self, raw: pd.DataFrame, first_row: int) -> pd.DataFrame:
+        ids = raw[ID_COLUMN].to_numpy() if ID_COLUMN in raw.columns else np.full(len(raw), np.nan)
+        df, percent = clean_chunk(raw.drop(columns=[ID_COLUMN], errors='ignore'), pd.Timestamp('today'),
+                                  drop_unlabelled=False)
+        # Same fraction-to-percentage fix as load_training_data, decided per chunk here
+        if 'int_rate' in df.columns and not percent and df['int_rate'].max() < 1:
+            df['int_rate'] = df['int_rate'] * 100
+
+        loaded = self.predictor._current()
+        num, cat = self.schema.fill_frame(df[[c for c in df.columns if c in self.schema.accepted]])
+        probs = self.predictor._predict_proba(loaded, num, cat)
+        preds = loaded.model.classes_[probs.argmax(axis=1)]
+        return pd.DataFrame({
+            'row': np.arange(first_row, first_row + len(df)),
+            ID_COLUMN: ids,
+            'probability': probs[:, 1].round(4),
+            'prediction': preds.astype(int),
+            'status': np.where(preds == DEFAULT_CLASS, 'rejected', 'approved'),
+        }, columns=OUTPUT_COLUMNS)
+
+
+def _init_worker(compiled: Optional[bool], model_path: Optional[str]) -> None:
+    global _scorer
+    _scorer = ChunkScorer(compiled, model_path)
+
+
+def _score_chunk(args):
+    raw, first_row = args
+    return _scorer.score(raw, first_row), _scorer.fingerprint
+
+
+def checkpoint_path(output: str) -> str:
+    return output + '.checkpoint.json'
+
+
+def _input_signature(path: str, chunk_rows: int) -> Dict[str, Any]:
+    info = os.stat(path)
+    return {"input": os.path.abspath(path), "size": info.st_size, "mtime": info.st_mtime, "chunk_rows": chunk_rows}
+
+
+def _read_checkpoint(output: str, signature: Dict[str, Any], fingerprint: str) -> Dict[str, Any]:
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return {**signature, "model": fingerprint, "rows_done": 0, "output_bytes": 0, "finished": False}
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    if any(state.get(k) != v for k, v in signature.items()):
+        raise RuntimeError(f"{path} belongs to a different input file or chunk size; use --restart to start over")
+    if state.get("model") != fingerprint:
+        raise RuntimeError(f"{output} was started with model {str(state.get('model'))[:12]}, "
+                           f"now serving {fingerprint[:12]}; use --restart to rescore everything")
+    return state
+
+
+def _write_checkpoint(output: str, state: Dict[str, Any]) -> None:
+    path = checkpoint_path(output)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _count_rows(path: str) -> int:
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            lines += block.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def score_file(input_path: str, output_path: str, workers: Optional[int] = None, chunk_rows: int = CHUNK_ROWS,
+               compiled: Optional[bool] = None, model_path: Optional[str] = None, restart: bool = False,
+               encoding: str = 'latin1') -> Dict[str, Any]:
+    """
+    Score every row of input_path into output_path (row, id, probability, prediction, status).
+    Resumes from the checkpoint of an interrupted run unless restart is set. Returns the final checkpoint.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    fingerprint = LoanPredictor(compiled=compiled, model_path=model_path).model_fingerprint
+    if restart and os.path.exists(checkpoint_path(output_path)):
+        os.remove(checkpoint_path(output_path))
+    state = _read_checkpoint(output_path, _input_signature(input_path, chunk_rows), fingerprint)
+    if state["finished"]:
+        print(f"{output_path} is already complete ({state['rows_done']} rows)")
+        return state
+
+    total = _count_rows(input_path)
+    started, resumed_at = time.perf_counter(), state["rows_done"]
+    if resumed_at:
+        print(f"Resuming at row {resumed_at} of {total}")
+
+    # Whatever was appended after the last checkpoint is written again
+    with open(output_path, 'a+b') as out:
+        out.truncate(state["output_bytes"])
+
+    reader = pd.read_csv(
+        input_path, encoding=encoding, chunksize=chunk_rows, dtype=DTYPES,
+        usecols=lambda c: c not in DROP_COLUMNS or c == ID_COLUMN,
+        # Rows already scored are skipped by the tokenizer, not parsed
+        skiprows=range(1, resumed_at + 1) if resumed_at else None,
+    )
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(compiled, model_path))
+    else:
+        executor = None
+        _init_worker(compiled, model_path)
+
+    def submit(raw, first_row):
+        if executor is None:
+            return _score_chunk((raw, first_row))
+        return executor.submit(_score_chunk, (raw, first_row))
+
+    pending = []
+    next_row = resumed_at
+    try:
+        with reader, open(output_path, 'a', encoding='utf-8', newline='') as out:
+            chunks = iter(reader)
+            exhausted = False
+            while True:
+                # Keep the pool busy while the oldest chunk is written out
+                while not exhausted and len(pending) < max(workers, 1) * CHUNKS_AHEAD:
+                    raw = next(chunks, None)
+                    if raw is None:
+                        exhausted = True
+                        break
+                    pending.append((submit(raw, next_row), len(raw)))
+                    next_row += len(raw)
+                if not pending:
+                    break
+
+                job, n_rows = pending.pop(0)
+                result, worker_model = job if executor is None else job.result()
+                if worker_model != fingerprint:
+                    raise RuntimeError(f"Model changed during scoring ({fingerprint[:12]} -> {worker_model[:12]}); "
+                                       f"re-run with --restart")
+                result.to_csv(out, header=out.tell() == 0, index=False)
+                out.flush()
+                os.fsync(out.fileno())
+
+                state["rows_done"] += n_rows
+                state["output_bytes"] = out.tell()
+                _write_checkpoint(output_path, state)
+                _print_progress(state["rows_done"], total, resumed_at, started)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    state["finished"] = True
+    state["seconds"] = round(time.perf_counter() - started, 2)
+    _write_checkpoint(output_path, state)
+    return state
+
+
+def _print_progress(done: int, total: int, resumed_at: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rate = (done - resumed_at) / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else float('nan')
+    percent = 100.0 * done / total if total else 100.0
+    print(f"{done}/{total} rows ({percent:5.1f}%), {rate:,.0f} rows/s, ETA {eta:,.0f}s", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score a portfolio CSV (data4.csv layout) with the served loan model.")
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="scoring processes (default: all cores; 0 scores in this process)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--mode', choices=['sklearn', 'compiled'], default=None,
+                        help="inference mode (default: LOAN_INFERENCE_MODE)")
+    parser.add_argument('--model', default=None, help="model.pkl or artifact directory (default: the served model)")
+    parser.add_argument('--restart', action='store_true', help="ignore any checkpoint and score from the first row")
+    args = parser.parse_args()
+
+    try:
+        result = score_file(args.input, args.output, args.workers, args.chunk_rows,
+                            None if args.mode is None else args.mode == 'compiled', args.model, args.restart)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Scored {result['rows_done']} rows into {args.output}")
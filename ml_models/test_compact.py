@@ -0,0 +1,134 @@
+# ml_models/test_compact.py
+#
+# Forest compaction: the narrow dtypes must not change a split, the compacted forest must score
+# like the one it came from, and the guardrail must refuse a forest that lost too much AUC.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from ml_models import artifact, compact
+from ml_models.compiled import CompiledPipeline
+from ml_models.test_compiled import MODEL_PATH, sample_frame
+
+# Rounding a leaf to uint16 moves its probability by at most half a step, and so does the mean
+QUANTIZE_TOLERANCE = 0.5 / compact.LEAF_LEVELS + 1e-12
+
+
+class CompactForestTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MODEL_PATH, 'rb') as f:
+            cls.model = pickle.load(f)
+        cls.compiled = CompiledPipeline.from_pipeline(cls.model)
+        cls.df = sample_frame(cls.model, cls.compiled)
+        cls.expected = cls.compiled.predict_proba(cls.df)
+        cls.all_trees = list(range(len(cls.compiled.roots)))
+
+    def test_all_trees_unquantized_score_identically(self):
+        compacted = compact.compact_forest(self.compiled, self.all_trees, quantize=False)
+        self.assertLessEqual(float(np.abs(compacted.predict_proba(self.df) - self.expected).max()), 1e-12)
+        # One-hot columns no tree splits on are gone from the encoded block
+        self.assertLessEqual(compacted.n_features, self.compiled.n_features)
+
+    def test_quantized_forest_stays_within_rounding(self):
+        compacted = compact.compact_forest(self.compiled, self.all_trees)
+        self.assertEqual((compacted.threshold.dtype, compacted.leaf_value.dtype), (np.float32, np.uint16))
+        error = float(np.abs(compacted.predict_proba(self.df) - self.expected).max())
+        self.assertLessEqual(error, QUANTIZE_TOLERANCE)
+
+    def test_subset_keeps_each_tree_whole(self):
+        trees = [7, 2, 40]
+        compacted = compact.compact_forest(self.compiled, trees, quantize=False)
+        expected = compact.tree_scores(self.compiled, self.compiled.encode_frame(self.df))[:, sorted(trees)]
+        np.testing.assert_allclose(compact.tree_scores(compacted, compacted.encode_frame(self.df)), expected)
+        self.assertEqual(compacted.meta['compaction']['kept_trees'], sorted(trees))
+
+    def test_float32_floor_keeps_every_split(self):
+        rng = np.random.default_rng(0)
+        thresholds = rng.normal(0, 3, 5000)
+        floored = compact._float32_floor(thresholds)
+        # Float32 values right around each threshold, as the encoded feature block holds them
+        x = np.concatenate([thresholds.astype(np.float32), np.nextafter(thresholds.astype(np.float32), np.float32(np.inf)),
+                            np.nextafter(thresholds.astype(np.float32), np.float32(-np.inf))])
+        t = np.tile(thresholds, 3)
+        np.testing.assert_array_equal(x > np.tile(floored, 3), x > t)
+
+    def test_quantized_leaves_sum_to_one(self):
+        values = np.random.default_rng(0).dirichlet([1, 1], 1000)
+        q = compact._quantize_leaves(values)
+        self.assertTrue((q.astype(np.int64).sum(axis=1) == compact.LEAF_LEVELS).all())
+        self.assertLessEqual(float(np.abs(q / compact.LEAF_LEVELS - values).max()), QUANTIZE_TOLERANCE)
+
+
+class SelectTreesTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = rng.integers(0, 2, 500)
+        self.noise = rng.random((500, 4))
+
+    def test_stops_at_the_target(self):
+        # Tree 2 ranks the rows perfectly: it alone reaches any target
+        scores = self.noise.copy()
+        scores[:, 2] = self.y + 0.1 * scores[:, 2]
+        path = compact.select_trees(scores, self.y, [0, 1, 2, 3], target_auc=0.99)
+        self.assertEqual([step['tree'] for step in path], [2])
+        self.assertEqual(path[0]['auc'], 1.0)
+        self.assertEqual(len(compact.select_trees(scores, self.y, [0, 1, 2, 3], 0.0, min_trees=3)), 3)
+        self.assertEqual(len(compact.select_trees(scores, self.y, [0, 1, 3], 1.1, max_trees=2)), 2)
+
+    def test_duplicates_and_constant_trees_are_dropped(self):
+        scores = np.column_stack([self.noise[:, 0], self.noise[:, 0] * 2 + 1, np.full(500, 0.5), self.noise[:, 1]])
+        self.assertEqual(compact.drop_duplicates(scores, [0, 1, 2, 3]), [0, 3])
+
+
+class CompactGuardrailTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MODEL_PATH, 'rb') as f:
+            model = pickle.load(f)
+        compiled = CompiledPipeline.from_pipeline(model)
+        cls.X = sample_frame(model, compiled, n=2000)
+        # Labels the forest ranks well but not perfectly
+        rng = np.random.default_rng(1)
+        score = compiled.predict_proba(cls.X)[:, -1] + rng.normal(0, 0.1, len(cls.X))
+        cls.y = pd.Series((score > np.median(score)).astype(int))
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.out = os.path.join(self.tmp, 'model_artifact')
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        patcher = mock.patch('ml_models.compact.load_features', return_value=(self.X, self.y, {}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rejects_a_forest_that_lost_too_much_auc(self):
+        report = compact.compact(MODEL_PATH, 'data.csv', self.out, max_auc_drop=0.0, min_trees=1, max_trees=1)
+        self.assertGreater(report['original']['roc_auc'], report['compacted']['roc_auc'])
+        self.assertFalse(report['accepted'])
+        self.assertIsNone(report['published'])
+        self.assertFalse(os.path.exists(self.out))
+
+    def test_publishes_a_forest_within_the_tolerance(self):
+        # Every tree kept: only the narrower dtypes differ, which must stay within a tight tolerance
+        report = compact.compact(MODEL_PATH, 'data.csv', self.out, max_auc_drop=0.001, min_trees=1000)
+        self.assertTrue(report['accepted'])
+        self.assertLessEqual(-report['change']['roc_auc'], 0.001)
+        loaded = artifact.load_artifact(self.out)
+        kept = sorted(step['tree'] for step in report['selection']['path'])
+        self.assertEqual(loaded.meta['compaction']['kept_trees'], kept)
+        self.assertEqual(artifact.read_manifest(self.out)['source'], os.path.basename(MODEL_PATH))
+
+
+if __name__ == '__main__':
+    unittest.main()
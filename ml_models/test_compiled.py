@@ -0,0 +1,174 @@
+# ml_models/test_compiled.py
+#
+# CompiledPipeline must score exactly like the pickled sklearn pipeline it was exported from,
+# also after a round trip through a model artifact.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from ml_models import artifact
+from ml_models.compiled import CompiledPipeline
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'model.pkl')
+TOLERANCE = 1e-9
+
+
+def sample_frame(model, compiled: CompiledPipeline, n: int = 400, seed: int = 0) -> pd.DataFrame:
+    """Synthetic rows in the model's input columns: numbers around the training means, known
+    categories, plus NaN/None and categories the encoder never saw."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for j, column in enumerate(compiled.num_columns):
+        values = compiled.num_mean[j] + compiled.num_scale[j] * rng.standard_normal(n)
+        values[rng.random(n) < 0.1] = np.nan
+        data[column] = values
+    for j, column in enumerate(compiled.cat_columns):
+        categories = compiled.categories[j]
+        values = np.array([categories[i] for i in rng.integers(0, len(categories), n)], dtype=object)
+        values[rng.random(n) < 0.1] = None
+        values[rng.random(n) < 0.1] = np.nan
+        values[rng.random(n) < 0.05] = 'never-seen'
+        data[column] = values
+    columns = list(model.feature_names_in_)
+    return pd.DataFrame({c: data.get(c, np.full(n, np.nan)) for c in columns}, columns=columns)
+
+
+class CompiledParityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MODEL_PATH, 'rb') as f:
+            cls.model = pickle.load(f)
+        cls.compiled = CompiledPipeline.from_pipeline(cls.model)
+        cls.df = sample_frame(cls.model, cls.compiled)
+
+    def test_frame_matches_sklearn(self):
+        self.assertLessEqual(self.compiled.check_against(self.model, self.df, atol=TOLERANCE), TOLERANCE)
+        np.testing.assert_array_equal(self.compiled.predict(self.df), self.model.predict(self.compiled.normalize_frame(self.df)))
+
+    def test_none_is_missing_like_nan(self):
+        as_nan = self.df.copy()
+        for column in self.compiled.cat_columns:
+            as_nan[column] = as_nan[column].astype(object).where(as_nan[column].notna(), np.nan)
+        np.testing.assert_array_equal(self.compiled.encode_frame(self.df), self.compiled.encode_frame(as_nan))
+        self.assertLessEqual(float(np.abs(self.compiled.predict_proba(self.df) - self.model.predict_proba(as_nan)).max()),
+                             TOLERANCE)
+
+    def test_records_encode_like_frame(self):
+        records = self.compiled.normalize_frame(self.df.iloc[:50]).to_dict('records')
+        np.testing.assert_array_equal(self.compiled.encode_records(records), self.compiled.encode_frame(self.df.iloc[:50]))
+
+    def test_all_missing_row(self):
+        row = pd.DataFrame({c: [np.nan] for c in self.model.feature_names_in_})
+        self.assertLessEqual(self.compiled.max_abs_error(self.model, row), TOLERANCE)
+
+    def test_non_string_categories_encode_alike_on_every_path(self):
+        column = self.compiled.cat_columns[0]
+        df = self.df.iloc[:20].copy()
+        df[column] = [7, 7.5, None, 'never-seen', self.compiled.categories[0][0]] * 4
+        records = df.to_dict('records')
+        cat = np.array([[r[c] for c in self.compiled.cat_columns] for r in records], dtype=object)
+        num = df[self.compiled.num_columns].to_numpy(dtype=np.float64)
+        np.testing.assert_array_equal(self.compiled.encode_records(records), self.compiled.encode_frame(df))
+        np.testing.assert_array_equal(self.compiled.encode_arrays(num, cat), self.compiled.encode_frame(df))
+
+
+class CategoricalFillTest(unittest.TestCase):
+    """The missing-category value comes from the fitted imputer, not from a constant."""
+
+    def test_fill_value_is_read_from_the_pipeline(self):
+        rng = np.random.default_rng(0)
+        n = 300
+        X = pd.DataFrame({
+            'amount': rng.normal(10, 3, n),
+            'purpose': np.where(rng.random(n) < 0.3, np.nan, rng.choice(['car', 'house'], n).astype(object)),
+        })
+        # Missing purpose is the signal the forest learns
+        y = X['purpose'].isna().astype(int).to_numpy()
+        model = Pipeline(steps=[
+            ('preprocessor', ColumnTransformer(transformers=[
+                ('num', Pipeline(steps=[('imputer', SimpleImputer(strategy='median')), ('scaler', StandardScaler())]),
+                 ['amount']),
+                ('cat', Pipeline(steps=[('imputer', SimpleImputer(strategy='constant', fill_value='unknown')),
+                                        ('onehot', OneHotEncoder(handle_unknown='ignore'))]), ['purpose']),
+            ])),
+            ('classifier', RandomForestClassifier(n_estimators=5, random_state=0)),
+        ]).fit(X, y)
+        compiled = CompiledPipeline.from_pipeline(model)
+        self.assertEqual(compiled.cat_fill, ['unknown'])
+        self.assertLessEqual(compiled.check_against(model, X, atol=TOLERANCE), TOLERANCE)
+        records = compiled.normalize_frame(X).to_dict('records')
+        np.testing.assert_array_equal(compiled.predict_proba_records(records), compiled.predict_proba(X))
+
+
+class ArtifactTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MODEL_PATH, 'rb') as f:
+            cls.model = pickle.load(f)
+        cls.compiled = CompiledPipeline.from_pipeline(cls.model)
+        cls.df = sample_frame(cls.model, cls.compiled, n=100)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.out = os.path.join(self.tmp, 'model_artifact')
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_round_trip_scores_like_sklearn(self):
+        artifact.save_artifact(self.compiled, self.out, source=MODEL_PATH)
+        loaded = artifact.load_artifact(self.out)
+        self.assertLessEqual(loaded.max_abs_error(self.model, self.df), TOLERANCE)
+
+    def test_publish_switches_current_and_keeps_recent_versions(self):
+        manifests = [artifact.save_artifact(self.compiled, self.out) for _ in range(artifact.KEEP_PREVIOUS + 3)]
+        self.assertEqual(artifact.resolve_artifact(self.out), os.path.join(self.out, manifests[-1]["version"]))
+        self.assertEqual(artifact.read_manifest(self.out)["version"], manifests[-1]["version"])
+        self.assertEqual(artifact._versions(self.out), [m["version"] for m in manifests[-artifact.KEEP_PREVIOUS - 1:]])
+        self.assertEqual(artifact.source_file(self.out), os.path.join(self.out, artifact.POINTER_FILE))
+
+    def test_single_version_directory_is_read_then_replaced(self):
+        # The layout written before versions existed: manifest and arrays at the top
+        manifest = artifact.save_artifact(self.compiled, self.out)
+        version_dir = os.path.join(self.out, manifest["version"])
+        for name in os.listdir(version_dir):
+            shutil.move(os.path.join(version_dir, name), self.out)
+        os.rmdir(version_dir)
+        os.remove(os.path.join(self.out, artifact.POINTER_FILE))
+        self.assertLessEqual(artifact.load_artifact(self.out).max_abs_error(self.model, self.df), TOLERANCE)
+
+        artifact.save_artifact(self.compiled, self.out)
+        self.assertTrue(os.path.exists(os.path.join(self.out, artifact.MANIFEST_FILE)))
+        artifact.save_artifact(self.compiled, self.out)
+        self.assertFalse(os.path.exists(os.path.join(self.out, artifact.MANIFEST_FILE)))
+        self.assertLessEqual(artifact.load_artifact(self.out).max_abs_error(self.model, self.df), TOLERANCE)
+
+    def test_artifact_is_loadable_after_every_rename(self):
+        # A reader can arrive between any two steps of a publish; each rename is such a step
+        artifact.save_artifact(self.compiled, self.out)
+        real_replace, seen = os.replace, []
+
+        def replace(src, dst):
+            real_replace(src, dst)
+            seen.append(artifact.read_manifest(self.out)["version"])
+            artifact.load_artifact(self.out)
+
+        with mock.patch('os.replace', side_effect=replace):
+            manifest = artifact.save_artifact(self.compiled, self.out)
+        self.assertEqual(seen[-1], manifest["version"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+# ml_models/test_dataset.py
+#
+# The chunked loader must build the frame the original one-shot cleaning in model.py built, and
+# the feature cache must be rebuilt whenever the CSV or the cleaning code changes.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from ml_models import dataset
+
+
+def write_data4_csv(path: str, n: int = 300, seed: int = 0) -> None:
+    """A small CSV in the data4.csv layout, with the formats and gaps of the real file."""
+    rng = np.random.default_rng(seed)
+
+    def pick(values, missing=0.0):
+        out = np.array([values[i] for i in rng.integers(0, len(values), n)], dtype=object)
+        out[rng.random(n) < missing] = None
+        return out
+
+    months = [f"{m}-{y}" for y in ('09', '10', '11') for m in ('Jan', 'Mar', 'Jun', 'Sep', 'Dec')]
+    loan = rng.uniform(1000, 35000, n).round(0)
+    total_pymnt = loan * rng.uniform(0.2, 1.3, n)
+    pd.DataFrame({
+        'Unnamed: 0': np.arange(n),
+        'id': np.arange(1000, 1000 + n),
+        'member_id': np.arange(5000, 5000 + n),
+        'loan_amnt': loan,
+        'funded_amnt': np.where(rng.random(n) < 0.02, 0, loan),
+        'funded_amnt_inv': loan - rng.uniform(0, 500, n).round(2),
+        'term': pick([' 36 months', ' 60 months']),
+        'int_rate': [f"{r:.2f}%" for r in rng.uniform(5, 25, n)],
+        'installment': rng.uniform(50, 1200, n).round(2),
+        'grade': pick(list('ABCDEFG')),
+        'emp_length': pick(['< 1 year', '1 year', '5 years', '10+ years', 'n/a'], missing=0.05),
+        'home_ownership': pick(['RENT', 'OWN', 'MORTGAGE']),
+        'annual_inc': rng.uniform(12000, 200000, n).round(0),
+        'verification_status': pick(['Verified', 'Not Verified', 'Source Verified']),
+        'issue_d': pick(months),
+        'loan_status': pick(['Fully Paid', 'Charged Off']),
+        'purpose': pick(['credit_card', 'car', 'debt_consolidation', 'other']),
+        'zip_code': pick(['100xx', '606xx', '945xx']),
+        'addr_state': pick(['CA', 'NY', 'TX', 'IL']),
+        'dti': rng.uniform(0, 30, n).round(2),
+        'delinq_2yrs': rng.integers(0, 3, n),
+        'earliest_cr_line': pick(['May-01', 'Jan-95', 'Nov-04']),
+        'inq_last_6mths': rng.integers(0, 6, n),
+        'mths_since_last_delinq': np.where(rng.random(n) < 0.5, np.nan, rng.integers(0, 80, n)),
+        'open_acc': rng.integers(1, 30, n),
+        'pub_rec': rng.integers(0, 2, n),
+        'revol_bal': rng.integers(0, 60000, n),
+        'revol_util': pick(['12.5%', '45.1%', '88%'], missing=0.02),
+        'total_acc': rng.integers(2, 60, n),
+        'total_pymnt': total_pymnt.round(2),
+        'total_pymnt_inv': (total_pymnt * 0.98).round(2),
+        'total_rec_prncp': (total_pymnt * 0.8).round(2),
+        'total_rec_int': (total_pymnt * 0.2).round(2),
+        'last_pymnt_d': pick(months, missing=0.03),
+        'last_pymnt_amnt': rng.uniform(0, 1500, n).round(2),
+        'next_pymnt_d': pick(months, missing=0.5),
+        'last_credit_pull_d': pick(months),
+        'repay_fail': np.where(rng.random(n) < 0.05, np.nan, (rng.random(n) < 0.2).astype(float)),
+    }).to_csv(path, index=False)
+
+
+def reference_clean(path: str):
+    """The cleaning model.py did before the chunked loader: one read_csv of the whole file."""
+    df = pd.read_csv(path, encoding='latin1')
+    df = df.drop(['Unnamed: 0', 'id', 'member_id', 'next_pymnt_d'], axis=1, errors='ignore')
+    df['term'] = df['term'].str.extract(r'(\d+)').astype(float)
+    df['emp_length'] = df['emp_length'].str.extract(r'(\d+)').astype(float)
+    df['emp_length'] = df['emp_length'].fillna(10)
+    df['int_rate'] = df['int_rate'].str.replace('%', '').astype(float)
+    for col in ['last_pymnt_d', 'last_credit_pull_d']:
+        df[col] = pd.to_datetime(df[col], format='%b-%y', errors='coerce')
+        df[f'{col}_year'] = df[col].dt.year
+        df[f'{col}_month'] = df[col].dt.month
+    df = df.dropna(subset=['repay_fail'])
+    df['payment_ratio'] = df['total_pymnt'] / df['funded_amnt']
+    df['payment_ratio'] = df['payment_ratio'].replace([np.inf, -np.inf], np.nan)
+    df['issue_d'] = pd.to_datetime(df['issue_d'], format='%b-%y')
+    df['loan_age'] = (pd.to_datetime('today') - df['issue_d']).dt.days
+    return df.drop('repay_fail', axis=1).reset_index(drop=True), df['repay_fail'].reset_index(drop=True)
+
+
+class DatasetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.csv = os.path.join(self.tmp, 'data4.csv')
+        write_data4_csv(self.csv)
+
+
+class ChunkedLoaderTest(DatasetTestCase):
+
+    def assertFramesMatch(self, X, expected):
+        self.assertEqual(sorted(X.columns), sorted(expected.columns))
+        for col in expected.columns:
+            ours, theirs = X[col], expected[col]
+            if pd.api.types.is_datetime64_any_dtype(theirs):
+                pd.testing.assert_series_equal(ours.astype('datetime64[ns]'), theirs.astype('datetime64[ns]'), obj=col)
+            elif pd.api.types.is_numeric_dtype(theirs):
+                # Stored as float32 now
+                np.testing.assert_allclose(ours.to_numpy(np.float64), theirs.to_numpy(np.float64),
+                                           rtol=1e-6, equal_nan=True, err_msg=col)
+            else:
+                self.assertEqual(ours.astype(object).where(ours.notna(), None).tolist(),
+                                 theirs.astype(object).where(theirs.notna(), None).tolist(), col)
+
+    def test_matches_the_one_shot_cleaning(self):
+        expected_X, expected_y = reference_clean(self.csv)
+        # Chunks much smaller than the file, and not a divisor of its length
+        X, y, stats = dataset.load_training_data(self.csv, chunksize=37)
+        self.assertFramesMatch(X, expected_X)
+        np.testing.assert_array_equal(y.to_numpy(), expected_y.to_numpy())
+        self.assertEqual((stats['rows_read'], stats['rows'], stats['chunks']), (300, len(expected_y), 9))
+
+    def test_strings_stay_categorical_across_chunks(self):
+        X, _, _ = dataset.load_training_data(self.csv, chunksize=37)
+        for col in ('purpose', 'addr_state', 'revol_util'):
+            self.assertIsInstance(X[col].dtype, pd.CategoricalDtype, col)
+        self.assertEqual(X['loan_amnt'].dtype, np.float32)
+
+    def test_chunk_size_does_not_matter(self):
+        small, _, _ = dataset.load_training_data(self.csv, chunksize=37)
+        whole, _, _ = dataset.load_training_data(self.csv, chunksize=1000)
+        self.assertFramesMatch(small, whole)
+
+
+class FeatureCacheTest(DatasetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.tmp, 'feature_cache')
+
+    def load(self):
+        return dataset.load_features(self.csv, cache_dir=self.cache_dir)
+
+    def entries(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_second_load_is_a_hit(self):
+        X, y, stats = self.load()
+        self.assertEqual(stats['cache'], 'miss')
+        X_hit, y_hit, stats = self.load()
+        self.assertEqual(stats['cache'], 'hit')
+        pd.testing.assert_frame_equal(X_hit, X)
+        pd.testing.assert_series_equal(y_hit, y)
+
+    def test_changed_csv_is_rebuilt(self):
+        self.load()
+        first = self.entries()
+        write_data4_csv(self.csv, seed=1)
+        X, _, stats = self.load()
+        self.assertEqual(stats['cache'], 'miss')
+        # The entry for the old CSV is removed
+        self.assertEqual(len(self.entries()), 1)
+        self.assertNotEqual(self.entries(), first)
+        expected_X, _ = reference_clean(self.csv)
+        self.assertEqual(len(X), len(expected_X))
+
+    def test_changed_cleaning_code_is_rebuilt(self):
+        self.load()
+        edited = os.path.join(self.tmp, 'dataset.py')
+        with open(dataset.__file__, encoding='utf-8') as f:
+            source = f.read()
+        with open(edited, 'w', encoding='utf-8') as f:
+            f.write(source + '\n# a change to the cleaning code\n')
+        with mock.patch.object(dataset, '__file__', edited):
+            self.assertEqual(self.load()[2]['cache'], 'miss')
+        with mock.patch.object(dataset.pd, '__version__', '0.0-test'):
+            self.assertEqual(self.load()[2]['cache'], 'miss')
+
+    def test_unreadable_entry_is_rebuilt(self):
+        self.load()
+        with open(os.path.join(self.cache_dir, self.entries()[0]), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertEqual(self.load()[2]['cache'], 'miss')
+        self.assertEqual(self.load()[2]['cache'], 'hit')
+
+
+if __name__ == '__main__':
+    unittest.main()
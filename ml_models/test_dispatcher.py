@@ -0,0 +1,73 @@
+# ml_models/test_dispatcher.py
+#
+# MicroBatchDispatcher: concurrent rows are scored together, and a bad row only fails its own caller.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import asyncio
+import threading
+import unittest
+
+from ml_models.dispatcher import MicroBatchDispatcher
+
+
+def score(row):
+    if row.get('bad'):
+        raise ValueError(f"bad row {row['id']}")
+    return {'id': row['id']}
+
+
+class MicroBatchDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+
+        def predict_batch(rows):
+            self.batches.append(len(rows))
+            return [score(r) for r in rows]
+
+        # A long wait, so the rows submitted below always meet in one batch
+        self.dispatcher = MicroBatchDispatcher(predict_batch, score, max_batch_size=4, max_wait=1.0)
+        self.addCleanup(self.dispatcher.close, 5)
+
+    def test_rows_are_scored_together_in_order(self):
+        futures = [self.dispatcher.submit({'id': i}) for i in range(4)]
+        self.assertEqual([f.result(5) for f in futures], [{'id': i} for i in range(4)])
+        self.assertEqual(self.batches, [4])
+        stats = self.dispatcher.get_stats()
+        self.assertEqual((stats['requests'], stats['batches'], stats['max_batch']), (4, 1, 4))
+
+    def test_full_batch_does_not_wait(self):
+        futures = [self.dispatcher.submit({'id': i}) for i in range(4)]
+        # max_wait is a second; a full batch goes out at once
+        for future in futures:
+            future.result(0.5)
+
+    def test_bad_row_fails_only_its_caller(self):
+        futures = [self.dispatcher.submit({'id': i, 'bad': i == 2}) for i in range(4)]
+        with self.assertRaises(ValueError):
+            futures[2].result(5)
+        self.assertEqual([futures[i].result(5) for i in (0, 1, 3)], [{'id': 0}, {'id': 1}, {'id': 3}])
+        self.assertEqual(self.dispatcher.get_stats()['fallbacks'], 1)
+
+    def test_threads_and_coroutines(self):
+        results = {}
+
+        def call(i):
+            results[i] = self.dispatcher.predict({'id': i}, timeout=5)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        self.assertEqual(asyncio.run(self.dispatcher.predict_async({'id': 3})), {'id': 3})
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, {i: {'id': i} for i in range(3)})
+
+    def test_close_finishes_queued_rows(self):
+        future = self.dispatcher.submit({'id': 7})
+        self.dispatcher.close(5)
+        self.assertEqual(future.result(0), {'id': 7})
+
+
+if __name__ == '__main__':
+    unittest.main()
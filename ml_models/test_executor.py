@@ -0,0 +1,69 @@
+# ml_models/test_executor.py
+#
+# BoundedExecutor: async views score off the event loop and are turned away once it is full.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import asyncio
+import threading
+import unittest
+
+from ml_models.executor import BoundedExecutor, ExecutorBusy
+
+
+class BoundedExecutorTest(unittest.TestCase):
+
+    def test_runs_in_a_worker_thread(self):
+        executor = BoundedExecutor(max_workers=1, max_pending=0)
+        name = asyncio.run(executor.run(lambda: threading.current_thread().name))
+        self.assertTrue(name.startswith('loan-scoring'))
+        self.assertEqual(executor.get_stats()['in_flight'], 0)
+
+    def test_full_executor_rejects_at_once(self):
+        executor = BoundedExecutor(max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def scenario():
+            running = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with self.assertRaises(ExecutorBusy):
+                await executor.run(lambda: None)
+            release.set()
+            await asyncio.gather(*running)
+            # Slots are back once the calls are done
+            return await executor.run(lambda: 'ok')
+
+        self.assertEqual(asyncio.run(scenario()), 'ok')
+        stats = executor.get_stats()
+        self.assertEqual((stats['calls'], stats['rejected'], stats['max_in_flight']), (3, 1, 2))
+
+    def test_cancelled_caller_keeps_its_slot_until_the_call_ends(self):
+        executor = BoundedExecutor(max_workers=1, max_pending=0)
+        release = threading.Event()
+
+        async def scenario():
+            task = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0)
+            task.cancel()
+            # The scoring thread is still busy, so the slot is still taken
+            with self.assertRaises(ExecutorBusy):
+                await executor.run(lambda: None)
+            release.set()
+            while executor.get_stats()['in_flight']:
+                await asyncio.sleep(0.01)
+            return await executor.run(lambda: 'ok')
+
+        self.assertEqual(asyncio.run(scenario()), 'ok')
+
+    def test_errors_reach_the_caller_and_free_the_slot(self):
+        executor = BoundedExecutor(max_workers=1, max_pending=0)
+
+        def fail():
+            raise ValueError("bad input")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(executor.run(fail))
+        self.assertEqual(asyncio.run(executor.run(lambda: 1)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# ml_models/test_incremental.py
+#
+# grow_forest: trees fitted on new rows are appended, and a sliding window never evicts the
+# trees of the full training run.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import pickle
+import unittest
+
+import numpy as np
+
+from ml_models.incremental import application_features, grow_forest
+from ml_models.schema import FeatureSchema
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'model.pkl')
+
+
+def labelled_rows(n: int = 200, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rows = [{
+        'loan_term': int(rng.choice([36, 60])),
+        'interest_rate': float(rng.uniform(5, 25)),
+        'emp_length': '10+ years' if i % 7 == 0 else str(int(rng.integers(0, 10))),
+        'loan_amount': float(rng.uniform(1000, 35000)),
+        'income': float(rng.uniform(1500, 20000)),
+        'expenses': float(rng.uniform(500, 3000)),
+        'emi': float(rng.uniform(100, 1500)),
+    } for i in range(n)]
+    labels = np.array([int(r['interest_rate'] > 15) for r in rows])
+    return [application_features(r) for r in rows], labels
+
+
+class GrowForestTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(MODEL_PATH, 'rb') as f:
+            self.model = pickle.load(f)
+        self.forest = self.model.named_steps['classifier']
+        self.base = list(self.forest.estimators_)
+        schema = FeatureSchema.from_pipeline(self.model)
+        features, self.y = labelled_rows()
+        self.X = schema.to_frame(*schema.fill(features))
+
+    def test_adds_trees_to_the_forest(self):
+        stats = grow_forest(self.model, self.X, self.y, n_trees=5)
+        self.assertEqual(len(self.forest.estimators_), len(self.base) + 5)
+        self.assertEqual(self.forest.estimators_[:len(self.base)], self.base)
+        self.assertEqual((stats['trees_added'], stats['trees_dropped'], stats['base_trees']), (5, 0, len(self.base)))
+        self.assertFalse(self.forest.warm_start)
+        self.assertTrue(np.isfinite(self.model.predict_proba(self.X)).all())
+
+    def test_window_evicts_only_added_trees(self):
+        grow_forest(self.model, self.X, self.y, n_trees=5, max_trees=len(self.base) + 5)
+        first_added = self.forest.estimators_[len(self.base):]
+        stats = grow_forest(self.model, self.X, self.y, n_trees=5, max_trees=len(self.base) + 5)
+        self.assertEqual(stats['trees_dropped'], 5)
+        self.assertEqual(self.forest.estimators_[:len(self.base)], self.base)
+        self.assertFalse(set(map(id, first_added)) & set(map(id, self.forest.estimators_)))
+        self.assertEqual(self.forest.n_estimators, len(self.base) + 5)
+
+    def test_window_smaller_than_the_base_keeps_the_base(self):
+        stats = grow_forest(self.model, self.X, self.y, n_trees=5, max_trees=10)
+        self.assertEqual(self.forest.estimators_, self.base)
+        self.assertEqual(stats['trees_dropped'], 5)
+
+    def test_base_survives_a_pickle_round_trip(self):
+        grow_forest(self.model, self.X, self.y, n_trees=5)
+        model = pickle.loads(pickle.dumps(self.model))
+        stats = grow_forest(model, self.X, self.y, n_trees=5, max_trees=len(self.base))
+        self.assertEqual((stats['base_trees'], stats['trees']), (len(self.base), len(self.base)))
+
+    def test_new_rows_need_every_class(self):
+        with self.assertRaises(ValueError):
+            grow_forest(self.model, self.X, np.zeros(len(self.y), dtype=int))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# ml_models/test_pool.py
+#
+# ProcessPoolBackend: a hot reload (restart) must not fail the calls that are in flight around it.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import threading
+import unittest
+from unittest import mock
+
+from ml_models.pool import ProcessPoolBackend
+from ml_models.predictor import LoanPredictor
+from ml_models.test_predictor import FORM_INPUT
+
+
+def no_inline(row):
+    raise AssertionError("fell back to inline scoring")
+
+
+class ProcessPoolBackendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.expected = LoanPredictor(compiled=True)._predict_one(FORM_INPUT)
+
+    def setUp(self):
+        # fallback='error': any call the pool drops fails the test instead of being scored inline
+        self.backend = ProcessPoolBackend(max_workers=1, timeout=60, fallback='error', compiled=True)
+        self.addCleanup(self.backend.shutdown)
+        self.backend.start()
+
+    def test_restart_between_taking_and_using_the_executor(self):
+        take = self.backend._get_executor
+        raced = []
+
+        def stale_executor():
+            executor = take()
+            if not raced:
+                # The hot reload lands after _call took the executor and before it submits
+                raced.append(True)
+                self.backend.restart()
+            return executor
+
+        self.backend._get_executor = stale_executor
+        self.assertEqual(self.backend.predict_approval(FORM_INPUT, no_inline), self.expected)
+        self.assertEqual(raced, [True])
+        self.assertEqual(self.backend.get_stats()['closed'], 0)
+
+    def test_restart_while_calls_are_in_flight(self):
+        results, errors = [], []
+
+        def call():
+            try:
+                for _ in range(5):
+                    results.append(self.backend.predict_approval(FORM_INPUT, no_inline))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        self.backend.restart()
+        for thread in threads:
+            thread.join(120)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [self.expected] * 20)
+
+    def test_shut_down_pool_falls_back(self):
+        backend = ProcessPoolBackend(max_workers=1, timeout=60, fallback='inline', compiled=True)
+        executor = backend._get_executor()
+        executor.shutdown()
+        # Both the stale executor and its replacement refuse: the fallback policy applies
+        with mock.patch.object(backend, '_new_executor', return_value=executor):
+            self.assertEqual(backend.predict_approval(FORM_INPUT, lambda row: 'inline'), 'inline')
+        self.assertEqual((backend.get_stats()['closed'], backend.get_stats()['fallbacks']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
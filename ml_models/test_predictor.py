@@ -1,15 +1,37 @@
-from predictor import predict_from_input
+# ml_models/test_predictor.py
+#
+# Scoring through LoanPredictor with the web form's fields and with the model's own columns.
+# Run with `python manage.py test ml_models` (or pytest).
 
-test_input = {
+import os
+import subprocess
+import sys
+import unittest
+
+from ml_models.cache import PredictionCache
+from ml_models.predictor import LoanPredictor, predict_from_input
+
+# What the home form sends
+FORM_INPUT = {
+    'term': 36,
+    'int_rate': 13.5,
+    'emp_length': 5,
+    'loan_amount': 15000,
+    'income': 55000,
+    'expenses': 1800,
+    'emi': 450,
+}
+
+# A full application in the model's column names
+MODEL_INPUT = {
     'term': 36,
     'int_rate': 13.56,
     'emp_length': 10,
     'loan_amnt': 15000,
     'annual_inc': 55000,
+    'expenses': 1800,
     'purpose': 'credit_card',
     'home_ownership': 'RENT',
-    'grade': 'B',
-    'sub_grade': 'B2',
     'verification_status': 'Verified',
     'addr_state': 'CA',
     'open_acc': 10,
@@ -22,7 +44,7 @@ test_input = {
     'last_pymnt_d_year': 2023,
     'delinq_2yrs': 0,
     'dti': 15.2,
-    'revol_util': 45.0,
+    'revol_util': '45%',
     'last_pymnt_amnt': 150,
     'revol_bal': 5000,
     'total_pymnt': 17000,
@@ -37,8 +59,92 @@ test_input = {
     'payment_ratio': 1.13,
     'last_credit_pull_d_month': 4,
     'last_credit_pull_d_year': 2024,
-    'total_rec_int': 1900
+    'total_rec_int': 1900,
 }
 
-result = predict_from_input(test_input)
-print("Prediction Result:", result)
+
+class LoanPredictorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sklearn = LoanPredictor(compiled=False)
+        cls.compiled = LoanPredictor(compiled=True)
+
+    def assertResult(self, result):
+        self.assertIn(result['prediction'], (0, 1))
+        self.assertTrue(0.0 <= result['probability'] <= 1.0)
+
+    def test_model_columns(self):
+        self.assertResult(predict_from_input(MODEL_INPUT))
+
+    def test_form_fields(self):
+        result = self.sklearn.predict_approval(FORM_INPUT)
+        self.assertResult(result)
+        self.assertEqual(result, self.compiled.predict_approval(FORM_INPUT))
+
+    def test_batch_matches_single_rows(self):
+        rows = [FORM_INPUT, MODEL_INPUT, dict(FORM_INPUT, int_rate=24.0)]
+        self.assertEqual(self.sklearn.predict_approval_batch(rows), [self.sklearn.predict_approval(r) for r in rows])
+        self.assertEqual(self.compiled.predict_approval_batch(rows), self.sklearn.predict_approval_batch(rows))
+
+    def test_predicted_default_is_rejected(self):
+        # Class 1 is repay_fail, so probability is a probability of default
+        risky = dict(FORM_INPUT, term=60, int_rate=24.0, emp_length=0, loan_amount=35000, income=1500, emi=1200)
+        for row in (FORM_INPUT, risky):
+            result = self.compiled.predict_approval(row)
+            self.assertEqual(result['approved'], result['prediction'] == 0)
+            self.assertEqual(result['status'], 'approved' if result['approved'] else 'rejected')
+            self.assertEqual(result['prediction'], int(result['probability'] > 0.5))
+        self.assertFalse(self.compiled.predict_approval(risky)['approved'])
+
+    def test_rejects_unknown_and_missing_fields(self):
+        with self.assertRaises(ValueError):
+            self.sklearn.predict_approval(dict(FORM_INPUT, not_a_feature=1))
+        with self.assertRaises(ValueError):
+            self.sklearn.predict_approval({k: v for k, v in FORM_INPUT.items() if k != 'income'})
+
+
+class PredictionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.predictor = LoanPredictor(compiled=True, cache=PredictionCache(max_size=16, ttl=60))
+
+    def test_same_application_in_other_spellings_hits(self):
+        first = self.predictor.predict_approval(FORM_INPUT)
+        spellings = [
+            {('loan_amnt' if k == 'loan_amount' else k): v for k, v in FORM_INPUT.items()},
+            {k: str(v) for k, v in FORM_INPUT.items()},
+            dict(reversed(list(FORM_INPUT.items()))),
+        ]
+        for record in spellings:
+            self.assertEqual(self.predictor.predict_approval(record), first)
+        stats = self.predictor.cache.get_stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, len(spellings)))
+
+    def test_different_applications_miss(self):
+        self.predictor.predict_approval(FORM_INPUT)
+        self.predictor.predict_approval(dict(FORM_INPUT, int_rate=20.0))
+        self.assertEqual(self.predictor.cache.get_stats()["misses"], 2)
+
+    def test_cached_results_cannot_be_changed_by_callers(self):
+        result = self.predictor.predict_approval(FORM_INPUT, explain=True)
+        expected = {k: (dict(v) if isinstance(v, dict) else v) for k, v in result.items()}
+        result["contributions"].clear()
+        result["probability"] = -1
+        self.predictor.predict_approval(FORM_INPUT, explain=True)["contributions"]["int_rate"] = 99
+        self.assertEqual(self.predictor.predict_approval(FORM_INPUT, explain=True), expected)
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_import_does_not_load_the_ml_stack(self):
+        # In a fresh interpreter: this process already has NumPy and pandas loaded
+        code = ("import sys, ml_models.predictor as p; "
+                "print(sorted(m for m in ('numpy', 'pandas', 'sklearn') if m in sys.modules), p._async_executor)")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), '[] None')
+
+
+if __name__ == '__main__':
+    unittest.main()
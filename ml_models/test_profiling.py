@@ -0,0 +1,65 @@
+# ml_models/test_profiling.py
+#
+# Stage profiling of the training scripts: stepwise fitting must give the model plain fit() gives.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from ml_models.profiling import StageProfiler, fit_profiled, stage
+from ml_models.train import BASELINE_PARAMS, build_preprocessor
+
+
+def make_model(X):
+    return Pipeline(steps=[
+        ('preprocessor', build_preprocessor(X)),
+        ('classifier', RandomForestClassifier(random_state=0, **dict(BASELINE_PARAMS, n_estimators=10))),
+    ])
+
+
+class FitProfiledTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        self.X = pd.DataFrame({
+            'int_rate': np.where(rng.random(n) < 0.2, np.nan, rng.normal(13, 4, n)),
+            'purpose': rng.choice(['car', 'credit_card', None], n),
+        })
+        self.y = (self.X['int_rate'].fillna(13) + rng.normal(0, 3, n) > 14).astype(int).to_numpy()
+        self.profiler = StageProfiler('test', sample_interval=1.0).start()
+        self.addCleanup(self.profiler.stop)
+
+    def test_fits_like_plain_fit_and_records_each_step(self):
+        expected = make_model(self.X).fit(self.X, self.y)
+        with stage('fit'):
+            model = fit_profiled(make_model(self.X), self.X, self.y, 'pipeline')
+        np.testing.assert_array_equal(model.predict_proba(self.X), expected.predict_proba(self.X))
+        self.assertEqual(list(self.profiler.stages),
+                         ['fit', 'fit/pipeline', 'fit/pipeline/preprocessor', 'fit/pipeline/classifier'])
+        self.assertTrue(all(s['calls'] == 1 for s in self.profiler.stages.values()))
+
+    def test_estimator_classes_are_left_alone(self):
+        before = dict(vars(Pipeline))
+        fit_profiled(make_model(self.X), self.X, self.y)
+        self.assertEqual(dict(vars(Pipeline)), before)
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_dataset_does_not_import_the_serving_module(self):
+        code = "import sys, ml_models.dataset; print('ml_models.predictor' in sys.modules)"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# ml_models/test_reload.py
+#
+# Hot reload: publishing a new artifact version (the CURRENT pointer flip) must put the new
+# model live without a single failed prediction, and a broken version must leave the old one.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import pickle
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+from ml_models import artifact
+from ml_models.compact import compact_forest
+from ml_models.compiled import CompiledPipeline
+from ml_models.predictor import LoanPredictor
+from ml_models.reload import ModelWatcher, install_reload_signal
+from ml_models.test_compiled import MODEL_PATH
+from ml_models.test_predictor import FORM_INPUT
+
+
+class ReloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MODEL_PATH, 'rb') as f:
+            cls.compiled = CompiledPipeline.from_pipeline(pickle.load(f))
+        # A visibly different model: a tenth of the trees
+        cls.smaller = compact_forest(cls.compiled, list(range(10)), quantize=False)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.out = os.path.join(self.tmp, 'model_artifact')
+        self.old = artifact.save_artifact(self.compiled, self.out, source=MODEL_PATH)['fingerprint']
+        self.predictor = LoanPredictor(compiled=True, model_path=self.out)
+        self.predictor.warmup()
+        self.old_result = self.predictor.predict_approval(FORM_INPUT)
+
+    def publish_smaller(self):
+        # Step past the filesystem's mtime resolution, so the watcher sees the flip
+        time.sleep(0.01)
+        return artifact.save_artifact(self.smaller, self.out, source=MODEL_PATH)['fingerprint']
+
+    def score_until(self, done, results, errors):
+        while not done.is_set():
+            try:
+                results.append(self.predictor.predict_approval(FORM_INPUT))
+            except Exception as e:
+                errors.append(e)
+
+    def test_pointer_flip_serves_the_new_model_without_failures(self):
+        watcher = ModelWatcher(self.predictor, interval=60)
+        self.assertFalse(watcher.check())
+
+        done, results, errors = threading.Event(), [], []
+        threads = [threading.Thread(target=self.score_until, args=(done, results, errors)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            new = self.publish_smaller()
+            self.assertNotEqual(new, self.old)
+            self.assertTrue(watcher.check())
+            time.sleep(0.05)
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.predictor.model_fingerprint, new)
+        new_result = self.predictor.predict_approval(FORM_INPUT)
+        self.assertNotEqual(new_result['probability'], self.old_result['probability'])
+        # Every request was answered by one version or the other, never by a half-loaded one
+        self.assertTrue(all(r in (self.old_result, new_result) for r in results))
+        self.assertIn(new_result, results)
+
+    def test_unchanged_content_is_not_reloaded(self):
+        watcher = ModelWatcher(self.predictor, interval=60)
+        time.sleep(0.01)
+        os.utime(artifact.source_file(self.out))
+        self.assertFalse(watcher.check())
+        self.assertEqual(self.predictor.model_fingerprint, self.old)
+
+    def test_broken_version_keeps_the_old_model(self):
+        watcher = ModelWatcher(self.predictor, interval=60)
+        time.sleep(0.01)
+        broken = os.path.join(self.out, 'v0-broken')
+        os.makedirs(broken)
+        with open(os.path.join(broken, artifact.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            f.write('{"format": "something else"}')
+        with open(os.path.join(self.out, artifact.POINTER_FILE), 'w', encoding='utf-8') as f:
+            f.write('v0-broken')
+        self.assertFalse(watcher.check())
+        self.assertEqual(self.predictor.model_fingerprint, self.old)
+        self.assertEqual(self.predictor.predict_approval(FORM_INPUT), self.old_result)
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR2'), "needs SIGUSR2")
+    def test_reload_signal(self):
+        previous = signal.getsignal(signal.SIGUSR2)
+        self.addCleanup(signal.signal, signal.SIGUSR2, previous)
+        self.assertTrue(install_reload_signal(self.predictor))
+        new = self.publish_smaller()
+        os.kill(os.getpid(), signal.SIGUSR2)
+        deadline = time.monotonic() + 10
+        while self.predictor.model_fingerprint != new and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.predictor.model_fingerprint, new)
+
+    def test_signal_needs_the_main_thread(self):
+        installed = []
+        thread = threading.Thread(target=lambda: installed.append(install_reload_signal(self.predictor)))
+        thread.start()
+        thread.join()
+        self.assertEqual(installed, [False])
+
+
+if __name__ == '__main__':
+    unittest.main()
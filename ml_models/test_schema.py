@@ -0,0 +1,83 @@
+# ml_models/test_schema.py
+#
+# FeatureSchema: form field names, derived columns and the canonical form used for cache keys.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import math
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ml_models.schema import FeatureSchema
+from ml_models.stress import Scenario
+
+REQUIRED = ['term', 'int_rate', 'emp_length', 'loan_amount', 'income', 'expenses', 'emi']
+
+# Monthly amounts, as the home form asks for them
+FORM_INPUT = {'term': 36, 'int_rate': 13.5, 'emp_length': 5, 'loan_amount': 15000,
+              'income': 5000, 'expenses': 1800, 'emi': 450}
+
+
+class FeatureSchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = FeatureSchema(
+            ['term', 'int_rate', 'emp_length', 'loan_amnt', 'annual_inc', 'expenses', 'installment', 'dti'],
+            ['purpose'], required=REQUIRED)
+
+    def filled(self, record):
+        num, _ = self.schema.fill([record])
+        return dict(zip(self.schema.num_columns, num[0]))
+
+    def test_monthly_income_becomes_annual(self):
+        row = self.filled(FORM_INPUT)
+        self.assertEqual(row['annual_inc'], 60000)
+        self.assertEqual(row['loan_amnt'], 15000)
+        self.assertEqual(row['installment'], 450)
+
+    def test_dti_is_monthly_payment_over_monthly_income(self):
+        self.assertAlmostEqual(self.filled(FORM_INPUT)['dti'], 450 / 5000 * 100)
+        self.assertAlmostEqual(self.filled({'annual_inc': 60000, 'installment': 450})['dti'], 9.0)
+
+    def test_sent_columns_win_over_derived_ones(self):
+        row = self.filled(dict(FORM_INPUT, annual_inc=90000, dti=20.0))
+        self.assertEqual((row['annual_inc'], row['dti']), (90000, 20.0))
+
+    def test_zero_income_is_left_missing(self):
+        self.assertTrue(math.isnan(self.filled(dict(FORM_INPUT, income=0))['dti']))
+
+    def test_record_batch_and_frame_fill_agree(self):
+        records = [FORM_INPUT, dict(FORM_INPUT, income=None), {'annual_inc': 48000, 'emi': 400, 'purpose': 'car'}]
+        num, _ = self.schema.fill(records)
+        for record, row in zip(records, num):
+            np.testing.assert_array_equal(row, self.schema.fill([record])[0][0])
+        # A frame column is sent for every row, so compare the rows that share their fields
+        frame_num, _ = self.schema.fill_frame(pd.DataFrame(records[:2]))
+        np.testing.assert_array_equal(num[:2], frame_num)
+
+    def test_annual_income_meets_the_income_requirement(self):
+        annual = {('annual_inc' if k == 'income' else k): (v * 12 if k == 'income' else v) for k, v in FORM_INPUT.items()}
+        self.schema.validate(annual)
+        self.assertEqual(self.schema.canonical(annual), self.schema.canonical(FORM_INPUT))
+        with self.assertRaises(ValueError):
+            self.schema.validate({k: v for k, v in FORM_INPUT.items() if k != 'income'})
+
+    def test_canonical_ignores_spelling(self):
+        renamed = {'loan_amnt': '15000', 'installment': '450', **{k: str(v) for k, v in FORM_INPUT.items()
+                                                                   if k not in ('loan_amount', 'emi')}}
+        self.assertEqual(self.schema.canonical(renamed), self.schema.canonical(FORM_INPUT))
+        self.assertNotEqual(self.schema.canonical(dict(FORM_INPUT, income=6000)), self.schema.canonical(FORM_INPUT))
+
+    def test_stress_shocks_on_monthly_income_move_annual_income(self):
+        base, _ = self.schema.fill([FORM_INPUT])
+        out = base.copy()
+        Scenario('income -500/month', add={'income': -500}).apply(self.schema, base, out)
+        row = dict(zip(self.schema.num_columns, out[0]))
+        self.assertAlmostEqual(row['annual_inc'], 54000)
+        self.assertAlmostEqual(row['dti'], 450 / 4500 * 100)
+        self.assertEqual(Scenario('income -10%', multiply={'income': 0.9}).multiply, {'annual_inc': 0.9})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# ml_models/test_score_file.py
+#
+# Bulk scoring: a run interrupted and resumed from its checkpoint must write exactly the output
+# of an uninterrupted run, and a checkpoint is never resumed with another model or input.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from ml_models import score_file
+from ml_models.test_compiled import MODEL_PATH
+from ml_models.test_dataset import write_data4_csv
+
+CHUNK_ROWS = 40
+
+
+class Interrupted(Exception):
+    pass
+
+
+class ScoreFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.csv = os.path.join(self.tmp, 'portfolio.csv')
+        write_data4_csv(self.csv, n=300)
+
+    def output(self, name):
+        return os.path.join(self.tmp, name)
+
+    def score(self, output, **kwargs):
+        kwargs.setdefault('model_path', MODEL_PATH)
+        return score_file.score_file(self.csv, output, workers=0, chunk_rows=CHUNK_ROWS, compiled=True, **kwargs)
+
+    def interrupt_after(self, output, chunks):
+        calls = []
+
+        def progress(*args):
+            calls.append(args)
+            if len(calls) == chunks:
+                raise Interrupted()
+
+        with mock.patch('ml_models.score_file._print_progress', side_effect=progress), self.assertRaises(Interrupted):
+            self.score(output)
+
+    def read_bytes(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_resumed_run_matches_an_uninterrupted_one(self):
+        expected = self.output('expected.csv')
+        state = self.score(expected)
+        self.assertEqual((state['rows_done'], state['finished']), (300, True))
+
+        resumed = self.output('resumed.csv')
+        self.interrupt_after(resumed, chunks=3)
+        checkpoint = score_file._read_checkpoint(resumed, score_file._input_signature(self.csv, CHUNK_ROWS),
+                                                 state['model'])
+        self.assertEqual((checkpoint['rows_done'], checkpoint['finished']), (3 * CHUNK_ROWS, False))
+        # A crash halfway through writing the next chunk leaves a partial line behind the checkpoint
+        with open(resumed, 'ab') as f:
+            f.write(b'120,1120,0.12')
+
+        state = self.score(resumed)
+        self.assertEqual((state['rows_done'], state['finished']), (300, True))
+        self.assertEqual(self.read_bytes(resumed), self.read_bytes(expected))
+        rows = pd.read_csv(resumed)['row']
+        self.assertEqual(rows.tolist(), list(range(300)))
+
+    def test_finished_output_is_not_rescored(self):
+        output = self.output('scores.csv')
+        self.score(output)
+        with mock.patch('ml_models.score_file._init_worker') as init:
+            self.assertTrue(self.score(output)['finished'])
+        init.assert_not_called()
+
+    def test_checkpoint_of_another_model_is_refused(self):
+        output = self.output('scores.csv')
+        self.interrupt_after(output, chunks=1)
+        # Same forest, different file: a different fingerprint
+        other_model = self.output('other.pkl')
+        with open(MODEL_PATH, 'rb') as f:
+            model = pickle.load(f)
+        model.retrained_for_test = True
+        with open(other_model, 'wb') as f:
+            pickle.dump(model, f)
+        with self.assertRaisesRegex(RuntimeError, 'started with model'):
+            self.score(output, model_path=other_model)
+        # --restart scores everything with the new model
+        self.assertEqual(self.score(output, model_path=other_model, restart=True)['rows_done'], 300)
+
+    def test_checkpoint_of_another_input_is_refused(self):
+        output = self.output('scores.csv')
+        self.interrupt_after(output, chunks=1)
+        with self.assertRaisesRegex(RuntimeError, 'different input file or chunk size'):
+            score_file.score_file(self.csv, output, workers=0, chunk_rows=CHUNK_ROWS + 1, compiled=True,
+                                  model_path=MODEL_PATH)
+        write_data4_csv(self.csv, n=310, seed=1)
+        with self.assertRaisesRegex(RuntimeError, 'different input file or chunk size'):
+            self.score(output)
+
+
+if __name__ == '__main__':
+    unittest.main()
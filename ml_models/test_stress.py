@@ -0,0 +1,53 @@
+# ml_models/test_stress.py
+#
+# Stress scenarios: the base scenario must report what the predictor itself decides.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import unittest
+
+import numpy as np
+
+from ml_models.predictor import LoanPredictor
+from ml_models.stress import StressEngine, load_scenarios
+
+
+def applications(n: int = 200, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [{
+        'term': int(rng.choice([36, 60])),
+        'int_rate': float(rng.uniform(5, 25)),
+        'emp_length': float(rng.integers(0, 11)),
+        'loan_amount': float(rng.uniform(1000, 35000)),
+        'income': float(rng.uniform(1500, 20000)),
+        'expenses': float(rng.uniform(500, 3000)),
+        'emi': float(rng.uniform(100, 1500)),
+    } for _ in range(n)]
+
+
+class StressEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = LoanPredictor(compiled=True)
+        cls.predictor.warmup()
+        cls.records = applications()
+        loaded = cls.predictor._current()
+        cls.engine = StressEngine(loaded.compiled, loaded.schema, load_scenarios())
+        cls.engine.add_batch(cls.records, np.array([r['loan_amount'] for r in cls.records]),
+                             np.array([r['term'] for r in cls.records]))
+        cls.results = cls.engine.results()
+
+    def test_base_scenario_matches_the_predictor(self):
+        decisions = self.predictor.predict_approval_batch(self.records)
+        base = self.results['scenarios']['base']
+        self.assertEqual(base['approval_rate'], round(np.mean([r['approved'] for r in decisions]), 4))
+        self.assertAlmostEqual(base['mean_pd'], np.mean([r['probability'] for r in decisions]), places=3)
+        self.assertEqual(base['change'], {'approval_rate': 0.0, 'mean_pd': 0.0, 'expected_loss': 0.0})
+
+    def test_shocked_scenarios_change_the_scores(self):
+        for name in ('rate +200bps', 'income -10%'):
+            self.assertNotEqual(self.results['scenarios'][name]['mean_pd'], self.results['scenarios']['base']['mean_pd'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+# ml_models/test_train.py
+#
+# The hyperparameter search's folds: each is encoded without looking at the rows it is scored on.
+# Run with `python manage.py test ml_models` (or pytest).
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+
+from ml_models.train import build_preprocessor, encode_folds
+
+
+class EncodeFoldsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 300
+        self.X = pd.DataFrame({
+            'int_rate': np.where(rng.random(n) < 0.2, np.nan, rng.normal(13, 4, n)),
+            'purpose': rng.choice([f'p{i}' for i in range(40)] + [None], n),
+        })
+        self.y = (rng.random(n) < 0.3).astype(int)
+
+    def test_test_rows_are_encoded_with_training_rows_statistics(self):
+        folds = encode_folds(self.X, self.y, cv=3, seed=1)
+        splits = StratifiedKFold(n_splits=3, shuffle=True, random_state=1).split(np.zeros(len(self.y)), self.y)
+        for (X_tr, y_tr, X_te, y_te), (train_idx, test_idx) in zip(folds, splits):
+            expected = build_preprocessor(self.X).fit(self.X.iloc[train_idx]).transform(self.X.iloc[test_idx])
+            np.testing.assert_allclose(X_te.toarray(), expected.toarray().astype(np.float32))
+            np.testing.assert_array_equal(y_te, self.y[test_idx])
+            self.assertEqual(X_tr.shape[0], len(train_idx))
+
+    def test_layouts_the_forest_uses_without_copying(self):
+        X_tr, _, X_te, _ = encode_folds(self.X, self.y, cv=3)[0]
+        self.assertEqual((X_tr.format, X_te.format), ('csc', 'csr'))
+        self.assertEqual((X_tr.dtype, X_te.dtype), (np.float32, np.float32))
+
+
+if __name__ == '__main__':
+    unittest.main()
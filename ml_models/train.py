@@ -0,0 +1,222 @@
+# ml_models/train.py
+#
+# Cross-validated hyperparameter search for the loan model, run across all cores.
+#
+#     python -m ml_models.train --data dataset/data4.csv --n-iter 20 --time-budget 900
+#
+# The preprocessing step is fitted once per CV fold, on that fold's training rows only (so the
+# imputer medians and scaler statistics never see the rows a fold is scored on), and the encoded
+# fold matrices are shared with the joblib workers as read-only memory maps, so no worker holds
+# its own copy. Candidates are evaluated in waves (one candidate per worker); once the time
+# budget would be exceeded no further wave starts. The best parameters are refitted as the usual
+# Pipeline and written to model.pkl, with every candidate's scores in a JSON report.
+
+import argparse
+import json
+import os
+import pickle
+import time
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from ml_models.dataset import load_features
+from ml_models.memory import peak_rss_mb
+from ml_models.profiling import StageProfiler, fit_profiled, fit_transform_profiled, stage
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# What model.py trains today; always evaluated first so the report shows the gain over it
+BASELINE_PARAMS = {'n_estimators': 100, 'max_depth': 10, 'min_samples_leaf': 1,
+                   'max_features': 'sqrt', 'class_weight': 'balanced'}
+
+PARAM_SPACE = {
+    'n_estimators': [100, 200, 400],
+    'max_depth': [8, 10, 14, 20, None],
+    'min_samples_leaf': [1, 2, 5, 10],
+    'max_features': ['sqrt', 0.05, 0.1],
+    'class_weight': ['balanced', 'balanced_subsample'],
+}
+
+
+def build_preprocessor(X) -> ColumnTransformer:
+    """Same preprocessing as model.py."""
+    numeric_features = X.select_dtypes(include='number').columns.tolist()
+    categorical_features = X.select_dtypes(include=['object', 'category']).columns.tolist()
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore'))
+    ])
+    return ColumnTransformer(transformers=[
+        ('num', numeric_transformer, numeric_features),
+        ('cat', categorical_transformer, categorical_features)
+    ])
+
+
+def encode_folds(X, y: np.ndarray, cv: int = 3, seed: int = 42) -> List[Tuple[Any, np.ndarray, Any, np.ndarray]]:
+    """
+    Stratified k-fold splits of (X, y), each encoded by a preprocessor fitted on its training
+    rows: (X_train, y_train, X_test, y_test) per fold. Training matrices are CSC float32 and test
+    matrices CSR float32, the layouts the forest's fit and predict work on, so workers never
+    convert or copy them. Holds about cv times the encoded training split.
+    """
+    folds = []
+    for train_idx, test_idx in StratifiedKFold(n_splits=cv, shuffle=True, random_state=seed).split(np.zeros(len(y)), y):
+        preprocessor = build_preprocessor(X)
+        X_tr = fit_transform_profiled(preprocessor, X.iloc[train_idx], name='preprocessor')
+        X_te = preprocessor.transform(X.iloc[test_idx])
+        if hasattr(X_tr, 'tocsc'):
+            X_tr, X_te = X_tr.tocsc().astype(np.float32), X_te.tocsr().astype(np.float32)
+        else:
+            X_tr, X_te = np.asarray(X_tr, dtype=np.float32), np.asarray(X_te, dtype=np.float32)
+        folds.append((X_tr, y[train_idx], X_te, y[test_idx]))
+    return folds
+
+
+def _score_fold(params: Dict[str, Any], X_train, y_train, X_test, y_test, seed: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    forest = RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    forest.fit(X_train, y_train)
+    proba = forest.predict_proba(X_test)[:, 1]
+    return {"auc": roc_auc_score(y_test, proba), "fit_seconds": time.perf_counter() - started}
+
+
+def _score_candidate(params: Dict[str, Any], folds, seed: int) -> Dict[str, Any]:
+    # The fold matrices arrive as read-only memory maps (joblib's automatic memmapping of large arrays)
+    scores = [_score_fold(params, *fold, seed) for fold in folds]
+    aucs = [s["auc"] for s in scores]
+    return {
+        "params": params,
+        "mean_auc": round(float(np.mean(aucs)), 5),
+        "std_auc": round(float(np.std(aucs)), 5),
+        "fold_auc": [round(float(a), 5) for a in aucs],
+        "seconds": round(sum(s["fit_seconds"] for s in scores), 2),
+    }
+
+
+def search(folds, candidates: List[Dict[str, Any]], n_jobs: int = -1,
+           time_budget: Optional[float] = None, seed: int = 42) -> Dict[str, Any]:
+    """Evaluate candidates on the encode_folds() folds, one candidate per worker, in waves."""
+    workers = effective_n_jobs(n_jobs)
+    started = time.perf_counter()
+    results, stopped_early = [], False
+
+    with Parallel(n_jobs=n_jobs, max_nbytes='1M', mmap_mode='r') as parallel:
+        for start in range(0, len(candidates), workers):
+            elapsed = time.perf_counter() - started
+            if time_budget is not None and results:
+                # Candidates in a wave run side by side, so a wave lasts about as long as its slowest one
+                wave_estimate = max(r["seconds"] for r in results)
+                if elapsed + wave_estimate > time_budget:
+                    stopped_early = True
+                    break
+            wave = candidates[start:start + workers]
+            results.extend(parallel(delayed(_score_candidate)(p, folds, seed) for p in wave))
+            best = max(results, key=lambda r: r["mean_auc"])
+            print(f"[{time.perf_counter() - started:7.1f}s] {len(results)}/{len(candidates)} candidates, "
+                  f"best mean AUC {best['mean_auc']:.4f} {best['params']}")
+
+    results.sort(key=lambda r: r["mean_auc"], reverse=True)
+    return {
+        "results": results,
+        "best": results[0],
+        "evaluated": len(results),
+        "requested": len(candidates),
+        "stopped_early": stopped_early,
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def candidate_params(n_iter: int, seed: int = 42) -> List[Dict[str, Any]]:
+    sampled = [dict(p) for p in ParameterSampler(PARAM_SPACE, n_iter=n_iter, random_state=seed)]
+    return [dict(BASELINE_PARAMS)] + [p for p in sampled if p != BASELINE_PARAMS][:max(0, n_iter - 1)]
+
+
+def train(data_path: str, out_path: str, report_path: str, n_iter: int = 20, cv: int = 3, n_jobs: int = -1,
+          time_budget: Optional[float] = None, seed: int = 42) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with stage('load'):
+        X, y, load_stats = load_features(data_path)
+    print(f"Loaded {load_stats['rows']} rows (feature cache: {load_stats['cache']})")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=seed, stratify=y)
+    # Encoded once per fold; the forest is the only thing the search varies
+    with stage('preprocess'):
+        folds = encode_folds(X_train, np.asarray(y_train), cv, seed)
+
+    with stage('search'):
+        outcome = search(folds, candidate_params(n_iter, seed), n_jobs, time_budget, seed)
+    del folds
+    best_params = outcome["best"]["params"]
+    print(f"Best parameters: {best_params} (mean AUC {outcome['best']['mean_auc']:.4f})")
+
+    model = Pipeline(steps=[
+        ('preprocessor', build_preprocessor(X_train)),
+        ('classifier', RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **best_params))
+    ])
+    with stage('refit'):
+        fit_profiled(model, X_train, y_train, 'pipeline')
+    # Scoring in the web workers is single-threaded
+    model.named_steps['classifier'].set_params(n_jobs=None)
+
+    with stage('evaluate'):
+        y_pred = model.predict(X_test)
+        y_proba = model.predict_proba(X_test)[:, 1]
+    report = {
+        "data": data_path,
+        "rows": load_stats["rows"],
+        "cv_folds": cv,
+        "time_budget": time_budget,
+        "search": outcome,
+        "test": {
+            "roc_auc": round(float(roc_auc_score(y_test, y_proba)), 5),
+            "accuracy": round(float(accuracy_score(y_test, y_pred)), 5),
+            "classification_report": classification_report(y_test, y_pred, output_dict=True),
+        },
+        "seconds": round(time.perf_counter() - started, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    # Write next to the target and rename, so running servers never load a half-written file
+    tmp_path = out_path + '.tmp'
+    with stage('save'), open(tmp_path, 'wb') as f:
+        pickle.dump(model, f, protocol=4)
+    os.replace(tmp_path, out_path)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Test ROC AUC {report['test']['roc_auc']:.4f}; model saved to {out_path}, report to {report_path}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the loan model.")
+    parser.add_argument('--data', default=os.path.join('dataset', 'data4.csv'))
+    parser.add_argument('--out', default=os.path.join(HERE, 'model.pkl'))
+    parser.add_argument('--report', default=os.path.join(HERE, 'train_report.json'))
+    parser.add_argument('--n-iter', type=int, default=20, help="parameter sets to try, the baseline included")
+    parser.add_argument('--cv', type=int, default=3)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="worker processes (-1 = all cores)")
+    parser.add_argument('--time-budget', type=float, default=None, help="seconds; no new wave starts after this")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # Per-stage wall/CPU time and memory, written as a JSON report when LOAN_PROFILE_DIR is set
+    profiler = StageProfiler.from_env('train')
+    if profiler:
+        profiler.start()
+    train(args.data, args.out, args.report, args.n_iter, args.cv, args.n_jobs, args.time_budget, args.seed)
+    if profiler:
+        profiler.stop()
+        print(f"Profile written to {profiler.write()['report']}")